@@ -5,13 +5,24 @@
     * Example usage:
         from constants import SETTINGS_PATH, WORKING_SPACE, console
 
+    * Example: several machines sharing the work (a shared working space and output directory):
+        set MM_AVH_WORKING_SPACE=\\\\server\\mm_avh\\working_space
+        set MM_AVH_OUTPUT=\\\\server\\mm_avh\\output
+
     Variables:
         - SETTINGS_PATH: Path to the settings file.
-        - WORKING_SPACE: Main working path.
-        - WORKING_SPACE_OUTPUT: Path to the output folder.
+        - TTS_CALIBRATION_PATH: Path to the calibration of the speech duration estimate of every TTS engine.
+        - TRANSLATION_MEMORY_PATH: Path to the database of translated subtitle lines.
+        - WORKING_SPACE: Main working path (can be changed with the MM_AVH_WORKING_SPACE environment variable).
+        - WORKING_SPACE_OUTPUT: Path to the output folder (can be changed with the MM_AVH_OUTPUT environment variable).
         - WORKING_SPACE_TEMP: Path to the temporary folder.
         - WORKING_SPACE_TEMP_MAIN_SUBS: Path to the folder with main subtitles.
         - WORKING_SPACE_TEMP_ALT_SUBS: Path to the folder with alternative subtitles.
+        - WORKING_SPACE_JOURNAL: Path to the folder with the journals of finished pipeline stages.
+        - WORKING_SPACE_CACHE: Path to the content-addressed cache of pipeline stage results.
+        - WORKING_SPACE_QUEUE: Path to the database of the job queue used by the watch-folder daemon.
+        - MKV_INDEX_PATH: Path to the index of identified MKV files.
+        - FFMPEG_METRICS_PATH: Path to the file with the encode speed of every ffmpeg job (JSON lines).
         - MKVTOOLNIX_FOLDER: Path to the mkvtoolnix folder.
         - MKV_EXTRACT_PATH: Path to the mkvextract.exe file.
         - MKV_MERGE_PATH: Path to the mkvmerge.exe file.
@@ -24,19 +35,28 @@
         - console: Instance of the Console class from the rich library, defined with various styles.
 """
 
-from os import getcwd, pardir, path
+from os import environ, getcwd, pardir, path
 from rich.console import Console
 from rich.theme import Theme
 
 # Path for settings
 SETTINGS_PATH: str = path.join(getcwd(), 'data', 'settings.json')
+TTS_CALIBRATION_PATH: str = path.join(getcwd(), 'data', 'tts_calibration.json')
+TRANSLATION_MEMORY_PATH: str = path.join(getcwd(), 'data', 'translation_memory.db')
 
 # Main paths
-WORKING_SPACE: str = path.join(getcwd(), 'working_space')
-WORKING_SPACE_OUTPUT: str = path.join(WORKING_SPACE, 'output')
+WORKING_SPACE: str = environ.get(
+    'MM_AVH_WORKING_SPACE', path.join(getcwd(), 'working_space'))
+WORKING_SPACE_OUTPUT: str = environ.get(
+    'MM_AVH_OUTPUT', path.join(WORKING_SPACE, 'output'))
 WORKING_SPACE_TEMP: str = path.join(WORKING_SPACE, 'temp')
 WORKING_SPACE_TEMP_MAIN_SUBS: str = path.join(WORKING_SPACE_TEMP, 'main_subs')
 WORKING_SPACE_TEMP_ALT_SUBS: str = path.join(WORKING_SPACE_TEMP, 'alt_subs')
+WORKING_SPACE_JOURNAL: str = path.join(WORKING_SPACE, 'journal')
+WORKING_SPACE_CACHE: str = path.join(WORKING_SPACE, 'cache')
+WORKING_SPACE_QUEUE: str = path.join(WORKING_SPACE, 'queue.db')
+MKV_INDEX_PATH: str = path.join(WORKING_SPACE_CACHE, 'mkv_index.json')
+FFMPEG_METRICS_PATH: str = path.join(WORKING_SPACE, 'ffmpeg_metrics.jsonl')
 
 # Paths for mkvtoolnix
 MKVTOOLNIX_FOLDER: str = path.join(
@@ -0,0 +1,227 @@
+"""
+    Module `Manifest` describes a job manifest used to run the whole pipeline without any user interaction.
+    A manifest is a JSON (or YAML, if PyYAML is installed) file that lists the files to process,
+    the tracks to extract, the ASS styles to send to TTS and the settings to use.
+
+    * Example: First, load a manifest from a file:
+        manifest = Manifest.load_from_file('jobs.json')
+
+    * Example usage of the `Manifest` class:
+        settings = manifest.settings
+        entry = manifest.get_file('example.mkv')
+        if entry and entry.translate:
+            ...
+
+    * Example manifest in 'jobs.json':
+        {
+        "workers": 4,
+        "resources": {"network": 4, "cpu": 2, "disk": 2},
+        "cache_size_gb": 20,
+        "settings": {
+            "translator": "DeepL API",
+            "translated_line_count": "50",
+            "tts": "TTS - Zofia - Edge",
+            "tts_speed": "+40%",
+            "tts_volume": "+0%",
+            "output": "Scal do mkv"
+        },
+        "defaults": {
+            "tracks": [2],
+            "styles": ["Default"],
+            "translate": true,
+            "convert_numbers": true,
+            "generate_audio": true
+        },
+        "files": [
+            {"filename": "example_01.mkv"},
+            {"filename": "example_02.mkv", "tracks": [3], "styles": ["Main", "Italics"]},
+            {"filename": "example_03.mkv", "styles": ["auto"]}
+        ]
+        }
+"""
+
+import sys
+from dataclasses import dataclass, field, fields, replace
+from json import decoder, load
+from os import path
+from typing import Any, Dict, List, Optional
+
+from constants import console
+from data.settings import Settings
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+
+@dataclass(slots=True)
+class ManifestFile:
+    """
+        A single file entry of the manifest.
+
+        Attributes:
+            - filename (str): The name of the file in the working space (MKV or subtitle file).
+            - tracks (List[int]): The IDs of the tracks to extract from the MKV file.
+            - styles (List[str]): The ASS styles which go to the main subtitles (TTS);
+              're:' entries are regular expressions, 'auto' adds the styles classified as dialogue.
+            - translate (bool): Whether to translate the subtitles of the file.
+            - convert_numbers (bool): Whether to convert numbers to words in the subtitles of the file.
+            - generate_audio (bool): Whether to generate audio for the subtitles of the file.
+
+        Methods:
+            - stem -> str: The file name without the extension, shared by all files of one episode.
+    """
+    filename: str
+    tracks: List[int] = field(default_factory=list)
+    styles: List[str] = field(default_factory=list)
+    translate: bool = True
+    convert_numbers: bool = True
+    generate_audio: bool = True
+
+    @property
+    def stem(self) -> str:
+        """
+            Returns the file name without the extension.
+        """
+        return path.splitext(self.filename)[0]
+
+
+@dataclass(slots=True)
+class Manifest:
+    """
+        A class representing a job manifest for the headless mode.
+
+        Attributes:
+            - settings (Settings): The settings used for the whole run.
+            - files (List[ManifestFile]): The files to process.
+            - workers (int): The number of episodes processed at the same time.
+            - resources (Dict[str, int]): The slots of each resource pool; if set, the stages of all episodes are scheduled as a dependency graph.
+            - cache_size_gb (float): The size limit of the stage results cache in GiB; 0 disables the cache.
+            - defaults (Dict[str, Any]): The default values of the file entries, used for files not listed in the manifest.
+
+        Methods:
+            - load_from_file(cls, manifest_path: str) -> 'Manifest': Load a manifest from a JSON or YAML file.
+            - get_file(self, filename: str) -> Optional[ManifestFile]: Get the entry for a file of the same episode.
+            - get_entry(self, filename: str) -> ManifestFile: Get the entry for a file, built from the defaults if it is not listed.
+    """
+    settings: Settings
+    files: List[ManifestFile] = field(default_factory=list)
+    workers: int = 1
+    resources: Dict[str, int] = field(default_factory=dict)
+    cache_size_gb: float = 20
+    defaults: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def load_from_file(cls, manifest_path: str) -> 'Manifest':
+        """
+            Load a manifest from a JSON or YAML file.
+            Settings missing in the manifest are taken from the saved settings file.
+            If the file cannot be read, the program will exit with an error message.
+
+            Args:
+                - manifest_path (str): The path to the manifest file.
+
+            Returns:
+                - Manifest: An instance of the Manifest class with the loaded jobs.
+        """
+        data: Dict[str, Any] = cls._read_file(manifest_path)
+
+        settings: Settings = Settings.load_from_file()
+        settings_fields: List[str] = [
+            settings_field.name for settings_field in fields(Settings)]
+        overrides: Dict[str, Any] = {key: value for key, value in data.get('settings', {}).items()
+                                     if key in settings_fields}
+        settings = replace(settings, **overrides)
+
+        defaults: Dict[str, Any] = data.get('defaults', {})
+        files: List[ManifestFile] = [
+            cls._parse_file(entry, defaults) for entry in data.get('files', [])]
+
+        return cls(settings=settings,
+                   files=files,
+                   workers=max(1, int(data.get('workers', 1))),
+                   resources={resource: max(1, int(slots)) for resource, slots in data.get('resources', {}).items()},
+                   cache_size_gb=max(0.0, float(data.get('cache_size_gb', 20))),
+                   defaults=defaults)
+
+    @staticmethod
+    def _read_file(manifest_path: str) -> Dict[str, Any]:
+        """
+            Reads the raw content of the manifest file.
+
+            Args:
+                - manifest_path (str): The path to the manifest file.
+
+            Returns:
+                - Dict[str, Any]: The parsed content of the manifest file.
+        """
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as file:
+                if manifest_path.endswith(('.yaml', '.yml')):
+                    if yaml is None:
+                        console.print(
+                            'Pliki YAML wymagają pakietu PyYAML (pip install pyyaml).', style='red_bold')
+                        sys.exit()
+                    return yaml.safe_load(file) or {}
+                return load(file)
+        except FileNotFoundError:
+            console.print(
+                f'Nie znaleziono pliku {manifest_path}', style='red_bold')
+        except decoder.JSONDecodeError:
+            console.print(
+                f'Niepoprawny format pliku {manifest_path}', style='red_bold')
+        sys.exit()
+
+    @staticmethod
+    def _parse_file(entry: Dict[str, Any], defaults: Dict[str, Any]) -> ManifestFile:
+        """
+            Parses a single file entry, filling the missing values with the manifest defaults.
+
+            Args:
+                - entry (Dict[str, Any]): The file entry from the manifest.
+                - defaults (Dict[str, Any]): The default values for all file entries.
+
+            Returns:
+                - ManifestFile: The parsed file entry.
+        """
+        values: Dict[str, Any] = {**defaults, **entry}
+        return ManifestFile(
+            filename=values['filename'],
+            tracks=[int(track_id) for track_id in values.get('tracks', [])],
+            styles=list(values.get('styles', [])),
+            translate=bool(values.get('translate', True)),
+            convert_numbers=bool(values.get('convert_numbers', True)),
+            generate_audio=bool(values.get('generate_audio', True))
+        )
+
+    def get_file(self, filename: str) -> Optional[ManifestFile]:
+        """
+            Gets the entry for the given file. Files are matched by their name without the extension,
+            so the entry of 'example.mkv' is also used for 'example.ass' and 'example.srt'.
+
+            Args:
+                - filename (str): The name of the file.
+
+            Returns:
+                - Optional[ManifestFile]: The matching entry or None if the file is not in the manifest.
+        """
+        stem: str = path.splitext(filename)[0]
+        return next((entry for entry in self.files if entry.stem == stem), None)
+
+    def get_entry(self, filename: str) -> ManifestFile:
+        """
+            Gets the entry for the given file. Other files of a listed episode share its options,
+            and files not listed in the manifest get an entry built from the defaults,
+            so files which appear later (e.g. in the watched folder) are processed in the same way.
+
+            Args:
+                - filename (str): The name of the file.
+
+            Returns:
+                - ManifestFile: The entry of the file.
+        """
+        entry: Optional[ManifestFile] = self.get_file(filename)
+        if entry is not None:
+            return replace(entry, filename=filename)
+        return self._parse_file({'filename': filename}, self.defaults)
@@ -22,13 +22,20 @@
         "tts": "TTS - Agnieszka - Ivona",
         "tts_speed": "5",
         "tts_volume": "65",
-        "output": "Ogl\u0105dam w MM_AVH_Players (wynik: napisy i audio)"
+        "output": "Ogl\u0105dam w MM_AVH_Players (wynik: napisy i audio)",
+        "track_rules": null
         }
+
+    * Example rules for the automatic selection of tracks to extract (edited directly in 'settings.json'):
+        "track_rules": [
+            {"type": "subtitles", "codec_id": "S_TEXT/ASS", "language": "eng", "select": "first"},
+            {"type": "subtitles", "language_ietf": "en-*", "select": "all"}
+        ]
 """
 
 from dataclasses import asdict, dataclass
 from json import decoder, dump, load
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 import webbrowser
 
 from constants import SETTINGS_PATH, console
@@ -49,6 +56,8 @@ class Settings:
             - tts_speed (Optional[str]): The speed of the TTS voice.
             - tts_volume (Optional[str]): The volume of the TTS voice.
             - output (Optional[str]): The selected output option.
+            - track_rules (Optional[List[Dict[str, Any]]]): The rules selecting the tracks to extract from MKV files;
+                if not set, the user is asked for the track IDs.
 
         Methods:
             - load_from_file(cls, settings_path: str) -> 'Settings': Load settings from a file.
@@ -75,6 +84,7 @@ class Settings:
     tts_speed: Optional[str] = None
     tts_volume: Optional[str] = None
     output: Optional[str] = None
+    track_rules: Optional[List[Dict[str, Any]]] = None
 
     @classmethod
     def load_from_file(cls, settings_path: str = SETTINGS_PATH) -> 'Settings':
@@ -127,7 +137,8 @@ class Settings:
             tts=data.get('tts'),
             tts_speed=data.get('tts_speed'),
             tts_volume=data.get('tts_volume'),
-            output=data.get('output')
+            output=data.get('output'),
+            track_rules=data.get('track_rules')
         )
 
     @staticmethod
@@ -455,7 +466,8 @@ class Settings:
             tts=tts,
             tts_speed=tts_speed,
             tts_volume=tts_volume,
-            output=output
+            output=output,
+            track_rules=settings.track_rules
         )
 
     @staticmethod
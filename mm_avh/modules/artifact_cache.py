@@ -0,0 +1,250 @@
+"""
+    This module defines the 'ArtifactCache' class, a content-addressed cache for the results of pipeline stages.
+    A cache entry is keyed on the digests of the stage inputs, the stage name and the settings which affect
+    the stage, e.g. (subtitle digest, translator, translated_line_count) for the translation.
+    The files are stored once under the SHA-256 of their whole content (the fast digests of large media files
+    are only used to skip copying files which did not change), and the least recently used entries are evicted
+    when the cache grows above its size limit.
+
+    * Usage:
+        To use this module, create an instance of the 'ArtifactCache' class, build a key and restore or store the files.
+
+    * Example usage:
+        cache = ArtifactCache(max_size=20 * 1024 ** 3)
+        key = ArtifactCache.make_key('translate', inputs, {'translator': 'DeepL API', 'translated_line_count': '50'})
+        outputs = cache.get(key)
+        if outputs is None:
+            ...
+            cache.store(key, WORKING_SPACE, outputs_after_stage)
+
+    * Example layout of the cache folder:
+        cache/
+            entries/<key>.json   - {"files": {"temp/main_subs/example.srt": "<sha256>"},
+                                    "digests": {"temp/main_subs/example.srt": "<digest>"}}
+            objects/<sha256>     - the content of the file
+"""
+
+from contextlib import suppress
+from dataclasses import dataclass
+from hashlib import sha256
+from json import decoder, dump, dumps, load
+from os import getpid, listdir, makedirs, path, remove, replace, utime
+from shutil import copyfile
+from threading import get_ident
+from time import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from constants import WORKING_SPACE_CACHE, console
+from utils.file_digest import CHUNK_SIZE
+
+
+@dataclass(slots=True)
+class ArtifactCache:
+    """
+        A content-addressed cache of stage results with LRU eviction and a size limit.
+        Every entry is a separate file, so many processes can use the cache at the same time without a shared index.
+
+        Attributes:
+            - cache_dir (str): The directory of the cache.
+            - max_size (int): The maximum size of the stored files in bytes.
+            - grace_period (int): Unreferenced files younger than this many seconds are kept, because another process may be storing them.
+
+        Methods:
+            - make_key(stage: str, inputs: Dict[str, str], settings: Dict[str, Any]) -> str: Builds the key of a cache entry.
+            - get(self, key: str) -> Optional[Dict[str, str]]: Returns the stored files of an entry and marks it as recently used.
+            - restore(self, key: str, root: str, current: Dict[str, str]) -> bool: Restores the files of an entry.
+            - store(self, key: str, root: str, files: Dict[str, str]) -> None: Stores the files of an entry.
+    """
+    cache_dir: str = WORKING_SPACE_CACHE
+    max_size: int = 20 * 1024 ** 3
+    grace_period: int = 3600
+
+    @property
+    def entries_dir(self) -> str:
+        """
+            Returns the directory with the entry files.
+        """
+        return path.join(self.cache_dir, 'entries')
+
+    @property
+    def objects_dir(self) -> str:
+        """
+            Returns the directory with the stored files.
+        """
+        return path.join(self.cache_dir, 'objects')
+
+    @staticmethod
+    def make_key(stage: str, inputs: Dict[str, str], settings: Dict[str, Any]) -> str:
+        """
+            Builds the key of a cache entry.
+
+            Args:
+                - stage (str): The name of the stage.
+                - inputs (Dict[str, str]): The input files of the stage (path -> digest).
+                - settings (Dict[str, Any]): The settings which affect the result of the stage.
+
+            Returns:
+                - str: The hexadecimal key of the entry.
+        """
+        payload: str = dumps({'stage': stage, 'inputs': inputs, 'settings': settings},
+                             sort_keys=True, ensure_ascii=False)
+        return sha256(payload.encode('utf-8')).hexdigest()
+
+    def _load_entry(self, key: str) -> Optional[Dict[str, Dict[str, str]]]:
+        """
+            Loads an entry and marks it as recently used.
+
+            Args:
+                - key (str): The key of the entry.
+
+            Returns:
+                - Optional[Dict[str, Dict[str, str]]]: The entry or None if there is no such entry,
+                    or some of its files are no longer stored.
+        """
+        entry_path: str = path.join(self.entries_dir, f'{key}.json')
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as file:
+                entry: Dict[str, Dict[str, str]] = load(file)
+            files: Dict[str, str] = entry['files']
+            utime(entry_path)
+        except (FileNotFoundError, decoder.JSONDecodeError, KeyError, TypeError):
+            return None
+        if not all(path.exists(path.join(self.objects_dir, content_hash)) for content_hash in files.values()):
+            return None
+        return entry
+
+    def get(self, key: str) -> Optional[Dict[str, str]]:
+        """
+            Returns the stored files of an entry and marks the entry as recently used.
+
+            Args:
+                - key (str): The key of the entry.
+
+            Returns:
+                - Optional[Dict[str, str]]: The files of the entry (path -> SHA-256 of the content) or None if there is no such entry.
+        """
+        entry: Optional[Dict[str, Dict[str, str]]] = self._load_entry(key)
+        return entry['files'] if entry is not None else None
+
+    def restore(self, key: str, root: str, current: Dict[str, str]) -> bool:
+        """
+            Restores the files of an entry, so the files of the stage look exactly as after the cached stage:
+            files missing in the entry are removed, and files with a different content are copied from the cache.
+            Only the given current files can be removed, so files of other stages are never touched.
+
+            Args:
+                - key (str): The key of the entry.
+                - root (str): The directory the file paths are relative to.
+                - current (Dict[str, str]): The current files of the stage (path -> digest).
+
+            Returns:
+                - bool: True if the entry was found and restored, False otherwise.
+        """
+        entry: Optional[Dict[str, Dict[str, str]]] = self._load_entry(key)
+        if entry is None:
+            return False
+        files: Dict[str, str] = entry['files']
+        digests: Dict[str, str] = entry.get('digests', {})
+        try:
+            for relative_path, content_hash in files.items():
+                if relative_path in current and current[relative_path] == digests.get(relative_path):
+                    continue
+                target: str = path.join(root, relative_path)
+                makedirs(path.dirname(target), exist_ok=True)
+                temp_path: str = f'{target}.{getpid()}.tmp'
+                copyfile(path.join(self.objects_dir, content_hash), temp_path)
+                replace(temp_path, target)
+        except FileNotFoundError:
+            return False
+        for relative_path in current:
+            if relative_path not in files and path.exists(path.join(root, relative_path)):
+                remove(path.join(root, relative_path))
+        return True
+
+    def store(self, key: str, root: str, files: Dict[str, str]) -> None:
+        """
+            Stores the files of an entry and evicts the least recently used entries if the cache is too big.
+
+            Args:
+                - key (str): The key of the entry.
+                - root (str): The directory the file paths are relative to.
+                - files (Dict[str, str]): The files to store (path -> digest).
+        """
+        makedirs(self.entries_dir, exist_ok=True)
+        makedirs(self.objects_dir, exist_ok=True)
+        stored: Dict[str, str] = {relative_path: self._store_object(path.join(root, relative_path))
+                                  for relative_path in files}
+
+        entry_path: str = path.join(self.entries_dir, f'{key}.json')
+        with open(f'{entry_path}.{getpid()}.tmp', 'w', encoding='utf-8') as file:
+            dump({'files': stored, 'digests': files}, file, indent=4, ensure_ascii=False)
+        replace(f'{entry_path}.{getpid()}.tmp', entry_path)
+        self._evict()
+
+    def _store_object(self, file_path: str) -> str:
+        """
+            Copies a file to the stored files, hashing its whole content on the way.
+            A file with the same content is stored only once.
+
+            Args:
+                - file_path (str): The path to the file.
+
+            Returns:
+                - str: The SHA-256 of the content, which is the name of the stored file.
+        """
+        temp_path: str = path.join(self.objects_dir, f'{getpid()}.{get_ident()}.tmp')
+        content_hash = sha256()
+        with open(file_path, 'rb') as source, open(temp_path, 'wb') as target:
+            for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                content_hash.update(chunk)
+                target.write(chunk)
+        object_path: str = path.join(self.objects_dir, content_hash.hexdigest())
+        if path.exists(object_path):
+            remove(temp_path)
+        else:
+            replace(temp_path, object_path)
+        return content_hash.hexdigest()
+
+    def _evict(self) -> None:
+        """
+            Removes the least recently used entries until the stored files fit in the size limit,
+            and then removes the stored files no entry refers to (except the ones stored just now).
+        """
+        entries: List[Tuple[float, str, Set[str]]] = []
+        for name in listdir(self.entries_dir):
+            if not name.endswith('.json'):
+                continue
+            entry_path: str = path.join(self.entries_dir, name)
+            try:
+                with open(entry_path, 'r', encoding='utf-8') as file:
+                    digests: Set[str] = set(load(file)['files'].values())
+                entries.append((path.getmtime(entry_path), entry_path, digests))
+            except (FileNotFoundError, decoder.JSONDecodeError, KeyError):
+                continue
+        entries.sort()
+
+        sizes: Dict[str, int] = {}
+        for name in listdir(self.objects_dir):
+            if name.endswith('.tmp'):
+                continue
+            try:
+                sizes[name] = path.getsize(path.join(self.objects_dir, name))
+            except FileNotFoundError:
+                continue  # removed in the meantime by another process evicting the same cache
+        total_size: int = sum(sizes.values())
+        while entries and total_size > self.max_size:
+            _, entry_path, digests = entries.pop(0)
+            with suppress(FileNotFoundError):
+                remove(entry_path)
+            still_used: Set[str] = set().union(*(entry[2] for entry in entries))
+            for digest in digests - still_used:
+                total_size -= sizes.pop(digest, 0)
+            console.print(
+                f'Usunięto z pamięci podręcznej: {path.basename(entry_path)}', style='yellow_italic')
+
+        referenced: Set[str] = set().union(*(entry[2] for entry in entries))
+        for digest in list(sizes):
+            object_path: str = path.join(self.objects_dir, digest)
+            with suppress(FileNotFoundError):
+                if digest not in referenced and time() - path.getmtime(object_path) > self.grace_period:
+                    remove(object_path)
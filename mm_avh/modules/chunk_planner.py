@@ -0,0 +1,162 @@
+"""
+    This module defines the 'ChunkPlanner' class, which splits subtitles into chunks sent to a translator in one request.
+    Instead of a fixed number of cues, the chunks are packed up to the budget of the translator
+    (characters, estimated tokens and cues), so short lines make fewer, fuller requests and long lines
+    never exceed the size limit of the service. A cue is never split between chunks.
+    When a chunk is full enough, it ends at the last scene change (a long pause between cues) rather than
+    in the middle of a conversation, so every chunk carries its own context.
+
+    * Usage:
+        To use this module, create the planner of the translator and plan the chunks of the texts.
+
+    * Example usage:
+        planner = ChunkPlanner.for_provider('DeepL API')
+        scenes = get_scene_ids(starts, ends)
+        for chunk in planner.plan(texts, scenes):
+            translate([texts[i] for i in chunk])
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+SCENE_GAP: int = 2500
+MIN_FILL: float = 0.6
+CUE_OVERHEAD: int = 16
+CHARS_PER_TOKEN: int = 4
+
+
+@dataclass(slots=True)
+class ChunkBudget:
+    """
+        The size limit of one request of a translator.
+
+        Attributes:
+            - max_chars (int): The maximum number of characters, including the markers around the cues.
+            - max_tokens (Optional[int]): The maximum number of tokens (estimated from the characters), or None.
+            - max_cues (Optional[int]): The maximum number of cues, or None.
+    """
+    max_chars: int
+    max_tokens: Optional[int] = None
+    max_cues: Optional[int] = None
+
+
+PROVIDER_BUDGETS: Dict[str, ChunkBudget] = {
+    'Google Translate': ChunkBudget(max_chars=4500, max_cues=150),
+    'DeepL API': ChunkBudget(max_chars=25000, max_cues=300),
+    'DeepL Desktop Free': ChunkBudget(max_chars=1500),
+    'ChatGPT': ChunkBudget(max_chars=12000, max_tokens=2500),
+}
+DEFAULT_BUDGET: ChunkBudget = ChunkBudget(max_chars=4500, max_cues=100)
+
+
+def get_scene_ids(starts: Sequence[int], ends: Sequence[int], scene_gap: int = SCENE_GAP) -> List[int]:
+    """
+        Numbers the scenes of the cues: a new scene starts after a pause of at least 'scene_gap' milliseconds.
+
+        Args:
+            - starts (Sequence[int]): The start times of the cues in milliseconds.
+            - ends (Sequence[int]): The end times of the cues in milliseconds.
+            - scene_gap (int): The shortest pause between two scenes in milliseconds.
+
+        Returns:
+            - List[int]: The scene of every cue.
+    """
+    scene_ids: List[int] = []
+    scene: int = 0
+    for i, start in enumerate(starts):
+        if i and start - ends[i - 1] >= scene_gap:
+            scene += 1
+        scene_ids.append(scene)
+    return scene_ids
+
+
+@dataclass(slots=True)
+class ChunkPlanner:
+    """
+        Packs cues into chunks up to the budget of a translator, preferring to end a chunk at a scene change.
+
+        Attributes:
+            - budget (ChunkBudget): The size limit of one request.
+            - min_fill (float): How full (0-1) a chunk must be to end at a scene change before the budget is used up.
+            - cue_overhead (int): The characters added to every cue by the markers.
+
+        Methods:
+            - for_provider(cls, provider: str, max_cues: Optional[int] = None) -> 'ChunkPlanner': Returns the planner of a translator.
+            - plan(self, texts: Sequence[str], scene_ids: Optional[Sequence[int]] = None) -> List[List[int]]:
+                Splits the cues into chunks.
+    """
+    budget: ChunkBudget = field(default_factory=lambda: DEFAULT_BUDGET)
+    min_fill: float = MIN_FILL
+    cue_overhead: int = CUE_OVERHEAD
+
+    @classmethod
+    def for_provider(cls, provider: str, max_cues: Optional[int] = None) -> 'ChunkPlanner':
+        """
+            Returns the planner of a translator.
+
+            Args:
+                - provider (str): The translator, e.g. 'DeepL API'.
+                - max_cues (Optional[int]): An additional limit of cues in a chunk, e.g. 'translated_line_count'
+                  for the translators which go through the clipboard. Defaults to None.
+
+            Returns:
+                - ChunkPlanner: The planner.
+        """
+        budget: ChunkBudget = PROVIDER_BUDGETS.get(provider, DEFAULT_BUDGET)
+        if max_cues is not None:
+            budget = ChunkBudget(max_chars=budget.max_chars, max_tokens=budget.max_tokens,
+                                 max_cues=min(max_cues, budget.max_cues or max_cues))
+        return cls(budget=budget)
+
+    def _get_fill(self, chars: int, cues: int) -> float:
+        """
+            Returns how much of the budget a chunk uses.
+
+            Args:
+                - chars (int): The number of characters of the chunk, with the markers.
+                - cues (int): The number of cues of the chunk.
+
+            Returns:
+                - float: The used part of the budget; above 1 the chunk does not fit.
+        """
+        fill: float = chars / self.budget.max_chars
+        if self.budget.max_tokens:
+            fill = max(fill, chars / CHARS_PER_TOKEN / self.budget.max_tokens)
+        if self.budget.max_cues:
+            fill = max(fill, cues / self.budget.max_cues)
+        return fill
+
+    def plan(self, texts: Sequence[str], scene_ids: Optional[Sequence[int]] = None) -> List[List[int]]:
+        """
+            Splits the cues into chunks of consecutive cues. A cue larger than the budget gets a chunk of its own.
+
+            Args:
+                - texts (Sequence[str]): The texts of the cues.
+                - scene_ids (Optional[Sequence[int]]): The scene of every cue (see 'get_scene_ids'). Defaults to None.
+
+            Returns:
+                - List[List[int]]: The indexes of the cues of every chunk, in order.
+        """
+        chunks: List[List[int]] = []
+        chunk: List[int] = []
+        chars: int = 0
+        scene_break: int = 0  # the position in the chunk where the last scene started
+        scene_break_chars: int = 0
+        for i, text in enumerate(texts):
+            cost: int = len(text) + self.cue_overhead
+            if chunk and self._get_fill(chars + cost, len(chunk) + 1) > 1:
+                if scene_break and self._get_fill(scene_break_chars, scene_break) >= self.min_fill:
+                    chunks.append(chunk[:scene_break])
+                    chunk = chunk[scene_break:]
+                    chars -= scene_break_chars
+                if self._get_fill(chars + cost, len(chunk) + 1) > 1:
+                    chunks.append(chunk)
+                    chunk, chars = [], 0
+                scene_break, scene_break_chars = 0, 0
+            if chunk and scene_ids is not None and scene_ids[i] != scene_ids[chunk[-1]]:
+                scene_break, scene_break_chars = len(chunk), chars
+            chunk.append(i)
+            chars += cost
+        if chunk:
+            chunks.append(chunk)
+        return chunks
@@ -0,0 +1,127 @@
+"""
+    This module defines the protocol used to send a chunk of subtitles to a translator as one text.
+    Every cue starts with a numbered marker ('◍◍1◍◍') and the line breaks inside a cue are written as '◍',
+    so the response can be split back into cues even if the translator moves, merges or drops lines.
+    The response is validated cue by cue: only the missing or corrupted cues are sent again,
+    and a chunk whose response cannot be read at all is split in half and retried.
+    A request which fails is not retried here: the error goes to the caller, which knows if and when to retry it
+    (see 'TranslationEngine', which retries transient errors with a backoff).
+
+    * Usage:
+        To use this module, pass a function sending the encoded cues to the translator to 'translate_cues'.
+
+    * Example usage:
+        def request(texts: List[str]) -> str:
+            return Translator().translate(encode_cues(texts), dest='pl').text
+
+        translated_texts = translate_cues(request, ['Hello!', 'How are you?\\nFine.'])
+
+    * Example of an encoded chunk:
+        ◍◍1◍◍ Hello!
+        ◍◍2◍◍ How are you? ◍ Fine.
+"""
+
+import re
+from typing import Callable, Dict, List, Optional, Sequence
+
+from constants import console
+
+CUE_MARKER_PATTERN: re.Pattern = re.compile(r'◍\s*◍\s*(\d+)\s*◍\s*◍')
+BROKEN_MARKER_PATTERN: re.Pattern = re.compile(r'◍\s*◍')
+LINE_BREAK_PATTERN: re.Pattern = re.compile(r'\s*◍\s*([,.;:!?]?)\s*')
+MAX_RETRIES: int = 2
+
+
+def encode_cues(texts: Sequence[str]) -> str:
+    """
+        Encodes cues as one text, every cue on its own line after its number.
+
+        Args:
+            - texts (Sequence[str]): The texts of the cues.
+
+        Returns:
+            - str: The encoded text, e.g. '◍◍1◍◍ Hello!\\n◍◍2◍◍ How are you? ◍ Fine.'.
+    """
+    return '\n'.join(f"◍◍{number}◍◍ {' ◍ '.join(line.strip() for line in text.splitlines())}"
+                     for number, text in enumerate(texts, start=1))
+
+
+def decode_cues(response: str, count: int) -> List[Optional[str]]:
+    """
+        Splits the response of the translator into cues and validates every cue.
+
+        Args:
+            - response (str): The translated text.
+            - count (int): The number of cues which were sent.
+
+        Returns:
+            - List[Optional[str]]: The text of every cue, or None if its marker is missing or repeated,
+              its text is empty, contains a broken marker or seems to contain the next cue whose marker is missing.
+    """
+    matches: List[re.Match] = list(CUE_MARKER_PATTERN.finditer(response))
+    parts: Dict[int, List[str]] = {}
+    for match, next_match in zip(matches, matches[1:] + [None]):
+        parts.setdefault(int(match.group(1)), []).append(
+            response[match.end():next_match.start() if next_match else len(response)])
+
+    texts: List[Optional[str]] = []
+    for number in range(1, count + 1):
+        cue_parts: List[str] = parts.get(number, [])
+        if len(cue_parts) != 1 or BROKEN_MARKER_PATTERN.search(cue_parts[0]):
+            texts.append(None)
+            continue
+        if number < count and number + 1 not in parts and '\n' in cue_parts[0].strip():
+            texts.append(None)  # the marker of the next cue was lost, so its text is glued to this one
+            continue
+        text: str = LINE_BREAK_PATTERN.sub(r'\1\n', cue_parts[0].strip()).strip()
+        texts.append(text or None)
+    return texts
+
+
+def translate_cues(request: Callable[[List[str]], str], texts: Sequence[str],
+                   retries: int = MAX_RETRIES) -> List[Optional[str]]:
+    """
+        Translates cues with the protocol. The cues missing from the response are sent again;
+        if the whole response is unreadable, the cues are split in half and each half is sent on its own.
+        Every retry (of the missing cues or of a half) uses one of the retries,
+        so a broken translator gets at most 7 requests per chunk with the default 2 retries.
+
+        Args:
+            - request (Callable[[List[str]], str]): Sends the cues (encoded with 'encode_cues') and returns the response.
+            - texts (Sequence[str]): The texts of the cues.
+            - retries (int): How many times the missing cues are sent again. Defaults to 2.
+
+        Returns:
+            - List[Optional[str]]: The translation of every cue, or None if it failed after all retries.
+
+        Raises:
+            - Exception: The error of a failed request, at once and without retrying,
+              so the caller can decide whether and when to send the chunk again (see 'TranslationEngine').
+    """
+    translated_texts: List[Optional[str]] = ['' if not text.strip() else None for text in texts]
+    pending: List[int] = [i for i, text in enumerate(texts) if text.strip()]
+    if not pending:
+        return translated_texts
+
+    response: str = request([texts[i] for i in pending])
+    for i, translated_text in zip(pending, decode_cues(response, len(pending))):
+        translated_texts[i] = translated_text
+    missing: List[int] = [i for i in pending if translated_texts[i] is None]
+    if not missing or retries <= 0:
+        return translated_texts
+
+    parts: List[List[int]]
+    if len(missing) == len(pending) and len(pending) > 1:
+        console.print(
+            f"Nieczytelna odpowiedź tłumacza - dzielę {len(pending)} napisów na dwie części.", style='yellow_bold')
+        parts = [pending[:len(pending) // 2], pending[len(pending) // 2:]]
+    else:
+        console.print(
+            f"Ponawiam tłumaczenie {len(missing)} z {len(pending)} napisów.", style='yellow_bold')
+        parts = [missing]
+
+    for part in parts:
+        retried: List[Optional[str]] = translate_cues(request, [texts[i] for i in part], retries - 1)
+        for i, translated_text in zip(part, retried):
+            translated_texts[i] = translated_text
+    return translated_texts
@@ -0,0 +1,255 @@
+"""
+    This module defines the 'EpisodeJournal' class, which records the finished pipeline stages of an episode.
+    Every finished stage is saved together with the content hashes of the files it produced
+    and a fingerprint of the settings it was run with, so an interrupted run can be resumed at the first unfinished stage,
+    and a stage whose settings changed is run again together with all stages after it.
+
+    * Usage:
+        To use this module, create an instance of the 'EpisodeJournal' class for an episode.
+
+    * Example usage:
+        journal = EpisodeJournal(episode="example")
+        journal.invalidate_changed(pipeline.get_stage_graph(), fingerprints)
+        journal.verify(pipeline.get_stage_graph(), WORKING_SPACE)
+        if not journal.is_finished("translate"):
+            ...
+            journal.mark_finished("translate", outputs, fingerprints["translate"])
+
+    * Example journal file 'journal/example/translate.json':
+        {
+        "stage": "translate",
+        "finished_at": "2023-09-10 12:00:00",
+        "fingerprint": "e3b0...",
+        "outputs": {"temp/main_subs/example.srt": "5f1c...", "temp/alt_subs/example.srt": "9a0b..."}
+        }
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from json import decoder, dump, load
+from os import listdir, makedirs, path, remove, replace
+from shutil import rmtree
+from typing import Dict, List, Optional, Set, Tuple
+
+from constants import WORKING_SPACE_JOURNAL, console
+from utils.file_digest import file_digest
+
+
+@dataclass(slots=True)
+class EpisodeJournal:
+    """
+        A journal of the finished pipeline stages of a single episode.
+        Each stage is stored in its own file, so stages of one episode running at the same time do not overwrite each other.
+
+        Attributes:
+            - episode (str): The name of the episode (file name without the extension).
+            - journal_dir (str): The directory where the journals are stored.
+
+        Methods:
+            - get_finished_stages(self) -> Dict[str, Dict[str, str]]: Returns the finished stages and their outputs.
+            - is_finished(self, stage: str) -> bool: Checks if a stage is finished.
+            - is_complete(self, stages: List[str]) -> bool: Checks if all given stages are finished.
+            - mark_finished(self, stage: str, outputs: Dict[str, str], fingerprint: str = '') -> None: Records a finished stage.
+            - invalidate(self, stage: str) -> None: Removes a stage from the journal.
+            - invalidate_changed(self, graph: Dict[str, List[str]], fingerprints: Dict[str, str]) -> None:
+                Invalidates stages whose settings changed and the stages after them.
+            - verify(self, graph: Dict[str, List[str]], root: str) -> None: Invalidates stages whose outputs are missing.
+            - clear(self) -> None: Removes the whole journal of the episode.
+    """
+    episode: str
+    journal_dir: str = WORKING_SPACE_JOURNAL
+
+    @property
+    def episode_dir(self) -> str:
+        """
+            Returns the directory with the journal files of the episode.
+        """
+        return path.join(self.journal_dir, self.episode)
+
+    def _get_stage_path(self, stage: str) -> str:
+        """
+            Returns the path to the journal file of a stage.
+
+            Args:
+                - stage (str): The name of the stage.
+
+            Returns:
+                - str: The path to the journal file.
+        """
+        return path.join(self.episode_dir, f'{stage}.json')
+
+    def get_finished_stages(self) -> Dict[str, Dict[str, str]]:
+        """
+            Returns the finished stages of the episode. Broken journal files are ignored.
+
+            Returns:
+                - Dict[str, Dict[str, str]]: A dictionary mapping stage names to their outputs (path -> digest).
+        """
+        if not path.exists(self.episode_dir):
+            return {}
+        stages: Dict[str, Dict[str, str]] = {}
+        for name in listdir(self.episode_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(path.join(self.episode_dir, name), 'r', encoding='utf-8') as file:
+                    data: dict = load(file)
+                stages[data['stage']] = data.get('outputs', {})
+            except (decoder.JSONDecodeError, KeyError, OSError):
+                continue
+        return stages
+
+    def is_finished(self, stage: str) -> bool:
+        """
+            Checks if a stage is finished.
+
+            Args:
+                - stage (str): The name of the stage.
+
+            Returns:
+                - bool: True if the stage is finished, False otherwise.
+        """
+        return path.exists(self._get_stage_path(stage))
+
+    def is_complete(self, stages: List[str]) -> bool:
+        """
+            Checks if all given stages are finished.
+
+            Args:
+                - stages (List[str]): The names of the stages.
+
+            Returns:
+                - bool: True if all stages are finished, False otherwise.
+        """
+        return all(self.is_finished(stage) for stage in stages)
+
+    def mark_finished(self, stage: str, outputs: Dict[str, str], fingerprint: str = '') -> None:
+        """
+            Records a finished stage. The file is written to a temporary file first and then renamed,
+            so an interrupted write never leaves a broken journal behind.
+
+            Args:
+                - stage (str): The name of the stage.
+                - outputs (Dict[str, str]): The files produced by the stage (path relative to the working space -> digest).
+                - fingerprint (str): The fingerprint of the settings and the source file the stage was run with.
+        """
+        makedirs(self.episode_dir, exist_ok=True)
+        stage_path: str = self._get_stage_path(stage)
+        temp_path: str = stage_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            dump({
+                'stage': stage,
+                'finished_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'fingerprint': fingerprint,
+                'outputs': outputs
+            }, file, indent=4)
+        replace(temp_path, stage_path)
+
+    def invalidate(self, stage: str) -> None:
+        """
+            Removes a stage from the journal, so it will be run again.
+
+            Args:
+                - stage (str): The name of the stage.
+        """
+        if self.is_finished(stage):
+            remove(self._get_stage_path(stage))
+
+    def _get_fingerprint(self, stage: str) -> Optional[str]:
+        """
+            Returns the fingerprint recorded for a finished stage.
+
+            Args:
+                - stage (str): The name of the stage.
+
+            Returns:
+                - Optional[str]: The fingerprint or None if the journal file cannot be read.
+        """
+        try:
+            with open(self._get_stage_path(stage), 'r', encoding='utf-8') as file:
+                return load(file).get('fingerprint', '')
+        except (decoder.JSONDecodeError, OSError, AttributeError):
+            return None
+
+    def invalidate_changed(self, graph: Dict[str, List[str]], fingerprints: Dict[str, str]) -> None:
+        """
+            Invalidates the finished stages which were run with other settings (or another source file)
+            than the current ones, together with all stages which depend on them.
+
+            Args:
+                - graph (Dict[str, List[str]]): The dependency graph of the stages.
+                - fingerprints (Dict[str, str]): The current fingerprint of every stage.
+        """
+        changed: Set[str] = {stage for stage in self.get_finished_stages()
+                             if self._get_fingerprint(stage) != fingerprints.get(stage, '')}
+        if not changed:
+            return
+        console.print(
+            f'Zmieniono ustawienia etapów {", ".join(sorted(changed))} odcinka {self.episode}. '
+            f'Zostaną powtórzone razem z kolejnymi etapami.', style='yellow_bold')
+        while True:
+            dependent: Set[str] = {stage for stage, depends_on in graph.items()
+                                   if stage not in changed and changed.intersection(depends_on)}
+            if not dependent:
+                break
+            changed |= dependent
+        for stage in changed:
+            self.invalidate(stage)
+
+    def verify(self, graph: Dict[str, List[str]], root: str) -> None:
+        """
+            Checks the outputs of the last finished stages (the ones no other finished stage depends on).
+            If any of their outputs is missing, the stage is invalidated and the check moves back to the stages before it,
+            until the run can be resumed from intact files. Changed outputs are only reported.
+
+            Args:
+                - graph (Dict[str, List[str]]): The dependency graph of the stages.
+                - root (str): The directory the output paths are relative to.
+        """
+        finished: Dict[str, Dict[str, str]] = self.get_finished_stages()
+        while finished:
+            frontier: List[str] = [stage for stage in finished
+                                   if not any(stage in graph.get(other, []) for other in finished)]
+            broken: List[str] = []
+            for stage in frontier:
+                missing, changed = self._check_outputs(finished[stage], root)
+                for file in changed:
+                    console.print(
+                        f'Plik {file} zmienił się od zakończenia etapu {stage}.', style='yellow_bold')
+                if missing:
+                    broken.append(stage)
+            if not broken:
+                return
+            for stage in broken:
+                console.print(
+                    f'Brak wyników etapu {stage} odcinka {self.episode}. Etap zostanie powtórzony.', style='red_bold')
+                self.invalidate(stage)
+                del finished[stage]
+
+    @staticmethod
+    def _check_outputs(outputs: Dict[str, str], root: str) -> Tuple[List[str], List[str]]:
+        """
+            Compares the recorded outputs of a stage with the files on disk.
+
+            Args:
+                - outputs (Dict[str, str]): The recorded outputs (path relative to the root -> digest).
+                - root (str): The directory the output paths are relative to.
+
+            Returns:
+                - Tuple[List[str], List[str]]: The missing files and the changed files.
+        """
+        missing: List[str] = []
+        changed: List[str] = []
+        for relative_path, digest in outputs.items():
+            file_path: str = path.join(root, relative_path)
+            if not path.exists(file_path):
+                missing.append(relative_path)
+            elif file_digest(file_path) != digest:
+                changed.append(relative_path)
+        return missing, changed
+
+    def clear(self) -> None:
+        """
+            Removes the whole journal of the episode.
+        """
+        rmtree(self.episode_dir, ignore_errors=True)
@@ -0,0 +1,595 @@
+"""
+    This module defines the 'EpisodePipeline' class, which runs all stages of the pipeline for a single episode.
+    Every episode is an independent job, so several episodes can be processed at the same time in a process pool.
+    Finished stages are recorded in the episode journal, so a rerun resumes at the first unfinished stage.
+    With an artifact cache, the result of a stage is reused whenever its inputs and settings were already processed.
+
+    * Usage:
+        To use this module, create an instance of the 'EpisodePipeline' class and call the 'run' method,
+        or call 'run_episodes' to process many episodes at once.
+
+    * Example usage:
+        pipeline = EpisodePipeline(entry=manifest.get_file("example.mkv"), settings=manifest.settings)
+        pipeline.run()
+
+    * Example usage:
+        run_episodes(manifest.files, manifest.settings, workers=4)
+"""
+
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from dataclasses import dataclass
+from multiprocessing import Lock
+from multiprocessing.synchronize import Lock as LockType
+from os import listdir, path, remove
+from shutil import copyfile
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from natsort import natsorted
+
+from constants import (WORKING_SPACE,
+                       WORKING_SPACE_OUTPUT,
+                       WORKING_SPACE_TEMP,
+                       WORKING_SPACE_TEMP_MAIN_SUBS,
+                       WORKING_SPACE_TEMP_ALT_SUBS,
+                       console)
+from data.manifest import ManifestFile
+from data.settings import Settings
+
+from modules.artifact_cache import ArtifactCache
+from modules.episode_journal import EpisodeJournal
+from modules.mkvtoolnix import MkvToolNix
+from modules.mkv_processing import MKVProcessing
+from modules.speech_timing import SpeechTimingEstimator
+from modules.subtitle import SubtitleRefactor, sanitize_srt_directory
+from modules.subtitle_to_speech import SubtitleToSpeech
+from modules.track_rules import TrackRule
+from modules.translator import SubtitleTranslator
+from utils.file_digest import directory_digests, file_digest
+
+_desktop_lock: Optional[LockType] = None
+
+
+@dataclass(slots=True)
+class EpisodePipeline:
+    """
+        Runs extract → refactor → translate → numbers → TTS → mux for the files of a single episode.
+        All files of one episode share the name without the extension (e.g. 'example.mkv', 'example.ass', 'example.srt').
+
+        Attributes:
+            - entry (ManifestFile): The manifest entry of the episode.
+            - settings (Settings): The settings used for the episode.
+            - working_space (str): The path to the working directory.
+            - working_space_output (str): The path to the output directory.
+            - working_space_temp (str): The path to the temporary directory.
+            - working_space_temp_main_subs (str): The path to the main subtitles directory.
+            - working_space_temp_alt_subs (str): The path to the alternative subtitles directory.
+            - cache (Optional[ArtifactCache]): The cache of stage results. Defaults to None (no cache).
+
+        Methods:
+            - run(self, should_stop: Optional[Callable[[], bool]] = None) -> bool: Runs all stages for the episode.
+            - get_stages(self) -> List[Tuple[str, Callable[[], None]]]: Returns the stages of the pipeline in order.
+            - get_stage_graph(self) -> Dict[str, List[str]]: Returns the stages each stage depends on.
+            - get_stage_resource(self, stage_name: str) -> str: Returns the resource pool a stage is limited by.
+            - run_stage(self, stage_name: str, journal: Optional[EpisodeJournal] = None) -> None: Runs a single stage by its name, unless it is already finished.
+            - get_journal(self) -> EpisodeJournal: Returns the journal of the episode.
+            - get_stage_files(self, stage_name: str) -> List[Tuple[str, Optional[Tuple[str, ...]]]]: Returns the files a stage reads and writes.
+            - snapshot(self, stage_name: str) -> Dict[str, str]: Returns the digests of the files of a stage.
+            - get_stage_settings(self, stage_name: str) -> Dict[str, Any]: Returns the settings which affect a stage.
+            - get_fingerprint(self, stage_name: str) -> str: Returns the fingerprint of a stage recorded in the journal.
+            - get_fingerprints(self) -> Dict[str, str]: Returns the fingerprints of all stages.
+            - get_cache_settings(self, stage_name: str) -> Optional[Dict[str, Any]]: Returns the settings of a cached stage.
+            - cleanup(self) -> None: Removes the temporary files and the journal of a processed episode.
+            - extract(self) -> None: Extracts the selected tracks from the MKV file or copies a subtitle file to the temporary directory.
+            - refactor(self) -> None: Refactors the subtitle files to SRT.
+            - translate(self) -> None: Translates the main and alternative subtitles.
+            - convert_numbers(self) -> None: Converts numbers to words in the main subtitles.
+            - generate_audio(self) -> None: Generates the TTS audio for the main subtitles.
+            - refactor_alt(self) -> None: Moves the alternative subtitles to the output directory.
+            - mux(self) -> None: Processes the output files according to the output setting.
+    """
+    entry: ManifestFile
+    settings: Settings
+    working_space: str = WORKING_SPACE
+    working_space_output: str = WORKING_SPACE_OUTPUT
+    working_space_temp: str = WORKING_SPACE_TEMP
+    working_space_temp_main_subs: str = WORKING_SPACE_TEMP_MAIN_SUBS
+    working_space_temp_alt_subs: str = WORKING_SPACE_TEMP_ALT_SUBS
+    cache: Optional[ArtifactCache] = None
+
+    subtitle_extensions: Tuple[str, ...] = ('.sup', '.txt', '.ogg',
+                                            '.ssa', '.ass', '.srt',
+                                            '.sub', '.usf', '.vtt')
+
+    def run(self, should_stop: Optional[Callable[[], bool]] = None) -> bool:
+        """
+            Runs all stages for the episode, skipping the stages already finished in a previous run.
+            An error in one episode does not stop the other episodes.
+
+            Args:
+                - should_stop (Optional[Callable[[], bool]]): Checked before every stage; if it returns True,
+                    the episode is stopped (e.g. its job was taken over by another worker). Defaults to None.
+
+            Returns:
+                - bool: True if all stages finished successfully, False otherwise.
+        """
+        journal: EpisodeJournal = self.get_journal()
+        journal.invalidate_changed(self.get_stage_graph(), self.get_fingerprints())
+        if journal.is_complete([stage_name for stage_name, _ in self.get_stages()]):
+            console.print(
+                f'\nOdcinek {self.entry.stem} został już przetworzony. Pomijam...', style='yellow_bold')
+            return True
+        journal.verify(self.get_stage_graph(), self.working_space)
+
+        console.print(
+            f'\nRozpoczynam przetwarzanie odcinka: {self.entry.stem}', style='green_bold')
+        for stage_name, _ in self.get_stages():
+            if should_stop is not None and should_stop():
+                console.print(
+                    f'Przerwano przetwarzanie odcinka {self.entry.stem} przed etapem {stage_name}.', style='red_bold')
+                return False
+            try:
+                self.run_stage(stage_name, journal)
+            except Exception as error:  # pylint: disable=broad-except
+                console.print(
+                    f'Błąd w etapie {stage_name} odcinka {self.entry.stem}: {error}', style='red_bold')
+                return False
+        console.print(
+            f'Zakończono przetwarzanie odcinka: {self.entry.stem}', style='green_bold')
+        return True
+
+    def get_stages(self) -> List[Tuple[str, Callable[[], None]]]:
+        """
+            Returns the stages of the pipeline in the order they have to be run.
+
+            Returns:
+                - List[Tuple[str, Callable[[], None]]]: A list of (stage name, stage method) pairs.
+        """
+        return [
+            ('extract', self.extract),
+            ('refactor', self.refactor),
+            ('translate', self.translate),
+            ('numbers', self.convert_numbers),
+            ('tts', self.generate_audio),
+            ('alt_subs', self.refactor_alt),
+            ('mux', self.mux),
+        ]
+
+    def get_stage_graph(self) -> Dict[str, List[str]]:
+        """
+            Returns the dependency graph of the stages.
+            Alternative subtitles only need the translation, so they can be prepared while the audio is generated.
+            Stages which can run at the same time must not share any files (see 'get_stage_files').
+
+            Returns:
+                - Dict[str, List[str]]: A dictionary mapping stage names to the names of the stages they depend on.
+        """
+        return {
+            'extract': [],
+            'refactor': ['extract'],
+            'translate': ['refactor'],
+            'numbers': ['translate'],
+            'tts': ['numbers'],
+            'alt_subs': ['translate'],
+            'mux': ['tts', 'alt_subs'],
+        }
+
+    def get_stage_resource(self, stage_name: str) -> str:
+        """
+            Returns the resource pool which limits the given stage: 'network', 'cpu', 'disk' or 'desktop'.
+            Translation and Edge TTS wait on the network, local TTS and burning to MP4 use the CPU,
+            the other stages mostly read and write files. DeepL Desktop drives the mouse and the clipboard,
+            so it gets its own pool.
+
+            Args:
+                - stage_name (str): The name of the stage.
+
+            Returns:
+                - str: The name of the resource pool.
+        """
+        if stage_name == 'translate':
+            return 'desktop' if self.settings.translator == 'DeepL Desktop Free' else 'network'
+        if stage_name == 'tts':
+            return 'network' if 'Edge' in (self.settings.tts or '') else 'cpu'
+        if stage_name == 'mux':
+            return 'cpu' if self.settings.output == 'Wypal do mp4' else 'disk'
+        if stage_name == 'numbers':
+            return 'cpu'
+        return 'disk'
+
+    def run_stage(self, stage_name: str, journal: Optional[EpisodeJournal] = None) -> None:
+        """
+            Runs a single stage by its name, unless the journal says it is already finished.
+            If the cache holds the result of the stage for the same inputs and settings, the result is restored instead.
+            After the stage, the files it created or changed are recorded in the journal.
+            Only the files of the stage (see 'get_stage_files') are looked at, so stages of one episode
+            running at the same time do not record, cache or remove each other's files.
+
+            Args:
+                - stage_name (str): The name of the stage.
+                - journal (Optional[EpisodeJournal]): The journal of the episode. Defaults to None (loaded from disk).
+        """
+        journal = journal or self.get_journal()
+        if journal.is_finished(stage_name):
+            console.print(
+                f'Pomijam ukończony etap {stage_name} odcinka {self.entry.stem}.', style='yellow_bold')
+            return
+
+        before: Dict[str, str] = self.snapshot(stage_name)
+        cache_key: Optional[str] = self._get_cache_key(stage_name, before)
+        if cache_key and self.cache.restore(cache_key, self.working_space, before):
+            console.print(
+                f'Użyto zapisanego wyniku etapu {stage_name} odcinka {self.entry.stem}.', style='yellow_bold')
+            cache_key = None
+        else:
+            with _desktop_lock if _desktop_lock is not None and self.get_stage_resource(stage_name) == 'desktop' \
+                    else nullcontext():
+                dict(self.get_stages())[stage_name]()
+        after: Dict[str, str] = self.snapshot(stage_name)
+        if cache_key:
+            self.cache.store(cache_key, self.working_space, after)
+        journal.mark_finished(stage_name, {file: digest for file, digest in after.items()
+                                           if before.get(file) != digest},
+                              self.get_fingerprint(stage_name))
+
+    def get_stage_files(self, stage_name: str) -> List[Tuple[str, Optional[Tuple[str, ...]]]]:
+        """
+            Returns the files a stage reads and writes: the directories and the extensions of the files of the episode.
+            Stages which run at the same time (the alternative subtitles and the audio) never share any of these files,
+            so each stage only snapshots, caches and restores its own files.
+
+            Args:
+                - stage_name (str): The name of the stage.
+
+            Returns:
+                - List[Tuple[str, Optional[Tuple[str, ...]]]]: A list of (directory, extensions) pairs;
+                    None stands for all extensions.
+        """
+        if stage_name == 'extract':
+            return [(self.working_space_temp, None)]
+        if stage_name == 'refactor':
+            return [(self.working_space_temp, self.subtitle_extensions),
+                    (self.working_space_temp_main_subs, None),
+                    (self.working_space_temp_alt_subs, None)]
+        if stage_name == 'translate':
+            return [(self.working_space_temp_main_subs, ('.srt',)),
+                    (self.working_space_temp_alt_subs, ('.srt',))]
+        if stage_name == 'numbers':
+            return [(self.working_space_temp_main_subs, ('.srt',))]
+        if stage_name == 'tts':
+            return [(self.working_space_temp, None),
+                    (self.working_space_temp_main_subs, None),
+                    (self.working_space_output, ('.eac3',))]
+        if stage_name == 'alt_subs':
+            return [(self.working_space_temp_alt_subs, None),
+                    (self.working_space_output, ('.ass', '.srt'))]
+        return [(self.working_space_output, None)]
+
+    def get_stage_settings(self, stage_name: str) -> Dict[str, Any]:
+        """
+            Returns the settings and the options of the episode which affect the result of a stage.
+
+            Args:
+                - stage_name (str): The name of the stage.
+
+            Returns:
+                - Dict[str, Any]: The settings of the stage.
+        """
+        if stage_name == 'extract':
+            return {'tracks': sorted(self.entry.tracks), 'track_rules': self.settings.track_rules}
+        if stage_name == 'refactor':
+            if self.entry.filename.endswith('.txt'):
+                return {'styles': self.entry.styles, 'tts': self.settings.tts, 'tts_speed': self.settings.tts_speed}
+            return {'styles': self.entry.styles}
+        if stage_name == 'translate':
+            return {'translate': self.entry.translate,
+                    'translator': self.settings.translator,
+                    'translated_line_count': self.settings.translated_line_count}
+        if stage_name == 'numbers':
+            return {'convert_numbers': self.entry.convert_numbers}
+        if stage_name == 'tts':
+            return {'generate_audio': self.entry.generate_audio,
+                    'tts': self.settings.tts,
+                    'tts_speed': self.settings.tts_speed,
+                    'tts_volume': self.settings.tts_volume}
+        if stage_name == 'mux':
+            return {'output': self.settings.output}
+        return {}
+
+    def get_fingerprint(self, stage_name: str) -> str:
+        """
+            Returns the fingerprint of a stage recorded in the journal: the digest of the settings of the stage,
+            and for the extraction also of the source file, so changed settings or a new file with the same name
+            run the affected stages again.
+
+            Args:
+                - stage_name (str): The name of the stage.
+
+            Returns:
+                - str: The fingerprint of the stage.
+        """
+        stage_settings: Dict[str, Any] = self.get_stage_settings(stage_name)
+        if stage_name == 'extract':
+            source_path: str = path.join(self.working_space, self.entry.filename)
+            stage_settings = {**stage_settings,
+                              'source': file_digest(source_path) if path.isfile(source_path) else None}
+        return ArtifactCache.make_key(stage_name, {}, stage_settings)
+
+    def get_fingerprints(self) -> Dict[str, str]:
+        """
+            Returns the fingerprints of all stages (see 'get_fingerprint').
+
+            Returns:
+                - Dict[str, str]: A dictionary mapping stage names to their fingerprints.
+        """
+        return {stage_name: self.get_fingerprint(stage_name) for stage_name, _ in self.get_stages()}
+
+    def get_cache_settings(self, stage_name: str) -> Optional[Dict[str, Any]]:
+        """
+            Returns the settings which affect the result of a stage, if the stage is cached.
+            The timing of a TXT file also depends on the current speech timing calibration, which changes
+            after every generated audio, so it is part of the cache key but not of the journal fingerprint.
+
+            Args:
+                - stage_name (str): The name of the stage.
+
+            Returns:
+                - Optional[Dict[str, Any]]: The settings of the stage or None if the stage is not cached
+                    (the final mux, and stages which do nothing for this episode).
+        """
+        if stage_name == 'extract' and not self.entry.tracks and not self.settings.track_rules:
+            return None
+        if stage_name == 'translate' and (not self.entry.translate or 'ChatGPT' in self.settings.translator):
+            return None
+        if stage_name == 'numbers' and not self.entry.convert_numbers:
+            return None
+        if stage_name == 'tts' and (not self.entry.generate_audio or 'TTS - *Głos* - ElevenLans' in self.settings.tts):
+            return None
+        if stage_name == 'mux':
+            return None
+        if stage_name == 'refactor' and self.entry.filename.endswith('.txt'):
+            estimator: SpeechTimingEstimator = SpeechTimingEstimator.load(self.settings.tts, self.settings.tts_speed)
+            return {**self.get_stage_settings(stage_name), 'speech_timing': estimator.get_parameters()}
+        return self.get_stage_settings(stage_name)
+
+    def _get_cache_key(self, stage_name: str, inputs: Dict[str, str]) -> Optional[str]:
+        """
+            Returns the cache key of a stage for the current files of the stage.
+            The extraction also depends on the MKV file itself, which lives outside of the temporary directories.
+
+            Args:
+                - stage_name (str): The name of the stage.
+                - inputs (Dict[str, str]): The current files of the stage (path -> digest).
+
+            Returns:
+                - Optional[str]: The cache key or None if the stage is not cached.
+        """
+        if self.cache is None:
+            return None
+        stage_settings: Optional[Dict[str, Any]] = self.get_cache_settings(stage_name)
+        if stage_settings is None:
+            return None
+        if stage_name == 'extract':
+            mkv_path: str = path.join(self.working_space, self.entry.filename)
+            if not path.exists(mkv_path):
+                return None
+            inputs = {**inputs, self.entry.filename: file_digest(mkv_path)}
+        return ArtifactCache.make_key(stage_name, inputs, stage_settings)
+
+    def get_journal(self) -> EpisodeJournal:
+        """
+            Returns the journal of the episode.
+
+            Returns:
+                - EpisodeJournal: The journal of the episode.
+        """
+        return EpisodeJournal(self.entry.stem)
+
+    def snapshot(self, stage_name: str) -> Dict[str, str]:
+        """
+            Returns the digests of the files of a stage (see 'get_stage_files').
+
+            Args:
+                - stage_name (str): The name of the stage.
+
+            Returns:
+                - Dict[str, str]: A dictionary mapping paths relative to the working space to file digests.
+        """
+        digests: Dict[str, str] = {}
+        for directory, extensions in self.get_stage_files(stage_name):
+            digests.update(directory_digests(
+                [directory], root=self.working_space,
+                name_filter=lambda name, extensions=extensions: path.splitext(name)[0] == self.entry.stem
+                and (extensions is None or name.endswith(extensions))))
+        return digests
+
+    def _get_episode_files(self, directory: str, extensions: Optional[Tuple[str, ...]] = None) -> List[str]:
+        """
+            Gets the files of the episode with the given extensions from a directory.
+
+            Args:
+                - directory (str): The directory to search for files.
+                - extensions (Optional[Tuple[str, ...]]): The extensions to look for. Defaults to None (all files).
+
+            Returns:
+                - List[str]: A sorted list of the files of the episode.
+        """
+        if not path.exists(directory):
+            return []
+        return natsorted(
+            file for file in listdir(directory)
+            if path.isfile(path.join(directory, file))
+            and path.splitext(file)[0] == self.entry.stem
+            and (extensions is None or file.endswith(extensions))
+        )
+
+    def cleanup(self) -> None:
+        """
+            Removes the temporary files and the journal of a processed episode, leaving only the output files.
+            Used when episodes are processed one after another, so the temporary folders cannot be cleared at once.
+        """
+        for directory in (self.working_space_temp,
+                          self.working_space_temp_main_subs,
+                          self.working_space_temp_alt_subs):
+            for filename in self._get_episode_files(directory):
+                remove(path.join(directory, filename))
+        self.get_journal().clear()
+
+    def extract(self) -> None:
+        """
+            Extracts the tracks listed in the manifest from the MKV file.
+            If the manifest lists no tracks, they are selected with the track rules from the settings.
+            A subtitle file placed directly in the working space is copied to the temporary directory instead.
+        """
+        if not self.entry.filename.endswith('.mkv'):
+            source_path: str = path.join(self.working_space, self.entry.filename)
+            if self.entry.filename.endswith(self.subtitle_extensions) and path.isfile(source_path):
+                copyfile(source_path, path.join(self.working_space_temp, self.entry.filename))
+            return
+        rules: List[TrackRule] = TrackRule.from_settings(self.settings)
+        if not self.entry.tracks and not rules:
+            return
+        if not path.exists(path.join(self.working_space, self.entry.filename)):
+            console.print(
+                f'Plik {self.entry.filename} nie istnieje. Pomijam...', style='red_bold')
+            return
+        mkv: MkvToolNix = MkvToolNix(self.entry.filename)
+        data: dict = mkv.get_mkv_info()
+        track_ids: Set[int] = set(self.entry.tracks) or mkv.select_track_ids(data, rules)
+        if not track_ids:
+            console.print(
+                f'Żadna ścieżka pliku {self.entry.filename} nie pasuje do reguł wyboru ścieżek.', style='red_bold')
+            return
+        mkv.mkv_extract_track(data, track_ids)
+
+    def refactor(self) -> None:
+        """
+            Refactors the subtitle files of the episode to a standard format.
+            The SRT files are cleaned and moved to the main subtitles directory in one batch.
+        """
+        filenames: List[str] = self._get_episode_files(self.working_space_temp, self.subtitle_extensions)
+        srt_files: List[str] = [filename for filename in filenames if filename.endswith('.srt')]
+        if srt_files:
+            sanitize_srt_directory(self.working_space_temp, self.working_space_temp_main_subs, srt_files)
+        for filename in filenames:
+            subtitle: SubtitleRefactor = SubtitleRefactor(filename)
+            if filename.endswith(('.ass', '.ssa')):
+                subtitle.split_ass(self.entry.styles)
+                subtitle.ass_to_srt()
+            if filename.endswith('.txt'):
+                subtitle.txt_to_srt(10, self.settings.tts, self.settings.tts_speed)
+
+    def translate(self) -> None:
+        """
+            Translates the main and alternative subtitles of the episode.
+        """
+        if not self.entry.translate or 'ChatGPT' in self.settings.translator:
+            return
+        files: List[Tuple[str, str]] = []
+        for filename in self._get_episode_files(self.working_space_temp_main_subs, ('.srt',)):
+            files.append((filename, self.working_space_temp_main_subs))
+            if path.exists(path.join(self.working_space_temp_alt_subs, filename)):
+                files.append((filename, self.working_space_temp_alt_subs))
+        SubtitleTranslator().translate_srt_files(files, self.settings)
+
+    def convert_numbers(self) -> None:
+        """
+            Converts numbers to words in the main subtitles of the episode.
+        """
+        if not self.entry.convert_numbers:
+            return
+        for filename in self._get_episode_files(self.working_space_temp_main_subs, ('.srt',)):
+            subtitle: SubtitleRefactor = SubtitleRefactor(filename)
+            subtitle.convert_numbers_in_srt()
+
+    def generate_audio(self) -> None:
+        """
+            Generates the TTS audio for the main subtitles of the episode.
+        """
+        if not self.entry.generate_audio or 'TTS - *Głos* - ElevenLans' in self.settings.tts:
+            return
+        for filename in self._get_episode_files(self.working_space_temp_main_subs, ('.srt',)):
+            audio_generator: SubtitleToSpeech = SubtitleToSpeech(filename)
+            audio_generator.generate_audio(self.settings)
+
+    def refactor_alt(self) -> None:
+        """
+            Moves the alternative subtitles of the episode to the output directory.
+        """
+        for filename in self._get_episode_files(self.working_space_temp_alt_subs, ('.srt',)):
+            subtitle: SubtitleRefactor = SubtitleRefactor(filename)
+            subtitle.srt_to_ass()
+
+    def mux(self) -> None:
+        """
+            Processes the output files of the episode according to the output setting.
+        """
+        output_files: List[str] = [file for file in self._get_episode_files(self.working_space_output)
+                                   if not file.endswith(('.mkv', '.mp4'))]
+        if not output_files:
+            return
+        # https://trac.ffmpeg.org/wiki/Encode/H.264
+        subtitle_processor: MKVProcessing = MKVProcessing(filename=self.entry.stem,
+                                                          crf_value='18',
+                                                          preset_value='medium')
+        subtitle_processor.process_mkv(self.settings)
+
+
+def _init_worker(desktop_lock: Optional[LockType]) -> None:
+    """
+        Shares the lock of the desktop stages with a worker process of 'run_episodes'.
+
+        Args:
+            - desktop_lock (Optional[LockType]): The lock held while a stage drives the mouse, the keyboard and the clipboard.
+    """
+    global _desktop_lock  # pylint: disable=global-statement
+    _desktop_lock = desktop_lock
+
+
+def _run_episode(entry: ManifestFile, settings: Settings, cache: Optional[ArtifactCache]) -> bool:
+    """
+        Runs the pipeline for a single episode. Defined at module level, so it can be sent to a worker process.
+
+        Args:
+            - entry (ManifestFile): The manifest entry of the episode.
+            - settings (Settings): The settings used for the episode.
+            - cache (Optional[ArtifactCache]): The cache of stage results.
+
+        Returns:
+            - bool: True if the episode was processed successfully, False otherwise.
+    """
+    return EpisodePipeline(entry, settings, cache=cache).run()
+
+
+def run_episodes(entries: List[ManifestFile], settings: Settings, workers: int,
+                 cache: Optional[ArtifactCache] = None) -> Dict[str, bool]:
+    """
+        Runs the pipeline for many episodes at once in a process pool.
+        Stages which drive the desktop (DeepL Desktop) hold a lock shared by all workers, so they run one at a time.
+
+        Args:
+            - entries (List[ManifestFile]): The manifest entries of the episodes.
+            - settings (Settings): The settings used for all episodes.
+            - workers (int): The number of episodes processed at the same time.
+            - cache (Optional[ArtifactCache]): The cache of stage results. Defaults to None.
+
+        Returns:
+            - Dict[str, bool]: A dictionary mapping episode names to the result of their processing.
+    """
+    results: Dict[str, bool] = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(Lock(),)) as executor:
+        futures: Dict[Future, str] = {executor.submit(_run_episode, entry, settings, cache): entry.stem
+                                      for entry in entries}
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except Exception as error:  # pylint: disable=broad-except
+                console.print(
+                    f'Błąd procesu odcinka {futures[future]}: {error}', style='red_bold')
+                results[futures[future]] = False
+
+    failed: List[str] = [stem for stem, success in results.items() if not success]
+    if failed:
+        console.print(
+            f'\nNie udało się przetworzyć odcinków: {", ".join(natsorted(failed))}', style='red_bold')
+    return results
@@ -0,0 +1,278 @@
+"""
+    This module defines the 'JobQueue' class, a persistent queue of files waiting to be processed.
+    The queue is stored in an SQLite database, so jobs survive a restart of the program,
+    and several machines can share one queue placed in a shared working space.
+    A worker leases a job for a limited time and renews the lease with heartbeats;
+    a job whose lease expired (e.g. the machine was turned off) is queued again for another worker.
+    Failed jobs are retried until they reach the maximum number of attempts.
+
+    * Usage:
+        To use this module, create an instance of the 'JobQueue' class, add files and claim jobs.
+
+    * Example usage:
+        queue = JobQueue()
+        queue.enqueue('example.mkv', size=1024, mtime=1694340000.0)
+        job = queue.claim(worker='PC-1')
+        if job:
+            queue.heartbeat(job.id, 'PC-1')
+            ...
+            queue.finish(job.id, 'PC-1', success=True)
+"""
+
+import sqlite3
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime
+from os import path
+from time import time
+from typing import Dict, Optional, Set
+
+from constants import WORKING_SPACE_QUEUE
+
+
+@dataclass(slots=True)
+class Job:
+    """
+        A single file in the job queue.
+
+        Attributes:
+            - id (int): The ID of the job.
+            - filename (str): The name of the file in the working space.
+            - size (int): The size of the file when it was queued.
+            - mtime (float): The modification time of the file when it was queued.
+            - status (str): 'queued', 'running', 'done' or 'failed'.
+            - attempts (int): How many times the job was started.
+            - error (Optional[str]): The error of the last failed attempt.
+            - worker (Optional[str]): The worker which holds the lease of the job.
+            - lease_expires (Optional[float]): The time (epoch seconds) when the lease expires.
+    """
+    id: int
+    filename: str
+    size: int
+    mtime: float
+    status: str
+    attempts: int
+    error: Optional[str]
+    worker: Optional[str]
+    lease_expires: Optional[float]
+
+    @property
+    def stem(self) -> str:
+        """
+            Returns the file name without the extension.
+        """
+        return path.splitext(self.filename)[0]
+
+
+@dataclass(slots=True)
+class JobQueue:
+    """
+        A persistent queue of files waiting to be processed.
+        The same file (name, size and modification time) is queued only once, so processed files are not processed again.
+        The database uses the default rollback journal (not WAL), because WAL does not work on network file systems.
+
+        Attributes:
+            - db_path (str): The path to the SQLite database.
+            - lease_time (float): How many seconds a lease lasts without a heartbeat.
+            - max_attempts (int): How many times a job is started before it is marked as failed.
+
+        Methods:
+            - enqueue(self, filename: str, size: int, mtime: float) -> bool: Adds a file to the queue.
+            - claim(self, worker: str) -> Optional[Job]: Leases the oldest queued job.
+            - heartbeat(self, job_id: int, worker: str) -> bool: Renews the lease of a job.
+            - holds_lease(self, job_id: int, worker: str) -> bool: Checks if a worker still holds the lease of a job.
+            - finish(self, job_id: int, worker: str, success: bool, error: Optional[str] = None) -> bool: Records the result of a job.
+            - release(self, worker: str) -> int: Queues again the jobs leased by a worker.
+            - get_counts(self) -> Dict[str, int]: Returns the number of jobs in each status.
+    """
+    db_path: str = WORKING_SPACE_QUEUE
+    lease_time: float = 300.0
+    max_attempts: int = 3
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+            Opens the database and creates the table of jobs if needed.
+            Transactions are started explicitly, so a job is never claimed twice.
+
+            Returns:
+                - sqlite3.Connection: The connection to the database.
+        """
+        connection: sqlite3.Connection = sqlite3.connect(
+            self.db_path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        connection.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                filename TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                UNIQUE (filename, size, mtime)
+            )''')
+        columns: Set[str] = {row['name'] for row in connection.execute('PRAGMA table_info(jobs)')}
+        for column, column_type in (('worker', 'TEXT'), ('lease_expires', 'REAL')):
+            if column not in columns:
+                connection.execute(f'ALTER TABLE jobs ADD COLUMN {column} {column_type}')
+        return connection
+
+    @staticmethod
+    def _now() -> str:
+        """
+            Returns the current time in the format stored in the database.
+        """
+        return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    def enqueue(self, filename: str, size: int, mtime: float) -> bool:
+        """
+            Adds a file to the queue, unless the same version of the file was already queued.
+
+            Args:
+                - filename (str): The name of the file in the working space.
+                - size (int): The size of the file.
+                - mtime (float): The modification time of the file.
+
+            Returns:
+                - bool: True if the file was added, False if it was already in the queue.
+        """
+        with closing(self._connect()) as connection:
+            cursor: sqlite3.Cursor = connection.execute(
+                'INSERT OR IGNORE INTO jobs (filename, size, mtime, created_at, updated_at) VALUES (?, ?, ?, ?, ?)',
+                (filename, size, mtime, self._now(), self._now()))
+            return cursor.rowcount == 1
+
+    def claim(self, worker: str) -> Optional[Job]:
+        """
+            Leases the oldest queued job to a worker. Expired leases are released first.
+            Jobs of episodes which are being processed right now (by any worker) are skipped,
+            because files of one episode (e.g. 'example.mkv' and 'example.srt') share the temporary files.
+
+            Args:
+                - worker (str): The name of the worker.
+
+            Returns:
+                - Optional[Job]: The leased job or None if there is nothing to do.
+        """
+        with closing(self._connect()) as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            self._expire_leases(connection)
+            busy_episodes: Set[str] = {
+                path.splitext(row['filename'])[0]
+                for row in connection.execute("SELECT filename FROM jobs WHERE status = 'running'")}
+            for row in connection.execute("SELECT * FROM jobs WHERE status = 'queued' ORDER BY id").fetchall():
+                job: Job = Job(**{key: row[key] for key in Job.__slots__})
+                if job.stem in busy_episodes:
+                    continue
+                job.status = 'running'
+                job.attempts += 1
+                job.worker = worker
+                job.lease_expires = time() + self.lease_time
+                connection.execute(
+                    'UPDATE jobs SET status = ?, attempts = ?, worker = ?, lease_expires = ?, updated_at = ? WHERE id = ?',
+                    (job.status, job.attempts, job.worker, job.lease_expires, self._now(), job.id))
+                connection.execute('COMMIT')
+                return job
+            connection.execute('COMMIT')
+        return None
+
+    def _expire_leases(self, connection: sqlite3.Connection) -> None:
+        """
+            Releases the running jobs whose lease expired, e.g. because their worker was turned off.
+
+            Args:
+                - connection (sqlite3.Connection): The connection with an open transaction.
+        """
+        connection.execute(
+            "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+            "error = 'Wygasła dzierżawa zadania', worker = NULL, lease_expires = NULL, updated_at = ? "
+            "WHERE status = 'running' AND lease_expires < ?",
+            (self.max_attempts, self._now(), time()))
+
+    def heartbeat(self, job_id: int, worker: str) -> bool:
+        """
+            Renews the lease of a job.
+
+            Args:
+                - job_id (int): The ID of the job.
+                - worker (str): The name of the worker.
+
+            Returns:
+                - bool: True if the worker still holds the lease, False if the job was taken over by another worker.
+        """
+        with closing(self._connect()) as connection:
+            cursor: sqlite3.Cursor = connection.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (time() + self.lease_time, job_id, worker))
+            return cursor.rowcount == 1
+
+    def holds_lease(self, job_id: int, worker: str) -> bool:
+        """
+            Checks if a worker still holds the lease of a running job.
+
+            Args:
+                - job_id (int): The ID of the job.
+                - worker (str): The name of the worker.
+
+            Returns:
+                - bool: True if the job is still running on this worker, False if it was taken over or finished.
+        """
+        with closing(self._connect()) as connection:
+            return connection.execute(
+                "SELECT 1 FROM jobs WHERE id = ? AND worker = ? AND status = 'running'",
+                (job_id, worker)).fetchone() is not None
+
+    def finish(self, job_id: int, worker: str, success: bool, error: Optional[str] = None) -> bool:
+        """
+            Records the result of a job. A failed job is queued again for a retry,
+            unless it has reached the maximum number of attempts.
+            The result is recorded only if the worker still holds the lease, so a worker which lost the job
+            never overwrites the status set by its new owner.
+
+            Args:
+                - job_id (int): The ID of the job.
+                - worker (str): The name of the worker.
+                - success (bool): Whether the job finished successfully.
+                - error (Optional[str]): The error message of a failed job. Defaults to None.
+
+            Returns:
+                - bool: True if the result was recorded, False if the worker no longer holds the lease.
+        """
+        with closing(self._connect()) as connection:
+            cursor: sqlite3.Cursor = connection.execute(
+                "UPDATE jobs SET status = CASE WHEN ? THEN 'done' WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+                "error = ?, worker = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (success, self.max_attempts, error, self._now(), job_id, worker))
+            return cursor.rowcount == 1
+
+    def release(self, worker: str) -> int:
+        """
+            Queues again the jobs leased by a worker, e.g. when it stops or restarts.
+            They are resumed from the episode journal. The interrupted attempt is not counted.
+
+            Args:
+                - worker (str): The name of the worker.
+
+            Returns:
+                - int: The number of queued jobs.
+        """
+        with closing(self._connect()) as connection:
+            cursor: sqlite3.Cursor = connection.execute(
+                "UPDATE jobs SET status = 'queued', attempts = MAX(attempts - 1, 0), worker = NULL, "
+                "lease_expires = NULL, updated_at = ? WHERE status = 'running' AND worker = ?",
+                (self._now(), worker))
+            return cursor.rowcount
+
+    def get_counts(self) -> Dict[str, int]:
+        """
+            Returns the number of jobs in each status.
+
+            Returns:
+                - Dict[str, int]: A dictionary mapping statuses to the number of jobs.
+        """
+        with closing(self._connect()) as connection:
+            return {row['status']: row['count'] for row in
+                    connection.execute('SELECT status, COUNT(*) AS count FROM jobs GROUP BY status')}
@@ -0,0 +1,141 @@
+"""
+    This module defines the 'MkvIndex' class, a persistent index of identified MKV files.
+    Identifying a file with mkvmerge spawns a process and reads the file headers, which is slow for big libraries
+    on a network drive. The index stores the result keyed by the path, size and modification time of the file,
+    so unchanged files are identified again without running mkvmerge.
+
+    * Usage:
+        To use this module, create an instance of the 'MkvIndex' class, load it, and get or put entries.
+
+    * Example usage:
+        index = MkvIndex()
+        index.load()
+        entry = index.get('working_space/example.mkv')
+        if entry is None:
+            ...
+            index.put('working_space/example.mkv', data, tracks_data)
+            index.save()
+
+    * Example entry of the index file:
+        "D:/mm_avh/working_space/example.mkv": {
+            "size": 4294967296,
+            "mtime_ns": 1694340000000000000,
+            "duration": 1420.5,
+            "tracks": [{"id": 0, "type": "video", "codec_id": "V_MPEG4/ISO/AVC", "language": "und", ...}],
+            "data": {...the output of mkvmerge --identify...}
+        }
+"""
+
+from contextlib import suppress
+from dataclasses import dataclass, field
+from json import decoder, dump, load
+from os import getpid, makedirs, path, remove, replace, stat
+from typing import Any, Dict, List, Optional, Set
+
+from constants import MKV_INDEX_PATH
+
+
+@dataclass(slots=True)
+class MkvIndex:
+    """
+        A persistent index of identified MKV files, keyed by (path, size, modification time).
+
+        Attributes:
+            - index_path (str): The path to the index file.
+            - entries (Dict[str, Dict[str, Any]]): The loaded entries, keyed by the absolute path of the MKV file.
+            - changed (Set[str]): The paths whose entries were added or changed since loading.
+
+        Methods:
+            - load(self) -> None: Loads the index from the file.
+            - save(self) -> None: Saves the changed entries to the file.
+            - get(self, file_path: str) -> Optional[Dict[str, Any]]: Returns the entry of an unchanged file.
+            - put(self, file_path: str, data: dict, tracks_data: List[dict]) -> None: Stores the identification of a file.
+    """
+    index_path: str = MKV_INDEX_PATH
+    entries: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    changed: Set[str] = field(default_factory=set)
+
+    def load(self) -> None:
+        """
+            Loads the index from the file. A missing or broken file gives an empty index.
+        """
+        self.entries = self._read()
+        self.changed = set()
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        """
+            Reads the index file.
+
+            Returns:
+                - Dict[str, Dict[str, Any]]: The entries of the index file.
+        """
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as file:
+                return load(file)
+        except (FileNotFoundError, decoder.JSONDecodeError):
+            return {}
+
+    def save(self) -> None:
+        """
+            Saves the changed entries to the file. Only the entries added or changed by this instance are written
+            over the file, so newer entries written in the meantime by other processes are kept;
+            entries of files which no longer exist are removed.
+        """
+        if not self.changed:
+            return
+        entries: Dict[str, Dict[str, Any]] = {**self._read(),
+                                              **{file_path: self.entries[file_path] for file_path in self.changed}}
+        entries = {file_path: entry for file_path, entry in entries.items() if path.exists(file_path)}
+        makedirs(path.dirname(self.index_path), exist_ok=True)
+        temp_path: str = f'{self.index_path}.{getpid()}.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                dump(entries, file, ensure_ascii=False)
+            replace(temp_path, self.index_path)
+        finally:
+            with suppress(FileNotFoundError):
+                remove(temp_path)
+        self.entries = entries
+        self.changed = set()
+
+    def get(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """
+            Returns the entry of a file, if the file has not changed since it was identified.
+
+            Args:
+                - file_path (str): The path to the MKV file.
+
+            Returns:
+                - Optional[Dict[str, Any]]: The entry with the keys 'data', 'tracks' and 'duration', or None.
+        """
+        entry: Optional[Dict[str, Any]] = self.entries.get(path.abspath(file_path))
+        if entry is None:
+            return None
+        try:
+            file_stat = stat(file_path)
+        except FileNotFoundError:
+            return None
+        if (entry['size'], entry['mtime_ns']) != (file_stat.st_size, file_stat.st_mtime_ns):
+            return None
+        return entry
+
+    def put(self, file_path: str, data: dict, tracks_data: List[dict]) -> None:
+        """
+            Stores the identification of a file.
+
+            Args:
+                - file_path (str): The path to the MKV file.
+                - data (dict): The output of mkvmerge --identify.
+                - tracks_data (List[dict]): The parsed track table.
+        """
+        file_stat = stat(file_path)
+        duration_ns: Optional[int] = data.get(
+            'container', {}).get('properties', {}).get('duration')
+        self.entries[path.abspath(file_path)] = {
+            'size': file_stat.st_size,
+            'mtime_ns': file_stat.st_mtime_ns,
+            'duration': duration_ns / 1e9 if duration_ns else None,
+            'tracks': tracks_data,
+            'data': data
+        }
+        self.changed.add(path.abspath(file_path))
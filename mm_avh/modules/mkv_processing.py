@@ -12,11 +12,10 @@
 """
 
 import re
-from contextlib import suppress
 from dataclasses import dataclass
 from os import listdir, path, remove, rename
 from shutil import move
-from subprocess import Popen, call
+from subprocess import CalledProcessError
 from typing import List, Dict, Callable, Optional
 
 from constants import (WORKING_SPACE,
@@ -25,6 +24,8 @@ from constants import (WORKING_SPACE,
                        FFMPEG_PATH,
                        console)
 from data.settings import Settings
+from utils.ffmpeg_progress import run_ffmpeg
+from utils.process_runner import run_process
 
 
 @dataclass(slots=True)
@@ -130,8 +131,12 @@ class MKVProcessing:
             command.extend(['--language', '0:pol', '--track-name',
                            '0:Napisy Poboczne PL', '--default-track', '0:no', subtitle_file_ass])
 
-        process = Popen(command)
-        process.communicate()
+        try:
+            run_process(command, success_codes=(0, 1), echo=True)
+        except (OSError, CalledProcessError) as error:
+            console.print(
+                f'Błąd łączenia pliku {self.filename}: {error}', style='red_bold')
+            return
 
         self._remove_files([subtitle_file_srt, subtitle_file_ass, lector_file])
 
@@ -164,8 +169,11 @@ class MKVProcessing:
         command: List[str] = self._prepare_command(
             new_filename, output_file, lector_file, subtitle_file_srt, subtitle_file_ass)
 
-        with suppress(Exception):
-            call(command)
+        try:
+            run_ffmpeg(command, job=filename[:-4] + '.mp4')
+        except (OSError, CalledProcessError) as error:
+            console.print(
+                f'Błąd konwersji pliku {filename}: {error}', style='red_bold')
 
         if path.exists(output_file):
             target_file = path.join(
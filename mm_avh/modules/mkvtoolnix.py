@@ -6,6 +6,10 @@
         mkv_info = mkvtoolnix.get_mkv_info()
         mkvtoolnix.mkv_extract_track(mkv_info)
 
+    * Example usage (many files at once):
+        entries = MkvToolNix.identify_many(WORKING_SPACE)
+        MkvToolNix.extract_many({'example_01.mkv': {2, 3}, 'example_02.mkv': {2}}, WORKING_SPACE, entries=entries)
+
     * Example output from get_mkv_info():
         {
             "container": {...},
@@ -17,10 +21,11 @@
 """
 
 import sys
-from subprocess import Popen, PIPE, CalledProcessError
+from concurrent.futures import ThreadPoolExecutor
+from subprocess import CalledProcessError
 from json import loads
-from typing import Dict, List, Set
-from os import path
+from typing import Any, Dict, List, Optional, Set
+from os import listdir, path
 from dataclasses import dataclass
 
 from constants import (WORKING_SPACE,
@@ -30,6 +35,9 @@ from constants import (WORKING_SPACE,
                        MKV_MERGE_PATH, MKV_INFO_PATH,
                        MKV_PROPEDIT_PATH,
                        console)
+from modules.mkv_index import MkvIndex
+from modules.track_rules import TrackRule, select_tracks
+from utils.process_runner import ProcessResult, run_process
 
 
 @dataclass(slots=True)
@@ -48,8 +56,14 @@ class MkvToolNix:
             - mkv_propedit_path (str): The path to the mkvpropedit executable.
 
         Methods:
-            - get_mkv_info(): Retrieves information about the MKV file using the mkvinfo tool.
-            - mkv_extract_track(data: Dict[str, any]): Extracts the specified tracks from the MKV file using the mkvextract tool.
+            - get_mkv_info(): Retrieves information about the MKV file using the mkvinfo tool (or the index of identified files).
+            - identify(index: MkvIndex) -> Optional[Dict[str, Any]]: Returns the index entry of the MKV file, identifying it if needed.
+            - identify_many(directory: str = WORKING_SPACE, max_workers: int = 4) -> Dict[str, Dict[str, Any]]: Identifies all MKV files in a directory.
+            - mkv_extract_track(data: Dict[str, any], track_ids: Optional[Set[int]] = None): Extracts the specified tracks from the MKV file using the mkvextract tool.
+            - plan_extraction(data: Dict[str, any], track_ids: Set[int]) -> Dict[str, int]: Determines the output file of every track.
+            - select_track_ids(data: Dict[str, any], rules: List[TrackRule]) -> Set[int]: Selects the tracks with the rules from the settings.
+            - ask_track_ids(data: Dict[str, any]) -> Set[int]: Prompts the user to enter the IDs of the tracks to be extracted.
+            - extract_many(selection: Dict[str, Set[int]], working_space: str = WORKING_SPACE, max_workers: int = 2, entries: Optional[Dict[str, Dict[str, Any]]] = None): Extracts tracks from many MKV files concurrently.
     """
     filename: str
     working_space: str = WORKING_SPACE
@@ -77,29 +91,74 @@ class MkvToolNix:
     def get_mkv_info(self) -> dict:
         """
             Retrieves information about the MKV file using the mkvinfo tool.
+            Files which have not changed since they were identified are taken from the index without running mkvinfo.
             The information is returned as a dictionary and also printed to the console.
             If an error occurs during the process, the program will exit with an error message.
 
             Returns:
             - dict: A dictionary containing information about the MKV file.
         """
+        index: MkvIndex = MkvIndex()
+        index.load()
+        entry: Optional[Dict[str, Any]] = self.identify(index)
+        index.save()
+        if entry is None:
+            return {}
+        self._print_mkv_info(entry['tracks'])
+        return entry['data']
+
+    def identify(self, index: MkvIndex) -> Optional[Dict[str, Any]]:
+        """
+            Returns the index entry of the MKV file. If the file is not in the index or has changed,
+            it is identified with mkvinfo and the new entry is added to the index (the caller saves the index).
+            If the executables are missing, the program will exit with an error message.
+
+            Args:
+                - index (MkvIndex): The loaded index of identified files.
+
+            Returns:
+                - Optional[Dict[str, Any]]: The entry with the keys 'data', 'tracks' and 'duration', or None on error.
+        """
+        file_path: str = path.join(self.working_space, self.filename)
+        entry: Optional[Dict[str, Any]] = index.get(file_path)
+        if entry is not None:
+            return entry
         try:
             self._check_executables()
             command: List[str] = self._get_mkv_info_command()
-            with Popen(command, stdout=PIPE, stderr=PIPE, universal_newlines=True) as process:
-                output, error = process.communicate()
-
-                if process.returncode == 0:
-                    data: dict = loads(output)
-                    tracks_data: List[dict] = self._parse_tracks_data(data)
-                    self._print_mkv_info(tracks_data)
-                    return data
-
-                console.print(f'Error: {error}', style='red_bold')
-        except (FileNotFoundError, CalledProcessError) as error:
+            result: ProcessResult = run_process(command)
+            data: dict = loads(result.stdout)
+            index.put(file_path, data, self._parse_tracks_data(data))
+            return index.get(file_path)
+        except CalledProcessError as error:
+            console.print(f'Error: {error.stderr or error.output}', style='red_bold')
+        except FileNotFoundError as error:
             console.print(f'Error: {error}', style='red_bold')
             sys.exit()
-        return {}
+        return None
+
+    @staticmethod
+    def identify_many(directory: str = WORKING_SPACE, max_workers: int = 4) -> Dict[str, Dict[str, Any]]:
+        """
+            Identifies all MKV files in a directory. Unchanged files are taken from the index,
+            the other ones are identified in parallel and the index is saved once at the end.
+
+            Args:
+                - directory (str): The directory with the MKV files. Defaults to WORKING_SPACE.
+                - max_workers (int): The maximum number of mkvinfo processes at the same time. Defaults to 4.
+
+            Returns:
+                - Dict[str, Dict[str, Any]]: The index entries of the identified files, keyed by the file name.
+        """
+        index: MkvIndex = MkvIndex()
+        index.load()
+        filenames: List[str] = [file for file in listdir(directory)
+                                if path.isfile(path.join(directory, file)) and file.endswith('.mkv')]
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            entries: List[Optional[Dict[str, Any]]] = list(executor.map(
+                lambda filename: MkvToolNix(filename, working_space=directory).identify(index), filenames))
+        index.save()
+        return {filename: entry for filename, entry in zip(filenames, entries) if entry is not None}
 
     def _get_mkv_info_command(self) -> List[str]:
         """
@@ -201,15 +260,98 @@ class MkvToolNix:
             )
         console.print()
 
-    def mkv_extract_track(self, data: Dict[str, any]) -> None:
+    def mkv_extract_track(self, data: Dict[str, any], track_ids: Optional[Set[int]] = None) -> None:
         """
             Extracts the specified tracks from the MKV file using the mkvextract tool.
             The tracks to be extracted are specified by their IDs.
-            The user is prompted to enter the IDs of the tracks to be extracted.
+            If no IDs are given, the user is prompted to enter the IDs of the tracks to be extracted.
+            All tracks are extracted by a single mkvextract call, so the MKV file is read only once.
             If an error occurs during the process, the program will exit with an error message.
 
             Args:
                 - data (Dict[str, any]): A dictionary containing information about the MKV file.
+                - track_ids (Optional[Set[int]]): The IDs of the tracks to extract (headless mode). Defaults to None.
+        """
+        tracks_to_extract: Set[int] = track_ids if track_ids is not None else self.ask_track_ids(
+            data)
+
+        try:
+            out_files: Dict[str, int] = self.plan_extraction(
+                data, tracks_to_extract)
+        except (IndexError, KeyError):
+            console.print(
+                'Znaleziono nieprawidłowe ID ścieżki!', style='red_bold')
+            if track_ids is not None:
+                return
+            self.mkv_extract_track(data)
+            return
+
+        if out_files:
+            for filename, track_id in out_files.items():
+                console.print(
+                    f'\nEkstrakcja ścieżki {track_id} do pliku {filename}', style='yellow_bold')
+            command: List[str] = self._get_extract_command(
+                {track_id: path.join(self.working_space_temp, filename) for filename, track_id in out_files.items()})
+            try:
+                run_process(command, success_codes=(0, 1), echo=True)
+            except (FileNotFoundError, CalledProcessError) as error:
+                console.print(
+                    f'Błąd ekstrakcji ścieżek: {error}', style='red_bold')
+                return
+
+        console.print(
+            'Ekstrakcja zakończona pomyślnie.\n', style='green_bold')
+
+    def plan_extraction(self, data: Dict[str, any], track_ids: Set[int]) -> Dict[str, int]:
+        """
+            Determines the output file of every track to be extracted.
+            Tracks with the same file extension would overwrite each other, so only the last of them is kept.
+
+            Args:
+                - data (Dict[str, any]): A dictionary containing information about the MKV file.
+                - track_ids (Set[int]): The IDs of the tracks to extract.
+
+            Returns:
+                - Dict[str, int]: The names of the output files and the IDs of their tracks.
+
+            Raises:
+                - IndexError, KeyError: If a track ID is invalid.
+        """
+        out_files: Dict[str, int] = {}
+        for track_id in sorted(track_ids):
+            track: str = data['tracks'][track_id]
+            codec_id: str = track['properties']['codec_id']
+            format_extension: str = self._get_format_extension(codec_id)
+            filename: str = f'{self.filename[:-4]}.{format_extension}'
+            if filename in out_files:
+                console.print(
+                    f'Ścieżka {out_files[filename]} i {track_id} mają ten sam plik {filename} - wyciągam tylko {track_id}.',
+                    style='red_italic')
+            out_files[filename] = track_id
+        return out_files
+
+    def select_track_ids(self, data: Dict[str, any], rules: List[TrackRule]) -> Set[int]:
+        """
+            Selects the tracks to be extracted with the rules from the settings, without asking the user.
+
+            Args:
+                - data (Dict[str, any]): A dictionary containing information about the MKV file.
+                - rules (List[TrackRule]): The track selection rules.
+
+            Returns:
+                - Set[int]: The IDs of the selected tracks.
+        """
+        return select_tracks(self._parse_tracks_data(data), rules)
+
+    def ask_track_ids(self, data: Dict[str, any]) -> Set[int]:
+        """
+            Prompts the user to enter the IDs of the tracks to be extracted.
+
+            Args:
+                - data (Dict[str, any]): A dictionary containing information about the MKV file.
+
+            Returns:
+                - Set[int]: The IDs of the tracks to extract.
         """
         valid_track_range: range = range(len(data['tracks']))
         tracks_to_extract: Set[int] = set()
@@ -232,28 +374,7 @@ class MkvToolNix:
                 console.print(
                     'Pominięto wyciąganie ścieżki.\n', style='red_bold')
 
-        try:
-            for track_id in tracks_to_extract:
-                track: str = data['tracks'][track_id]
-                codec_id: str = track['properties']['codec_id']
-                format_extension: str = self._get_format_extension(codec_id)
-                filename: str = f'{self.filename[:-4]}.{format_extension}'
-                out_file: str = path.join(self.working_space_temp, filename)
-                command: List[str] = self._get_extract_command(
-                    track_id, out_file)
-
-                with Popen(command) as process:
-                    console.print(
-                        f'\nEkstrakcja ścieżki {track_id} do pliku {filename}', style='yellow_bold')
-                    process.wait()
-
-        except (IndexError, KeyError):
-            console.print(
-                'Znaleziono nieprawidłowe ID ścieżki!', style='red_bold')
-            self.mkv_extract_track(data)
-
-        console.print(
-            'Ekstrakcja zakończona pomyślnie.\n', style='green_bold')
+        return tracks_to_extract
 
     @staticmethod
     def _get_format_extension(codec_id: str) -> str:
@@ -311,21 +432,47 @@ class MkvToolNix:
 
         return format_dict.get(codec_id, 'mkv')
 
-    def _get_extract_command(self, track_id: int, out_file: str) -> List[str]:
+    def _get_extract_command(self, out_files: Dict[int, str]) -> List[str]:
         """
-            Constructs the command to be used for extracting a track from the MKV file with mkvextract.
+            Constructs the command to be used for extracting tracks from the MKV file with mkvextract.
+            All tracks are passed as 'id:file' pairs of a single call.
             Returns the command as a list of strings.
 
             Args:
-                - track_id (int): The ID of the track to be extracted.
-                - out_file (str): The path and filename of the output file.
+                - out_files (Dict[int, str]): The IDs of the tracks to be extracted and the paths of their output files.
 
             Returns:
-                - List[str]: The command to be used for extracting the track.
+                - List[str]: The command to be used for extracting the tracks.
         """
         return [
             self.mkv_extract_path,
             'tracks',
             path.join(self.working_space, self.filename),
-            f'{track_id}:{out_file}'
+            *(f'{track_id}:{out_file}' for track_id, out_file in out_files.items())
         ]
+
+    @staticmethod
+    def extract_many(selection: Dict[str, Set[int]], working_space: str = WORKING_SPACE, max_workers: int = 2,
+                     entries: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        """
+            Extracts tracks from many MKV files at the same time.
+            The number of files read at once is limited, because extraction is bound by the disk (or network) speed.
+
+            Args:
+                - selection (Dict[str, Set[int]]): The names of the MKV files and the IDs of the tracks to extract from each one.
+                - working_space (str): The directory with the MKV files. Defaults to WORKING_SPACE.
+                - max_workers (int): The maximum number of files extracted at the same time. Defaults to 2.
+                - entries (Optional[Dict[str, Dict[str, Any]]]): The index entries of the files returned by 'identify_many';
+                  the other files are identified before the extraction. Defaults to None.
+        """
+        entries = entries or {}
+
+        def extract(filename: str, track_ids: Set[int]) -> None:
+            mkv: MkvToolNix = MkvToolNix(filename, working_space=working_space)
+            data: dict = entries[filename]['data'] if filename in entries else mkv.get_mkv_info()
+            mkv.mkv_extract_track(data, track_ids)
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            for future in [executor.submit(extract, filename, track_ids)
+                           for filename, track_ids in selection.items() if track_ids]:
+                future.result()
@@ -0,0 +1,257 @@
+"""
+    This module defines the 'SpeechTimingEstimator' class, which gives subtitles without timing (e.g. converted from TXT)
+    start and end times from the estimated duration of their speech. The duration of a caption is estimated
+    from its number of syllables and the speed of the TTS engine, and the captions are laid out one after another.
+    The estimate is calibrated with the real durations of synthesized captions (Edge and Harpo TTS report them),
+    fitted by least squares and stored per TTS engine in TTS_CALIBRATION_PATH.
+    Several processes can calibrate the same engine at once: every save adds only its own new samples
+    to the sums on disk, under a lock file, so no samples are lost.
+
+    * Usage:
+        To use this module, load the estimator of the TTS engine and time the captions.
+
+    * Example usage:
+        estimator = SpeechTimingEstimator.load('TTS - Zofia - Edge', '+40%')
+        for start, end, caption in estimator.layout(captions):
+            ...
+
+    * Example usage of the calibration:
+        estimator = SpeechTimingEstimator.load('TTS - Zofia - Edge', '+40%')
+        estimator.calibrate([('Ala ma kota.', 1250), ('Dzień dobry, jak się masz?', 2100)])
+        estimator.save()
+"""
+
+import re
+from contextlib import suppress
+from dataclasses import asdict, dataclass, field
+from json import decoder, dump, load
+from os import getpid, makedirs, path, remove, replace
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from constants import TTS_CALIBRATION_PATH
+from utils.file_lock import file_lock
+
+SYLLABLE_PATTERN: re.Pattern = re.compile(r'[aąeęioóuyAĄEĘIOÓUY]+')
+MIN_CALIBRATION_SAMPLES: int = 10
+SUM_KEYS: Tuple[str, ...] = ('n', 'x', 'y', 'xx', 'xy')
+
+
+def count_syllables(text: str) -> int:
+    """
+        Estimates the number of syllables of a text as the number of vowel groups (Polish and English vowels).
+        Numbers and other words without vowels count as one syllable each.
+
+        Args:
+            - text (str): The text.
+
+        Returns:
+            - int: The estimated number of syllables.
+    """
+    syllables: int = 0
+    for word in text.split():
+        syllables += len(SYLLABLE_PATTERN.findall(word)) or (1 if any(char.isalnum() for char in word) else 0)
+    return syllables
+
+
+def get_rate_factor(tts: Optional[str], tts_speed: Optional[str]) -> float:
+    """
+        Converts the speed setting of a TTS engine to a factor of the normal speaking rate.
+
+        Args:
+            - tts (Optional[str]): The TTS engine from the settings.
+            - tts_speed (Optional[str]): The speed from the settings: words per minute for Harpo,
+              -10 to 10 for Ivona (SAPI), '+40%' for Edge.
+
+        Returns:
+            - float: The factor, e.g. 1.4 for 40% faster speech.
+    """
+    if not tts or not tts_speed:
+        return 1.0
+    with suppress(ValueError):
+        if tts == 'TTS - Zosia - Harpo':
+            return max(int(tts_speed), 1) / 200
+        if tts == 'TTS - Agnieszka - Ivona':
+            return 3 ** (int(tts_speed) / 10)
+        if tts in {'TTS - Zofia - Edge', 'TTS - Marek - Edge'}:
+            return max(1 + int(tts_speed.rstrip('%')) / 100, 0.1)
+    return 1.0
+
+
+@dataclass(slots=True)
+class SpeechTimingEstimator:
+    """
+        Estimates the duration of the speech of captions and lays the captions out in time.
+        The model is 'duration = (ms_per_syllable * syllables + ms_per_caption) / rate_factor'.
+
+        Attributes:
+            - tts (str): The TTS engine the calibration belongs to.
+            - rate_factor (float): The speed of the TTS engine relative to the normal speaking rate.
+            - ms_per_syllable (float): The duration of a syllable at the normal rate.
+            - ms_per_caption (float): The fixed duration of a caption at the normal rate (breath, sentence end).
+            - gap (int): The silence between two captions in milliseconds.
+            - sums (Dict[str, float]): The sums of the calibration samples (n, x, y, xx, xy) for the least squares fit.
+            - new_sums (Dict[str, float]): The part of the sums added by this estimator and not saved yet.
+            - calibration_path (str): The file with the calibration of all TTS engines.
+
+        Methods:
+            - load(cls, tts, tts_speed, calibration_path) -> 'SpeechTimingEstimator': Loads the calibrated estimator.
+            - save(self) -> None: Adds the new samples to the saved calibration of the TTS engine.
+            - estimate(self, text: str) -> int: Estimates the duration of a caption.
+            - get_parameters(self) -> Dict[str, float]: Returns the parameters which decide the timing of the captions.
+            - layout(self, captions: Iterable[str]) -> Iterator[Tuple[int, int, str]]: Lays the captions out in time.
+            - calibrate(self, samples: Iterable[Tuple[str, int]]) -> bool: Fits the model to the real durations.
+    """
+    tts: str = ''
+    rate_factor: float = 1.0
+    ms_per_syllable: float = 180.0
+    ms_per_caption: float = 250.0
+    gap: int = 200
+    sums: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(SUM_KEYS, 0.0))
+    new_sums: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(SUM_KEYS, 0.0))
+    calibration_path: str = TTS_CALIBRATION_PATH
+
+    @classmethod
+    def load(cls, tts: Optional[str], tts_speed: Optional[str],
+             calibration_path: str = TTS_CALIBRATION_PATH) -> 'SpeechTimingEstimator':
+        """
+            Loads the estimator of a TTS engine, calibrated if a calibration was saved.
+
+            Args:
+                - tts (Optional[str]): The TTS engine from the settings.
+                - tts_speed (Optional[str]): The speed from the settings.
+                - calibration_path (str): The file with the calibration of all TTS engines.
+
+            Returns:
+                - SpeechTimingEstimator: The estimator.
+        """
+        estimator: SpeechTimingEstimator = cls(tts=tts or '',
+                                               rate_factor=get_rate_factor(tts, tts_speed),
+                                               calibration_path=calibration_path)
+        calibration: Dict[str, Any] = estimator._read().get(estimator.tts, {})
+        estimator.ms_per_syllable = calibration.get('ms_per_syllable', estimator.ms_per_syllable)
+        estimator.ms_per_caption = calibration.get('ms_per_caption', estimator.ms_per_caption)
+        estimator.sums.update(calibration.get('sums', {}))
+        return estimator
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        """
+            Reads the calibration file.
+
+            Returns:
+                - Dict[str, Dict[str, Any]]: The calibration of every TTS engine.
+        """
+        try:
+            with open(self.calibration_path, 'r', encoding='utf-8') as file:
+                return load(file)
+        except (FileNotFoundError, decoder.JSONDecodeError):
+            return {}
+
+    def save(self) -> None:
+        """
+            Adds the samples collected since the last save to the calibration of the TTS engine on disk
+            and fits the model to all of them, keeping the calibration of the other engines.
+            The file is read and written under a lock, so the samples saved at the same time
+            by other processes are kept.
+        """
+        with file_lock(f'{self.calibration_path}.lock'):
+            calibrations: Dict[str, Dict[str, Any]] = self._read()
+            saved_sums: Dict[str, float] = calibrations.get(self.tts, {}).get('sums', {})
+            self.sums = {key: saved_sums.get(key, 0.0) + self.new_sums[key] for key in SUM_KEYS}
+            self._fit()
+            calibrations[self.tts] = {key: value for key, value in asdict(self).items()
+                                      if key in ('ms_per_syllable', 'ms_per_caption', 'sums')}
+            makedirs(path.dirname(self.calibration_path) or '.', exist_ok=True)
+            temp_path: str = f'{self.calibration_path}.{getpid()}.tmp'
+            try:
+                with open(temp_path, 'w', encoding='utf-8') as file:
+                    dump(calibrations, file, ensure_ascii=False, indent=4)
+                replace(temp_path, self.calibration_path)
+            finally:
+                with suppress(FileNotFoundError):
+                    remove(temp_path)
+        self.new_sums = dict.fromkeys(SUM_KEYS, 0.0)
+
+    def estimate(self, text: str) -> int:
+        """
+            Estimates the duration of the speech of a caption.
+
+            Args:
+                - text (str): The text of the caption.
+
+            Returns:
+                - int: The duration in milliseconds.
+        """
+        syllables: int = count_syllables(text)
+        if not syllables:
+            return 0
+        return round((self.ms_per_syllable * syllables + self.ms_per_caption) / self.rate_factor)
+
+    def get_parameters(self) -> Dict[str, float]:
+        """
+            Returns the parameters which decide the timing of the captions, e.g. to detect a changed calibration.
+
+            Returns:
+                - Dict[str, float]: The rate factor, the durations of a syllable and of a caption, and the gap.
+        """
+        return {'rate_factor': round(self.rate_factor, 6),
+                'ms_per_syllable': round(self.ms_per_syllable, 6),
+                'ms_per_caption': round(self.ms_per_caption, 6),
+                'gap': self.gap}
+
+    def layout(self, captions: Iterable[str]) -> Iterator[Tuple[int, int, str]]:
+        """
+            Lays the captions out one after another, separated by the gap.
+
+            Args:
+                - captions (Iterable[str]): The texts of the captions.
+
+            Yields:
+                - Tuple[int, int, str]: The start and end time in milliseconds and the text of every caption.
+        """
+        time: int = 0
+        for caption in captions:
+            duration: int = self.estimate(caption)
+            yield time, time + duration, caption
+            time += duration + self.gap
+
+    def calibrate(self, samples: Iterable[Tuple[str, int]]) -> bool:
+        """
+            Adds the real durations of synthesized captions and fits the model to all samples collected so far.
+            The durations are converted to the normal rate, so samples of different speeds can be combined.
+
+            Args:
+                - samples (Iterable[Tuple[str, int]]): The texts and the durations of their speech in milliseconds.
+
+            Returns:
+                - bool: True if the model was fitted, False if there are not enough samples yet.
+        """
+        for text, duration in samples:
+            syllables: int = count_syllables(text)
+            if not syllables or duration <= 0:
+                continue
+            normal_duration: float = duration * self.rate_factor
+            for sums in (self.sums, self.new_sums):
+                sums['n'] += 1
+                sums['x'] += syllables
+                sums['y'] += normal_duration
+                sums['xx'] += syllables * syllables
+                sums['xy'] += syllables * normal_duration
+        return self._fit()
+
+    def _fit(self) -> bool:
+        """
+            Fits the model to the sums of the samples by least squares.
+
+            Returns:
+                - bool: True if the model was fitted, False if there are not enough samples yet.
+        """
+        n, x, y, xx, xy = (self.sums[key] for key in SUM_KEYS)
+        denominator: float = n * xx - x * x
+        if n < MIN_CALIBRATION_SAMPLES or denominator <= 0:
+            return False
+        slope: float = (n * xy - x * y) / denominator
+        if slope <= 0:
+            return False
+        self.ms_per_syllable = slope
+        self.ms_per_caption = max(0.0, (y - slope * x) / n)
+        return True
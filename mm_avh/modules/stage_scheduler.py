@@ -0,0 +1,179 @@
+"""
+    This module defines the 'StageScheduler' class, which runs the stages of many episodes as a dependency graph.
+    Every stage is limited by its own resource pool (network, CPU, disk), so e.g. the next episode
+    can be translated while the previous one is being encoded, and the number of concurrent ffmpeg
+    processes stays bounded.
+
+    * Usage:
+        To use this module, create an instance of the 'StageScheduler' class, add the episodes and call the 'run' method.
+
+    * Example usage:
+        scheduler = StageScheduler(slots={'network': 4, 'cpu': 2, 'disk': 2, 'desktop': 1})
+        for entry in manifest.files:
+            scheduler.add_episode(EpisodePipeline(entry, manifest.settings))
+        results = scheduler.run()
+"""
+
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Set, Tuple
+
+from natsort import natsorted
+
+from constants import console
+from modules.episode_journal import EpisodeJournal
+from modules.episode_pipeline import EpisodePipeline
+
+
+@dataclass(slots=True)
+class StageTask:
+    """
+        A single stage of a single episode.
+
+        Attributes:
+            - episode (str): The name of the episode (file name without the extension).
+            - stage (str): The name of the stage.
+            - resource (str): The resource pool which limits the stage.
+            - depends_on (List[str]): The stages of the same episode which have to finish first.
+            - priority (Tuple[int, int]): The order of the episode and of the stage; lower runs first.
+            - pipeline (EpisodePipeline): The pipeline of the episode (manifest entry, settings and cache).
+    """
+    episode: str
+    stage: str
+    resource: str
+    depends_on: List[str]
+    priority: Tuple[int, int]
+    pipeline: EpisodePipeline
+
+
+def _run_stage(pipeline: EpisodePipeline, stage_name: str) -> None:
+    """
+        Runs a single stage of an episode. Defined at module level, so it can be sent to a worker process.
+
+        Args:
+            - pipeline (EpisodePipeline): The pipeline of the episode.
+            - stage_name (str): The name of the stage.
+    """
+    pipeline.run_stage(stage_name)
+
+
+@dataclass(slots=True)
+class StageScheduler:
+    """
+        Schedules the stages of many episodes with separate limits for each resource pool.
+
+        Attributes:
+            - slots (Dict[str, int]): The number of stages which can use each resource pool at the same time.
+            - tasks (Dict[Tuple[str, str], StageTask]): The stages waiting to be run, keyed by (episode, stage).
+            - finished (Set[Tuple[str, str]]): The (episode, stage) pairs which are finished, including the ones from the journal.
+
+        Methods:
+            - add_episode(self, pipeline: EpisodePipeline) -> None: Adds all stages of an episode to the graph.
+            - run(self) -> Dict[str, bool]: Runs all stages and returns the result of every episode.
+    """
+    slots: Dict[str, int] = field(default_factory=lambda: {
+        'network': 4, 'cpu': 2, 'disk': 2, 'desktop': 1})
+    tasks: Dict[Tuple[str, str], StageTask] = field(default_factory=dict)
+    finished: Set[Tuple[str, str]] = field(default_factory=set)
+
+    def add_episode(self, pipeline: EpisodePipeline) -> None:
+        """
+            Adds all stages of an episode to the graph.
+            Stages finished in a previous run with the same settings (according to the journal) are not run again.
+            Episodes added earlier have a higher priority.
+
+            Args:
+                - pipeline (EpisodePipeline): The pipeline of the episode.
+        """
+        episode: str = pipeline.entry.stem
+        episode_order: int = len({task.episode for task in self.tasks.values()} |
+                                 {finished_episode for finished_episode, _ in self.finished})
+        stage_order: List[str] = [stage_name for stage_name, _ in pipeline.get_stages()]
+        journal: EpisodeJournal = pipeline.get_journal()
+        journal.invalidate_changed(pipeline.get_stage_graph(), pipeline.get_fingerprints())
+        journal.verify(pipeline.get_stage_graph(), pipeline.working_space)
+        for stage_name, depends_on in pipeline.get_stage_graph().items():
+            if journal.is_finished(stage_name):
+                self.finished.add((episode, stage_name))
+                continue
+            self.tasks[(episode, stage_name)] = StageTask(
+                episode=episode,
+                stage=stage_name,
+                resource=pipeline.get_stage_resource(stage_name),
+                depends_on=depends_on,
+                priority=(episode_order, stage_order.index(stage_name)),
+                pipeline=pipeline
+            )
+
+    def run(self) -> Dict[str, bool]:
+        """
+            Runs all stages. A stage starts as soon as the stages it depends on are finished
+            and its resource pool has a free slot. If a stage fails, the remaining stages of that episode are skipped.
+
+            Returns:
+                - Dict[str, bool]: A dictionary mapping episode names to the result of their processing.
+        """
+        results: Dict[str, bool] = {episode: True for episode, _ in self.tasks} | \
+            {episode: True for episode, _ in self.finished}
+        finished: Set[Tuple[str, str]] = self.finished
+        in_use: Dict[str, int] = {resource: 0 for resource in self.slots}
+        running: Dict[Future, StageTask] = {}
+
+        with ProcessPoolExecutor(max_workers=sum(self.slots.values())) as executor:
+            while self.tasks or running:
+                for task in self._get_ready_tasks(finished):
+                    if in_use.get(task.resource, 0) >= self.slots.get(task.resource, 1):
+                        continue
+                    del self.tasks[(task.episode, task.stage)]
+                    in_use[task.resource] = in_use.get(task.resource, 0) + 1
+                    future: Future = executor.submit(
+                        _run_stage, task.pipeline, task.stage)
+                    running[future] = task
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    in_use[task.resource] -= 1
+                    try:
+                        future.result()
+                        finished.add((task.episode, task.stage))
+                    except Exception as error:  # pylint: disable=broad-except
+                        console.print(
+                            f'Błąd w etapie {task.stage} odcinka {task.episode}: {error}', style='red_bold')
+                        results[task.episode] = False
+                        self._drop_episode(task.episode)
+
+        failed: List[str] = [episode for episode, success in results.items() if not success]
+        if failed:
+            console.print(
+                f'\nNie udało się przetworzyć odcinków: {", ".join(natsorted(failed))}', style='red_bold')
+        return results
+
+    def _get_ready_tasks(self, finished: Set[Tuple[str, str]]) -> List[StageTask]:
+        """
+            Returns the waiting stages whose dependencies are finished, ordered by priority.
+
+            Args:
+                - finished (Set[Tuple[str, str]]): The (episode, stage) pairs which are already finished.
+
+            Returns:
+                - List[StageTask]: The stages which can be started.
+        """
+        ready: List[StageTask] = [
+            task for task in self.tasks.values()
+            if all((task.episode, stage) in finished for stage in task.depends_on)
+        ]
+        return sorted(ready, key=lambda task: task.priority)
+
+    def _drop_episode(self, episode: str) -> None:
+        """
+            Removes the waiting stages of a failed episode.
+
+            Args:
+                - episode (str): The name of the episode.
+        """
+        for key in [key for key in self.tasks if key[0] == episode]:
+            del self.tasks[key]
@@ -0,0 +1,157 @@
+"""
+    This module defines the 'StyleStats' and 'StyleClassifier' classes, which decide automatically
+    which ASS styles are dialogue (main subtitles for TTS) and which are signs, songs or karaoke (alternative subtitles).
+    Every style is scored by its share of the events, the average duration and text length of its events,
+    the density of positioning, fade and karaoke override tags and its position on the screen.
+    Styles scored too close to the boundary make the classification uncertain, so the caller can ask the user instead.
+
+    * Usage:
+        To use this module, collect the statistics of the styles (see 'scan_ass_styles' in the subtitle module)
+        and classify them.
+
+    * Example usage:
+        stats = scan_ass_styles('example.ass')
+        result = StyleClassifier().classify(list(stats.values()))
+        if result.confident:
+            split_ass_file(..., StyleSelector.from_list(result.dialogue))
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+SIGN_TAG_PATTERN: re.Pattern = re.compile(
+    r'\\(?:pos|move|org|i?clip|fade?|t)\(|\\(?:k[fo]?|K)\d')
+POSITION_TAG_PATTERN: re.Pattern = re.compile(r'\\an[789]|\\a[567](?!\d)|\\(?:pos|move)\(')
+OVERRIDE_BLOCK_PATTERN: re.Pattern = re.compile(r'\{[^}]*\}')
+
+
+@dataclass(slots=True)
+class StyleStats:
+    """
+        The statistics of the events of one ASS style.
+
+        Attributes:
+            - name (str): The name of the style.
+            - top_alignment (bool): Whether the style itself is aligned to the top of the screen.
+            - count (int): The number of events.
+            - duration (int): The total duration of the events in milliseconds.
+            - tagged (int): The number of events with positioning, fade or karaoke tags.
+            - positioned (int): The number of events shown at the top of the screen or at an explicit position.
+            - text_length (int): The total length of the texts without the override tags.
+
+        Methods:
+            - add_event(self, start: int, end: int, text: str) -> None: Adds an event to the statistics.
+    """
+    name: str
+    top_alignment: bool = False
+    count: int = 0
+    duration: int = 0
+    tagged: int = 0
+    positioned: int = 0
+    text_length: int = 0
+
+    def add_event(self, start: int, end: int, text: str) -> None:
+        """
+            Adds an event to the statistics.
+
+            Args:
+                - start (int): The start time in milliseconds.
+                - end (int): The end time in milliseconds.
+                - text (str): The ASS text of the event.
+        """
+        self.count += 1
+        self.duration += max(0, end - start)
+        if SIGN_TAG_PATTERN.search(text):
+            self.tagged += 1
+        if self.top_alignment or POSITION_TAG_PATTERN.search(text):
+            self.positioned += 1
+        self.text_length += len(OVERRIDE_BLOCK_PATTERN.sub('', text).replace('\\N', ' '))
+
+
+@dataclass(slots=True)
+class StyleClassification:
+    """
+        The result of the classification of the styles of a file.
+
+        Attributes:
+            - dialogue (List[str]): The styles proposed for the main subtitles.
+            - signs (List[str]): The styles proposed for the alternative subtitles.
+            - scores (Dict[str, float]): The dialogue score of every style, from 0 (sign) to 1 (dialogue).
+            - confident (bool): Whether every style is far enough from the boundary and at least one is dialogue.
+    """
+    dialogue: List[str] = field(default_factory=list)
+    signs: List[str] = field(default_factory=list)
+    scores: Dict[str, float] = field(default_factory=dict)
+    confident: bool = False
+
+
+@dataclass(slots=True)
+class StyleClassifier:
+    """
+        Scores ASS styles as dialogue or signs.
+
+        Attributes:
+            - threshold (float): The minimum confidence (distance of the score from 0.5, scaled to 0-1) of every style.
+            - min_duration (int): The shortest typical average duration of a dialogue line in milliseconds.
+            - max_duration (int): The longest typical average duration of a dialogue line in milliseconds.
+            - min_text_length (int): The typical minimum average text length of a dialogue line.
+
+        Methods:
+            - score(self, stats: StyleStats, total_count: int) -> float: Returns the dialogue score of a style.
+            - classify(self, styles: List[StyleStats]) -> StyleClassification: Classifies the styles of a file.
+    """
+    threshold: float = 0.3
+    min_duration: int = 700
+    max_duration: int = 7000
+    min_text_length: int = 15
+
+    def score(self, stats: StyleStats, total_count: int) -> float:
+        """
+            Returns the dialogue score of a style: a weighted mean of the feature scores.
+
+            Args:
+                - stats (StyleStats): The statistics of the style.
+                - total_count (int): The number of events of all styles.
+
+            Returns:
+                - float: The score from 0 (sign, song, karaoke) to 1 (dialogue).
+        """
+        if not stats.count:
+            return 0.0
+        mean_duration: float = stats.duration / stats.count
+        if mean_duration < self.min_duration:
+            duration_score: float = mean_duration / self.min_duration
+        elif mean_duration > self.max_duration:
+            duration_score = self.max_duration / mean_duration
+        else:
+            duration_score = 1.0
+
+        features: List[Tuple[float, float]] = [
+            (0.3, 1 - stats.tagged / stats.count),
+            (0.2, duration_score),
+            (0.1, min(1.0, stats.text_length / stats.count / self.min_text_length)),
+            (0.2, min(1.0, 3 * stats.count / total_count) if total_count else 0.0),
+            (0.2, 1 - stats.positioned / stats.count),
+        ]
+        return sum(weight * value for weight, value in features)
+
+    def classify(self, styles: List[StyleStats]) -> StyleClassification:
+        """
+            Classifies the styles of a file.
+
+            Args:
+                - styles (List[StyleStats]): The statistics of all styles used by the events.
+
+            Returns:
+                - StyleClassification: The proposed split and whether it is confident.
+        """
+        total_count: int = sum(stats.count for stats in styles)
+        result: StyleClassification = StyleClassification()
+        for stats in styles:
+            score: float = self.score(stats, total_count)
+            result.scores[stats.name] = score
+            (result.dialogue if score >= 0.5 else result.signs).append(stats.name)
+        result.confident = bool(result.dialogue) and all(
+            abs(score - 0.5) * 2 >= self.threshold for score in result.scores.values())
+        return result
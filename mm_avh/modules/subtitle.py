@@ -26,18 +26,32 @@
     * Example usage for updating subtitles in an existing ASS file using translated subtitles from an SRT file:
         subtitle_tool = SubtitleRefactor("sample_subtitle.srt")
         subtitle_tool.srt_to_ass()
+
+    * Example usage for streaming a large SRT file cue by cue (the whole file is never held in memory):
+        with SrtWriter("output.srt") as writer:
+            for cue in iter_srt("input.srt"):
+                cue.text = cue.text.upper()
+                writer.write(cue)
+
+    * Example usage for holding a whole track in memory (columnar, converted to pysrt/pysubs2 only when needed):
+        track = SubtitleTrack.from_srt("input.srt")
+        print(format_srt_time(track.starts[0]), track.texts[0])
+        track.write_srt("output.srt")
 """
 
 import re
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from contextlib import suppress
-from dataclasses import dataclass
-from os import makedirs, path, remove, stat
+from dataclasses import dataclass, field
+from os import getpid, listdir, makedirs, path, remove, replace, stat
 from shutil import move
-from typing import List, Tuple
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
 from nltk.tokenize import sent_tokenize
-from pyasstosrt import Subtitle
-from pysubs2 import load, SSAEvent, SSAFile
+import pysrt
+from pysubs2 import SSAEvent, SSAFile
 
 from constants import (WORKING_SPACE,
                        WORKING_SPACE_OUTPUT,
@@ -46,8 +60,863 @@ from constants import (WORKING_SPACE,
                        WORKING_SPACE_TEMP_ALT_SUBS,
                        console)
 
+from modules.speech_timing import SpeechTimingEstimator
+from modules.style_classifier import StyleClassification, StyleClassifier, StyleStats
 from utils.number_in_words import NumberInWords
 
+FPS_NTSC_FILM: float = 24000 / 1001
+ASS_EVENT_FORMAT: str = 'Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text'
+SRT_TIMING_PATTERN: re.Pattern = re.compile(
+    r'(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})\s*-->\s*(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})')
+
+
+@dataclass(slots=True)
+class SrtCue:
+    """
+        A single SRT cue with integer millisecond times. Thanks to the slots it takes a fraction of the memory
+        of a pysrt or pysubs2 object, so tens of thousands of cues can be processed cheaply.
+
+        Attributes:
+            - index (int): The number of the cue in the file (1-based).
+            - start (int): The start time in milliseconds.
+            - end (int): The end time in milliseconds.
+            - text (str): The text of the cue, lines separated by '\\n'.
+    """
+    index: int
+    start: int
+    end: int
+    text: str
+
+
+def format_srt_time(milliseconds: int, separator: str = ',') -> str:
+    """
+        Formats a time in milliseconds as an SRT timestamp, with integer arithmetic only (no datetime or strftime).
+
+        Args:
+            - milliseconds (int): The time in milliseconds.
+            - separator (str): The separator of the milliseconds, ',' for SRT or '.' for the console. Defaults to ','.
+
+        Returns:
+            - str: The timestamp, e.g. '01:02:03,456'.
+    """
+    seconds, milliseconds = divmod(max(0, milliseconds), 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f'{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{milliseconds:03d}'
+
+
+def _parse_srt_timing(match: re.Match) -> Tuple[int, int]:
+    """
+        Converts a matched SRT timing line to the start and end time in milliseconds.
+
+        Args:
+            - match (re.Match): The match of SRT_TIMING_PATTERN.
+
+        Returns:
+            - Tuple[int, int]: The start and end time in milliseconds.
+    """
+    values: Tuple[str, ...] = match.groups()
+    start: int = ((int(values[0]) * 60 + int(values[1])) * 60 + int(values[2])) * 1000 \
+        + int(values[3].ljust(3, '0'))
+    end: int = ((int(values[4]) * 60 + int(values[5])) * 60 + int(values[6])) * 1000 \
+        + int(values[7].ljust(3, '0'))
+    return start, end
+
+
+def iter_srt(file_path: str, encoding: str = 'utf-8-sig') -> Iterator[SrtCue]:
+    """
+        Reads an SRT file line by line and yields its cues one at a time.
+        Blocks without a valid timing line are skipped; a missing cue number or blank line is tolerated.
+
+        Args:
+            - file_path (str): The path to the SRT file.
+            - encoding (str): The encoding of the file. Defaults to UTF-8 with an optional BOM.
+
+        Yields:
+            - SrtCue: The cues in the order of the file.
+    """
+    index: int = 0
+    timing: Optional[Tuple[int, int]] = None
+    lines: List[str] = []
+    with open(file_path, 'r', encoding=encoding, errors='replace') as file:
+        for line in file:
+            line = line.rstrip('\r\n')
+            match: Optional[re.Match] = SRT_TIMING_PATTERN.match(line.strip())
+            if match:
+                if timing is not None:
+                    # A cue without the blank line after it; its last line is the number of the next cue.
+                    if lines and lines[-1].strip().isdigit():
+                        lines.pop()
+                    index += 1
+                    yield SrtCue(index, *timing, '\n'.join(lines))
+                timing = _parse_srt_timing(match)
+                lines = []
+            elif not line.strip():
+                if timing is not None:
+                    index += 1
+                    yield SrtCue(index, *timing, '\n'.join(lines))
+                timing = None
+                lines = []
+            elif timing is not None:
+                lines.append(line)
+    if timing is not None:
+        index += 1
+        yield SrtCue(index, *timing, '\n'.join(lines))
+
+
+@dataclass(slots=True)
+class SrtWriter:
+    """
+        Writes SRT cues to a file incrementally, numbering them from 1.
+        The cues are written to a temporary file which replaces the target only when the writer is closed
+        without an error, so a file can be read with 'iter_srt' and rewritten in place.
+
+        Attributes:
+            - file_path (str): The path to the SRT file to write.
+            - encoding (str): The encoding of the file. Defaults to 'utf-8'.
+            - file (Optional[IO[str]]): The open temporary file.
+            - count (int): The number of written cues.
+
+        Methods:
+            - write(self, cue: SrtCue) -> None: Writes a cue.
+            - write_cue(self, start: int, end: int, text: str) -> None: Writes a cue given by its times and text.
+    """
+    file_path: str
+    encoding: str = 'utf-8'
+    file: Optional[IO[str]] = field(default=None, repr=False)
+    count: int = 0
+
+    @property
+    def temp_path(self) -> str:
+        """
+            Returns the path to the temporary file.
+        """
+        return f'{self.file_path}.{getpid()}.tmp'
+
+    def __enter__(self) -> 'SrtWriter':
+        self.file = open(self.temp_path, 'w', encoding=self.encoding)
+        self.count = 0
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.file.close()
+        if exc_type is None:
+            replace(self.temp_path, self.file_path)
+        else:
+            with suppress(FileNotFoundError):
+                remove(self.temp_path)
+
+    def write(self, cue: SrtCue) -> None:
+        """
+            Writes a cue. The number of the cue is taken from the writer, not from the cue.
+
+            Args:
+                - cue (SrtCue): The cue to write.
+        """
+        self.write_cue(cue.start, cue.end, cue.text)
+
+    def write_cue(self, start: int, end: int, text: str) -> None:
+        """
+            Writes a cue given by its times and text.
+
+            Args:
+                - start (int): The start time in milliseconds.
+                - end (int): The end time in milliseconds.
+                - text (str): The text of the cue.
+        """
+        self.count += 1
+        self.file.write(
+            f'{self.count}\n{format_srt_time(start)} --> {format_srt_time(end)}\n{text}\n\n')
+
+
+@dataclass(slots=True)
+class SubtitleTrack:
+    """
+        A subtitle track stored by columns: the start and end times and the style IDs are int32 arrays
+        and the texts are a list of strings. A cue costs a few bytes plus its text,
+        instead of a pysrt or pysubs2 object with separate time objects,
+        and operations on the times work on whole arrays. Convert to pysrt or pysubs2 only at the edges.
+
+        Attributes:
+            - starts (array): The start times in milliseconds.
+            - ends (array): The end times in milliseconds.
+            - style_ids (array): The index of the style of every cue in 'styles'.
+            - texts (List[str]): The texts of the cues, lines separated by '\\n'.
+            - styles (List[str]): The names of the styles used by the cues.
+            - style_indexes (Dict[str, int]): The index of every style in 'styles', so a cue finds its style ID at once.
+            - path (Optional[str]): The file the track was read from.
+
+        Methods:
+            - append(self, start: int, end: int, text: str, style: str = 'Default') -> None: Adds a cue.
+            - cue(self, i: int) -> SrtCue: Returns a cue as a record.
+            - style(self, i: int) -> str: Returns the style name of a cue.
+            - from_srt(cls, file_path: str, encoding: str = 'utf-8-sig') -> 'SubtitleTrack': Reads an SRT file.
+            - write_srt(self, file_path: str) -> None: Writes the track as an SRT file.
+            - from_pysrt(cls, subs: pysrt.SubRipFile) -> 'SubtitleTrack': Converts pysrt subtitles.
+            - to_pysrt(self) -> pysrt.SubRipFile: Converts the track to pysrt subtitles.
+            - from_ssa(cls, subs: SSAFile) -> 'SubtitleTrack': Converts the dialogue events of pysubs2 subtitles.
+            - to_ssa(self) -> SSAFile: Converts the track to pysubs2 subtitles.
+            - shift(self, offset: int) -> None: Shifts all cues by a constant offset.
+            - scale(self, factor: float) -> None: Multiplies all times by a factor.
+            - scale_fps(self, source_fps: float, target_fps: float) -> None: Fixes the framerate drift, e.g. 23.976 -> 25 fps.
+            - snap_to_keyframes(self, keyframes: Sequence[int], tolerance: int = 100) -> int: Moves the times to near keyframes.
+            - merge_close(self, max_gap: int) -> int: Merges cues closer to each other than a gap.
+            - timing_stats(self) -> TimingStats: Returns statistics of the gaps and overlaps.
+    """
+    starts: array = field(default_factory=lambda: array('i'))
+    ends: array = field(default_factory=lambda: array('i'))
+    style_ids: array = field(default_factory=lambda: array('i'))
+    texts: List[str] = field(default_factory=list)
+    styles: List[str] = field(default_factory=list)
+    style_indexes: Dict[str, int] = field(default_factory=dict)
+    path: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __iter__(self) -> Iterator[SrtCue]:
+        for i in range(len(self.texts)):
+            yield self.cue(i)
+
+    def append(self, start: int, end: int, text: str, style: str = 'Default') -> None:
+        """
+            Adds a cue at the end of the track.
+
+            Args:
+                - start (int): The start time in milliseconds.
+                - end (int): The end time in milliseconds.
+                - text (str): The text of the cue.
+                - style (str): The name of the style. Defaults to 'Default'.
+        """
+        style_id: Optional[int] = self.style_indexes.get(style)
+        if style_id is None:
+            style_id = self.style_indexes[style] = len(self.styles)
+            self.styles.append(style)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.style_ids.append(style_id)
+        self.texts.append(text)
+
+    def cue(self, i: int) -> SrtCue:
+        """
+            Returns a cue of the track as a record (a copy; changing it does not change the track).
+
+            Args:
+                - i (int): The position of the cue (0-based).
+
+            Returns:
+                - SrtCue: The cue, numbered from 1.
+        """
+        return SrtCue(i + 1, self.starts[i], self.ends[i], self.texts[i])
+
+    def style(self, i: int) -> str:
+        """
+            Returns the name of the style of a cue.
+
+            Args:
+                - i (int): The position of the cue (0-based).
+
+            Returns:
+                - str: The name of the style.
+        """
+        return self.styles[self.style_ids[i]]
+
+    @classmethod
+    def from_srt(cls, file_path: str, encoding: str = 'utf-8-sig') -> 'SubtitleTrack':
+        """
+            Reads an SRT file into a track, streaming it cue by cue.
+
+            Args:
+                - file_path (str): The path to the SRT file.
+                - encoding (str): The encoding of the file. Defaults to UTF-8 with an optional BOM.
+
+            Returns:
+                - SubtitleTrack: The track.
+        """
+        track: SubtitleTrack = cls(path=file_path)
+        for cue in iter_srt(file_path, encoding):
+            track.append(cue.start, cue.end, cue.text)
+        return track
+
+    def write_srt(self, file_path: str) -> None:
+        """
+            Writes the track as an SRT file.
+
+            Args:
+                - file_path (str): The path to the SRT file.
+        """
+        with SrtWriter(file_path) as writer:
+            for start, end, text in zip(self.starts, self.ends, self.texts):
+                writer.write_cue(start, end, text)
+
+    @classmethod
+    def from_pysrt(cls, subs: pysrt.SubRipFile) -> 'SubtitleTrack':
+        """
+            Converts pysrt subtitles to a track.
+
+            Args:
+                - subs (pysrt.SubRipFile): The subtitles.
+
+            Returns:
+                - SubtitleTrack: The track.
+        """
+        track: SubtitleTrack = cls(path=subs.path)
+        for item in subs:
+            track.append(item.start.ordinal, item.end.ordinal, item.text)
+        return track
+
+    def to_pysrt(self) -> pysrt.SubRipFile:
+        """
+            Converts the track to pysrt subtitles.
+
+            Returns:
+                - pysrt.SubRipFile: The subtitles.
+        """
+        return pysrt.SubRipFile(items=[
+            pysrt.SubRipItem(index=i, start=pysrt.SubRipTime.from_ordinal(start),
+                             end=pysrt.SubRipTime.from_ordinal(end), text=text)
+            for i, (start, end, text) in enumerate(zip(self.starts, self.ends, self.texts), start=1)
+        ], path=self.path)
+
+    @classmethod
+    def from_ssa(cls, subs: SSAFile) -> 'SubtitleTrack':
+        """
+            Converts the dialogue events of pysubs2 subtitles to a track; comments are skipped.
+            The texts keep the ASS tags and line breaks ('\\N').
+
+            Args:
+                - subs (SSAFile): The subtitles.
+
+            Returns:
+                - SubtitleTrack: The track.
+        """
+        track: SubtitleTrack = cls()
+        for event in subs:
+            if not event.is_comment:
+                track.append(event.start, event.end, event.text, event.style)
+        return track
+
+    def to_ssa(self) -> SSAFile:
+        """
+            Converts the track to pysubs2 subtitles, without the styles and the metadata of the original file.
+
+            Returns:
+                - SSAFile: The subtitles.
+        """
+        subs: SSAFile = SSAFile()
+        for i, text in enumerate(self.texts):
+            subs.append(SSAEvent(start=self.starts[i], end=self.ends[i],
+                                 text=text, style=self.style(i)))
+        return subs
+
+    def shift(self, offset: int) -> None:
+        """
+            Shifts all cues by a constant offset. Times are clamped at 0.
+
+            Args:
+                - offset (int): The offset in milliseconds, negative to move the cues earlier.
+        """
+        self.starts = array('i', [max(0, start + offset) for start in self.starts])
+        self.ends = array('i', [max(0, end + offset) for end in self.ends])
+
+    def scale(self, factor: float) -> None:
+        """
+            Multiplies all times by a factor.
+
+            Args:
+                - factor (float): The factor, e.g. 1.001 or the ratio of two framerates.
+        """
+        self.starts = array('i', [round(start * factor) for start in self.starts])
+        self.ends = array('i', [round(end * factor) for end in self.ends])
+
+    def scale_fps(self, source_fps: float, target_fps: float) -> None:
+        """
+            Fixes the drift of subtitles timed for another framerate of the same frames,
+            e.g. subtitles for a 23.976 fps release used with a 25 fps (PAL speed-up) release.
+
+            Args:
+                - source_fps (float): The framerate the subtitles were timed for, e.g. FPS_NTSC_FILM.
+                - target_fps (float): The framerate of the video, e.g. 25.
+        """
+        self.scale(source_fps / target_fps)
+
+    def snap_to_keyframes(self, keyframes: Sequence[int], tolerance: int = 100) -> int:
+        """
+            Moves the start and end times which are close to a keyframe onto the keyframe,
+            so the subtitles appear and disappear together with the scene changes.
+            A cue whose end would not be after its start keeps its end time.
+
+            Args:
+                - keyframes (Sequence[int]): The times of the keyframes in milliseconds.
+                - tolerance (int): The maximum distance in milliseconds to move a time. Defaults to 100.
+
+            Returns:
+                - int: The number of moved times.
+        """
+        points: List[int] = sorted(keyframes)
+        if not points:
+            return 0
+
+        def snap(time: int) -> int:
+            position: int = bisect_left(points, time)
+            nearest: int = min(points[max(0, position - 1):position + 1], key=lambda point: abs(point - time))
+            return nearest if abs(nearest - time) <= tolerance else time
+
+        starts: array = array('i', [snap(start) for start in self.starts])
+        ends: array = array('i', [snapped if snapped > start else end
+                                  for start, end, snapped in zip(starts, self.ends, map(snap, self.ends))])
+        moved: int = sum(a != b for a, b in zip(starts, self.starts)) + sum(a != b for a, b in zip(ends, self.ends))
+        self.starts, self.ends = starts, ends
+        return moved
+
+    def merge_close(self, max_gap: int) -> int:
+        """
+            Merges consecutive cues of the same style which are closer to each other than a gap (or overlap).
+            The merged cue spans both cues and has both texts, one per line.
+
+            Args:
+                - max_gap (int): The gap in milliseconds below which cues are merged.
+
+            Returns:
+                - int: The number of removed cues.
+        """
+        if not self.texts:
+            return 0
+        keep: List[int] = [0]
+        starts: array = array('i', self.starts[:1])
+        ends: array = array('i', self.ends[:1])
+        texts: List[str] = self.texts[:1]
+        for i in range(1, len(self.texts)):
+            if self.style_ids[i] == self.style_ids[keep[-1]] and self.starts[i] - ends[-1] < max_gap:
+                ends[-1] = max(ends[-1], self.ends[i])
+                texts[-1] = f'{texts[-1]}\n{self.texts[i]}'
+            else:
+                keep.append(i)
+                starts.append(self.starts[i])
+                ends.append(self.ends[i])
+                texts.append(self.texts[i])
+        removed: int = len(self.texts) - len(texts)
+        self.style_ids = array('i', [self.style_ids[i] for i in keep])
+        self.starts, self.ends, self.texts = starts, ends, texts
+        return removed
+
+    def timing_stats(self) -> 'TimingStats':
+        """
+            Returns statistics of the durations, gaps and overlaps of consecutive cues (in the order of the track).
+
+            Returns:
+                - TimingStats: The statistics.
+        """
+        gaps: List[int] = [start - end for start, end in zip(self.starts[1:], self.ends)]
+        positive: List[int] = [gap for gap in gaps if gap > 0]
+        overlaps: List[Tuple[int, int]] = [(i, -gap) for i, gap in enumerate(gaps) if gap < 0]
+        return TimingStats(count=len(self.texts),
+                           duration=sum(end - start for start, end in zip(self.starts, self.ends)),
+                           gap_count=len(positive),
+                           min_gap=min(positive, default=0),
+                           mean_gap=sum(positive) / len(positive) if positive else 0.0,
+                           overlap_count=len(overlaps),
+                           overlap_total=sum(overlap for _, overlap in overlaps),
+                           overlaps=overlaps)
+
+
+@dataclass(slots=True)
+class TimingStats:
+    """
+        Statistics of the timing of a subtitle track. The overlaps show where TTS audio would not fit into its slot.
+
+        Attributes:
+            - count (int): The number of cues.
+            - duration (int): The total duration of the cues in milliseconds.
+            - gap_count (int): The number of gaps between consecutive cues.
+            - min_gap (int): The shortest gap in milliseconds.
+            - mean_gap (float): The mean gap in milliseconds.
+            - overlap_count (int): The number of cues overlapping the next cue.
+            - overlap_total (int): The total overlap in milliseconds.
+            - overlaps (List[Tuple[int, int]]): The overlapping cues as (position of the first cue, overlap in milliseconds).
+    """
+    count: int
+    duration: int
+    gap_count: int
+    min_gap: int
+    mean_gap: float
+    overlap_count: int
+    overlap_total: int
+    overlaps: List[Tuple[int, int]]
+
+
+def read_keyframes(file_path: str, fps: float) -> List[int]:
+    """
+        Reads a keyframe file (one frame number per line, as exported by Aegisub or ffprobe scripts;
+        lines which are not numbers, like '# keyframe format v1' or 'fps 0', are skipped).
+
+        Args:
+            - file_path (str): The path to the keyframe file.
+            - fps (float): The framerate of the video.
+
+        Returns:
+            - List[int]: The times of the keyframes in milliseconds.
+    """
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return [round(int(line) * 1000 / fps) for line in file if line.strip().isdigit()]
+
+
+ASS_OVERRIDE_PATTERN: re.Pattern = re.compile(r'\{[^}]*\}')
+ASS_DRAWING_PATTERN: re.Pattern = re.compile(r'\{[^}]*\\p[1-9]')
+ASS_WRAP_STYLE_2_PATTERN: re.Pattern = re.compile(r'\{[^}]*\\q2')
+SRT_SANITIZE_PATTERN: re.Pattern = re.compile(r'<[^>]*>|\{\\[^}]*\}|\ufeff')
+STYLE_REGEX_PREFIX: str = 're:'
+AUTO_STYLES: str = 'auto'
+
+
+@dataclass(slots=True)
+class StyleSelector:
+    """
+        Decides which ASS styles go to the main subtitles. A selection is a list of style names;
+        entries starting with 're:' are regular expressions searched in the style name (case-insensitive),
+        e.g. 're:^(Default|Main)' or 're:italic'. Results are cached, so every style is checked once.
+
+        Attributes:
+            - names (Set[str]): The selected style names.
+            - patterns (List[re.Pattern]): The compiled regular expressions.
+            - cache (Dict[str, bool]): The results of the checked styles.
+
+        Methods:
+            - from_list(cls, selected_styles: Iterable[str]) -> 'StyleSelector': Creates a selector from a selection.
+            - matches(self, style: str) -> bool: Checks if a style is selected.
+    """
+    names: Set[str] = field(default_factory=set)
+    patterns: List[re.Pattern] = field(default_factory=list)
+    cache: Dict[str, bool] = field(default_factory=dict)
+
+    @classmethod
+    def from_list(cls, selected_styles: Iterable[str]) -> 'StyleSelector':
+        """
+            Creates a selector from a list of style names and 're:' rules.
+
+            Args:
+                - selected_styles (Iterable[str]): The selection.
+
+            Returns:
+                - StyleSelector: The selector.
+        """
+        selector: StyleSelector = cls()
+        for entry in selected_styles:
+            if entry.startswith(STYLE_REGEX_PREFIX):
+                selector.patterns.append(
+                    re.compile(entry[len(STYLE_REGEX_PREFIX):], re.IGNORECASE))
+            else:
+                selector.names.add(entry.strip())
+        return selector
+
+    def matches(self, style: str) -> bool:
+        """
+            Checks if a style is selected.
+
+            Args:
+                - style (str): The name of the style.
+
+            Returns:
+                - bool: True if the style goes to the main subtitles, False otherwise.
+        """
+        result: Optional[bool] = self.cache.get(style)
+        if result is None:
+            result = style in self.names or any(pattern.search(style) for pattern in self.patterns)
+            self.cache[style] = result
+        return result
+
+
+def parse_ass_time(value: str) -> int:
+    """
+        Converts an ASS timestamp to milliseconds.
+
+        Args:
+            - value (str): The timestamp, e.g. '0:01:02.35'.
+
+        Returns:
+            - int: The time in milliseconds.
+    """
+    hours, minutes, seconds = value.strip().split(':')
+    whole, _, fraction = seconds.partition('.')
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(whole)) * 1000 + int(fraction.ljust(3, '0')[:3])
+
+
+def _get_event_fields(format_line: str) -> List[str]:
+    """
+        Returns the lower-case field names of a 'Format:' line of the events section.
+
+        Args:
+            - format_line (str): The values of the line (after 'Format:').
+
+        Returns:
+            - List[str]: The field names.
+    """
+    return [name.strip().lower() for name in format_line.split(',')]
+
+
+def scan_ass_styles(file_path: str) -> Dict[str, StyleStats]:
+    """
+        Collects the statistics of the events of every style of an ASS file, reading only the lines (no full parsing).
+
+        Args:
+            - file_path (str): The path to the ASS file.
+
+        Returns:
+            - Dict[str, StyleStats]: The statistics of every style used by the events, in the order of its first event.
+    """
+    stats: Dict[str, StyleStats] = {}
+    top_styles: Set[str] = set()
+    style_fields: List[str] = []
+    event_fields: List[str] = _get_event_fields(ASS_EVENT_FORMAT)
+    section: str = ''
+    with open(file_path, 'r', encoding='utf-8-sig') as file:
+        for line in file:
+            if line.startswith('['):
+                section = line.strip().lower()
+                continue
+            kind, _, values = line.partition(':')
+            if section in ('[v4+ styles]', '[v4 styles]'):
+                if kind == 'Format':
+                    style_fields = _get_event_fields(values)
+                elif kind == 'Style' and 'alignment' in style_fields:
+                    style: List[str] = values.split(',', len(style_fields) - 1)
+                    alignment: str = style[style_fields.index('alignment')].strip()
+                    # V4+ uses the numpad layout (7-9 top), V4 the legacy one (5-7 top).
+                    if alignment in (('7', '8', '9') if section == '[v4+ styles]' else ('5', '6', '7')):
+                        top_styles.add(style[0].strip())
+            elif section == '[events]':
+                if kind == 'Format':
+                    event_fields = _get_event_fields(values)
+                elif kind in ('Dialogue', 'Comment'):
+                    event: List[str] = values.rstrip('\r\n').split(',', len(event_fields) - 1)
+                    name: str = event[event_fields.index('style')].strip()
+                    if name not in stats:
+                        stats[name] = StyleStats(name, top_alignment=name in top_styles)
+                    if kind == 'Dialogue':
+                        stats[name].add_event(parse_ass_time(event[event_fields.index('start')]),
+                                              parse_ass_time(event[event_fields.index('end')]),
+                                              event[-1])
+    return stats
+
+
+def split_ass_file(source_path: str, main_path: str, alt_path: str,
+                   selector: StyleSelector) -> Tuple[SubtitleTrack, SubtitleTrack]:
+    """
+        Splits an ASS file into the main and alternative file in one pass over its lines.
+        The script info and other sections are copied to both files, the styles and events go to the file
+        chosen by the selector. Both files are written while reading, so nothing is serialized twice.
+
+        Args:
+            - source_path (str): The path to the ASS file.
+            - main_path (str): The path to the main file (selected styles).
+            - alt_path (str): The path to the alternative file (other styles).
+            - selector (StyleSelector): The style selection.
+
+        Returns:
+            - Tuple[SubtitleTrack, SubtitleTrack]: The dialogue events of the main and alternative file,
+              with the ASS texts, so they can be converted without reading the files again.
+    """
+    main_track: SubtitleTrack = SubtitleTrack(path=main_path)
+    alt_track: SubtitleTrack = SubtitleTrack(path=alt_path)
+    event_fields: List[str] = _get_event_fields(ASS_EVENT_FORMAT)
+    section: str = ''
+    with open(source_path, 'r', encoding='utf-8-sig') as source, \
+            open(main_path, 'w', encoding='utf-8') as main_file, \
+            open(alt_path, 'w', encoding='utf-8') as alt_file:
+        for line in source:
+            line = line.rstrip('\r\n') + '\n'
+            if line.startswith('['):
+                section = line.strip().lower()
+                main_file.write(line)
+                alt_file.write(line)
+                continue
+
+            kind, _, values = line.partition(':')
+            if section in ('[v4+ styles]', '[v4 styles]') and kind == 'Style':
+                name: str = values.split(',', 1)[0].strip()
+                (main_file if selector.matches(name) else alt_file).write(line)
+            elif section == '[events]' and kind in ('Dialogue', 'Comment'):
+                event: List[str] = values.rstrip('\n').split(',', len(event_fields) - 1)
+                style: str = event[event_fields.index('style')].strip()
+                is_main: bool = selector.matches(style)
+                (main_file if is_main else alt_file).write(line)
+                if kind == 'Dialogue':
+                    (main_track if is_main else alt_track).append(
+                        parse_ass_time(event[event_fields.index('start')]),
+                        parse_ass_time(event[event_fields.index('end')]),
+                        event[-1], style)
+            else:
+                if section == '[events]' and kind == 'Format':
+                    event_fields = _get_event_fields(values)
+                main_file.write(line)
+                alt_file.write(line)
+    return main_track, alt_track
+
+
+def read_ass_track(file_path: str) -> SubtitleTrack:
+    """
+        Reads the dialogue events of an ASS file into a track, with the ASS texts.
+
+        Args:
+            - file_path (str): The path to the ASS file.
+
+        Returns:
+            - SubtitleTrack: The dialogue events in the order of the file.
+    """
+    track: SubtitleTrack = SubtitleTrack(path=file_path)
+    event_fields: List[str] = _get_event_fields(ASS_EVENT_FORMAT)
+    in_events: bool = False
+    with open(file_path, 'r', encoding='utf-8-sig') as file:
+        for line in file:
+            if line.startswith('['):
+                in_events = line.strip().lower() == '[events]'
+                continue
+            if not in_events:
+                continue
+            kind, _, values = line.partition(':')
+            if kind == 'Format':
+                event_fields = _get_event_fields(values)
+            elif kind == 'Dialogue':
+                event: List[str] = values.rstrip('\r\n').split(',', len(event_fields) - 1)
+                track.append(parse_ass_time(event[event_fields.index('start')]),
+                             parse_ass_time(event[event_fields.index('end')]),
+                             event[-1], event[event_fields.index('style')].strip())
+    return track
+
+
+def is_ass_drawing(text: str) -> bool:
+    """
+        Checks if an ASS event is a drawing (vector commands in drawing mode '\\p1' or higher) rather than text.
+
+        Args:
+            - text (str): The ASS text, e.g. '{\\p1}m 0 0 l 100 0 100 100'.
+
+        Returns:
+            - bool: True if the event is a drawing, False otherwise.
+    """
+    return ASS_DRAWING_PATTERN.search(text) is not None
+
+
+def ass_text_to_srt(text: str) -> str:
+    """
+        Converts an ASS event text to plain SRT text: removes the override tags and converts the line breaks.
+        The soft line break '\\n' is a space, unless the event sets the wrapping style '\\q2' (no automatic wrapping).
+
+        Args:
+            - text (str): The ASS text, e.g. '{\\i1}Hello\\Nworld'.
+
+        Returns:
+            - str: The SRT text, e.g. 'Hello\\nworld'.
+    """
+    soft_break: str = '\n' if ASS_WRAP_STYLE_2_PATTERN.search(text) else ' '
+    return ASS_OVERRIDE_PATTERN.sub('', text).replace('\\N', '\n').replace('\\n', soft_break).replace('\\h', ' ')
+
+
+def write_ass_track_as_srt(track: SubtitleTrack, file_path: str) -> None:
+    """
+        Writes a track with ASS texts as an SRT file. Every event except drawings becomes a cue, so the cues
+        stay aligned with the text events of the ASS file (see 'SubtitleRefactor.srt_to_ass').
+
+        Args:
+            - track (SubtitleTrack): The dialogue events with the ASS texts.
+            - file_path (str): The path to the SRT file.
+    """
+    with SrtWriter(file_path) as writer:
+        for start, end, text in zip(track.starts, track.ends, track.texts):
+            if not is_ass_drawing(text):
+                writer.write_cue(start, end, ass_text_to_srt(text))
+
+
+def convert_ass_file_to_srt(file_path: str) -> str:
+    """
+        Converts an ASS file to an SRT file with the same name next to it.
+        Defined at module level, so it can be sent to a worker process.
+
+        Args:
+            - file_path (str): The path to the ASS file.
+
+        Returns:
+            - str: The path to the SRT file.
+    """
+    srt_file_path: str = path.splitext(file_path)[0] + '.srt'
+    write_ass_track_as_srt(read_ass_track(file_path), srt_file_path)
+    return srt_file_path
+
+
+def convert_ass_files_to_srt(file_paths: List[str], max_workers: Optional[int] = None) -> List[str]:
+    """
+        Converts many ASS files to SRT files in a pool of processes.
+
+        Args:
+            - file_paths (List[str]): The paths to the ASS files.
+            - max_workers (Optional[int]): The number of processes. Defaults to the number of processors.
+
+        Returns:
+            - List[str]: The paths to the SRT files, in the order of the ASS files.
+    """
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(convert_ass_file_to_srt, file_paths, chunksize=4))
+
+
+def sanitize_srt_file(source_path: str, target_path: str) -> bool:
+    """
+        Moves an SRT file, removing HTML tags ('<i>'), ASS override tags ('{\\an8}') and stray BOMs
+        line by line with one compiled pattern. The file is scanned first: a file which needs no cleaning
+        on the same file system is only renamed; otherwise the cleaned file is written next to the target
+        and renamed into place atomically.
+
+        Args:
+            - source_path (str): The path to the SRT file.
+            - target_path (str): The path to move the file to.
+
+        Returns:
+            - bool: True if anything was removed, False if the file was already clean.
+    """
+    with open(source_path, 'r', encoding='utf-8') as source:
+        changed: bool = any(SRT_SANITIZE_PATTERN.search(line) for line in source)
+    if not changed and stat(source_path).st_dev == stat(path.dirname(path.abspath(target_path))).st_dev:
+        replace(source_path, target_path)
+        return False
+
+    temp_path: str = f'{target_path}.{getpid()}.tmp'
+    try:
+        with open(source_path, 'r', encoding='utf-8') as source, \
+                open(temp_path, 'w', encoding='utf-8') as target:
+            for line in source:
+                target.write(SRT_SANITIZE_PATTERN.sub('', line))
+        replace(temp_path, target_path)
+        remove(source_path)
+    finally:
+        with suppress(FileNotFoundError):
+            remove(temp_path)
+    return changed
+
+
+def sanitize_srt_directory(directory: str, target_directory: str,
+                           filenames: Optional[Sequence[str]] = None, max_workers: int = 8) -> int:
+    """
+        Moves the SRT files of a directory to another directory, cleaning them in a pool of threads
+        (the work is mostly file I/O, which releases the GIL).
+
+        Args:
+            - directory (str): The directory with the SRT files.
+            - target_directory (str): The directory to move the files to.
+            - filenames (Optional[Sequence[str]]): The files to move, e.g. the files of one episode.
+              Defaults to None (all SRT files of the directory).
+            - max_workers (int): The number of threads. Defaults to 8.
+
+        Returns:
+            - int: The number of files which needed cleaning.
+    """
+    makedirs(target_directory, exist_ok=True)
+    if filenames is None:
+        filenames = [filename for filename in listdir(directory) if filename.lower().endswith('.srt')]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return sum(executor.map(
+            lambda filename: sanitize_srt_file(path.join(directory, filename),
+                                               path.join(target_directory, filename)),
+            filenames))
+
 
 @dataclass(slots=True)
 class SubtitleRefactor:
@@ -61,14 +930,16 @@ class SubtitleRefactor:
             - working_space_temp (str, optional): The directory where temporary files will be saved during processing.
             - working_space_temp_main_subs (str, optional): The directory for main subtitles during processing.
             - working_space_temp_alt_subs (str, optional): The directory for alternate subtitles during processing.
+            - split_tracks (Dict[str, SubtitleTrack]): The dialogue events written by 'split_ass', keyed by the folder.
 
         Methods:
-            - split_ass(self) -> None: Splits an ASS subtitle file into two files based on selected styles.
+            - split_ass(self, selected_styles: Optional[List[str]] = None) -> None: Splits an ASS subtitle file into two files based on selected styles (names or 're:' regular expressions).
             - ass_to_srt(self) -> None: Converts ASS subtitle files to SRT format.
             - move_srt(self) -> None: Moves an SRT subtitle file to a specified directory.
-            - txt_to_srt(self, lines_per_caption: int) -> None: Converts a text file to SRT (SubRip Text) format.
+            - txt_to_srt(self, lines_per_caption: int, tts: Optional[str], tts_speed: Optional[str]) -> None: Converts a text file to SRT (SubRip Text) format.
             - convert_numbers_in_srt(self) -> None: Converts numbers in an SRT subtitle file to their word equivalents in Polish.
             - srt_to_ass(self) -> None: Updates subtitles in an existing ASS file using translated subtitles from an SRT file. If the ASS file does not exist, the SRT file is moved to the output directory, and its extension is changed to .ass. After these operations, the original ASS and SRT files are deleted.
+            - adjust_timing(self, shift: int = 0, ...) -> None: Shifts, rescales, snaps and merges the cues of the split subtitle files.
     """
     filename: str
     working_space: str = WORKING_SPACE
@@ -76,23 +947,37 @@ class SubtitleRefactor:
     working_space_temp: str = WORKING_SPACE_TEMP
     working_space_temp_main_subs = WORKING_SPACE_TEMP_MAIN_SUBS
     working_space_temp_alt_subs = WORKING_SPACE_TEMP_ALT_SUBS
+    split_tracks: Dict[str, SubtitleTrack] = field(default_factory=dict)
 
-    def split_ass(self) -> None:
+    def split_ass(self, selected_styles: Optional[List[str]] = None) -> None:
         """
-            Splits an ASS subtitle file into two files based on selected styles.
+            Splits an ASS subtitle file into two files based on selected styles, in one pass over the file.
+            If no styles are given, they are classified automatically; if the classification is uncertain,
+            the user is prompted to select them.
+
+            Args:
+                - selected_styles (Optional[List[str]]): The styles which go to the main subtitles (headless mode);
+                  entries starting with 're:' are regular expressions (see 'StyleSelector'),
+                  'auto' adds the styles classified as dialogue. Defaults to None.
         """
         self._create_directories()
-        subs: SSAFile = self._load_subs()
-        styles: List[str] = self._get_styles(subs)
+        source_file_path: str = path.join(self.working_space_temp, self.filename)
+        stats: Dict[str, StyleStats] = scan_ass_styles(source_file_path)
+        styles: List[str] = list(stats)
         self._display_styles(styles)
-        selected_styles: List[str] = self._select_styles(styles)
-        if not selected_styles:
+        if selected_styles is None or AUTO_STYLES in selected_styles:
+            classification: StyleClassification = StyleClassifier().classify(list(stats.values()))
+            selected_styles = self._choose_styles(styles, classification, selected_styles)
+        selector: StyleSelector = StyleSelector.from_list(selected_styles)
+        if not any(selector.matches(style) for style in styles):
             self._move_subs_to_main()
             return
-        main_subs, alt_subs = self._split_subs(subs, selected_styles)
-        self._copy_metadata_and_styles(
-            subs, main_subs, alt_subs, selected_styles)
-        self._save_subs(main_subs, alt_subs, subs, selected_styles)
+        main_track, alt_track = split_ass_file(source_file_path,
+                                               path.join(self.working_space_temp_main_subs, self.filename),
+                                               path.join(self.working_space_temp_alt_subs, self.filename),
+                                               selector)
+        self.split_tracks = {self.working_space_temp_main_subs: main_track,
+                             self.working_space_temp_alt_subs: alt_track}
         self._remove_source_file()
         console.print("Podział napisów zakończony pomyślnie.",
                       style='green_bold')
@@ -106,23 +991,6 @@ class SubtitleRefactor:
         if not path.exists(self.working_space_temp_alt_subs):
             makedirs(self.working_space_temp_alt_subs, exist_ok=True)
 
-    def _load_subs(self) -> SSAFile:
-        """
-            Loads the subtitle file.
-        """
-        with open(path.join(self.working_space_temp, self.filename), 'r', encoding='utf-8') as file:
-            return SSAFile.from_file(file)
-
-    def _get_styles(self, subs: SSAFile) -> List[str]:
-        """
-            Returns a list of styles in the subtitle file.
-        """
-        styles: List[str] = []
-        for event in subs:
-            if event.style not in styles:
-                styles.append(event.style)
-        return styles
-
     def _display_styles(self, styles: List[str]) -> None:
         """
             Displays the styles to the user.
@@ -134,6 +1002,38 @@ class SubtitleRefactor:
             console.print(
                 f"[yellow_bold]{i}.[/yellow_bold] {style}", style='white_bold')
 
+    def _choose_styles(self, styles: List[str], classification: StyleClassification,
+                       selected_styles: Optional[List[str]]) -> List[str]:
+        """
+            Shows the automatic classification of the styles and returns the styles for the main subtitles.
+            An uncertain classification falls back to the prompt in the interactive mode;
+            in the headless mode the proposal is used anyway, with a warning.
+
+            Args:
+                - styles (List[str]): The styles of the file.
+                - classification (StyleClassification): The classification of the styles.
+                - selected_styles (Optional[List[str]]): The headless selection containing 'auto', or None if interactive.
+
+            Returns:
+                - List[str]: The selected styles.
+        """
+        console.print("Automatyczna klasyfikacja stylów:", style='yellow_bold')
+        for style in styles:
+            kind: str = 'dialog' if style in classification.dialogue else 'napisy ekranowe'
+            console.print(
+                f"[yellow_bold]{kind}:[/yellow_bold] {style} ({classification.scores[style]:.2f})", style='white_bold')
+
+        if selected_styles is None:
+            if classification.confident:
+                return classification.dialogue
+            console.print("Klasyfikacja niepewna - wybierz style ręcznie.", style='red_bold')
+            return self._select_styles(styles)
+
+        if not classification.confident:
+            console.print(
+                f"Klasyfikacja stylów pliku {self.filename} jest niepewna - użyto propozycji.", style='red_bold')
+        return [style for style in selected_styles if style != AUTO_STYLES] + classification.dialogue
+
     def _select_styles(self, styles: List[str]) -> List[str]:
         """
             Prompts the user to select styles and returns a list of selected styles.
@@ -164,70 +1064,6 @@ class SubtitleRefactor:
             self.working_space_temp_main_subs, self.filename)
         move(alt_file_path, main_file_path)
 
-    def _split_subs(self, subs: SSAFile, selected_styles: List[str]) -> Tuple[SSAFile, SSAFile]:
-        """
-            Splits the subtitle file into two files based on the selected styles.
-        """
-        main_subs: SSAFile = SSAFile()
-        alt_subs: SSAFile = SSAFile()
-
-        for event in subs:
-            if event.style in selected_styles:
-                main_subs.append(event)
-            else:
-                alt_subs.append(event)
-
-        return main_subs, alt_subs
-
-    def _copy_metadata_and_styles(self, subs: SSAFile, main_subs: SSAFile, alt_subs: SSAFile, selected_styles: List[str]) -> None:
-        """
-            Copies metadata and styles to the output files.
-        """
-        main_subs.info = subs.info
-        alt_subs.info = subs.info
-
-        main_style_names: List[str] = [style_name for style_name in subs.styles.keys()
-                                       if style_name in selected_styles]
-        main_subs.styles.clear()
-        for style_name in main_style_names:
-            main_subs.styles[style_name] = subs.styles[style_name]
-
-        alt_style_names: List[str] = [style_name for style_name in subs.styles.keys()
-                                      if style_name not in selected_styles]
-        alt_subs.styles.clear()
-        for style_name in alt_style_names:
-            alt_subs.styles[style_name] = subs.styles[style_name]
-
-    def _save_subs(self, main_subs: SSAFile, alt_subs: SSAFile, subs: SSAFile, selected_styles: List[str]) -> None:
-        """
-            Saves the split subtitle files.
-        """
-        main_output_file: str = path.join(
-            self.working_space_temp_main_subs, self.filename)
-        alt_output_file: str = path.join(
-            self.working_space_temp_alt_subs, self.filename)
-
-        main_subs.info = subs.info
-        alt_subs.info = subs.info
-
-        main_style_names: List[str] = [style_name for style_name in subs.styles.keys()
-                                       if style_name in selected_styles]
-        main_subs.styles.clear()
-        for style_name in main_style_names:
-            main_subs.styles[style_name] = subs.styles[style_name]
-
-        alt_style_names: List[str] = [style_name for style_name in subs.styles.keys()
-                                      if style_name not in selected_styles]
-        alt_subs.styles.clear()
-        for style_name in alt_style_names:
-            alt_subs.styles[style_name] = subs.styles[style_name]
-
-        with open(main_output_file, 'w', encoding='utf-8') as main_file:
-            main_file.write(main_subs.to_string(format_='ass'))
-
-        with open(alt_output_file, 'w', encoding='utf-8') as alt_file:
-            alt_file.write(alt_subs.to_string(format_='ass'))
-
     def _remove_source_file(self) -> None:
         """
             Removes the source subtitle file.
@@ -236,7 +1072,8 @@ class SubtitleRefactor:
 
     def ass_to_srt(self) -> None:
         """
-            Converts ASS subtitle files to SRT format.
+            Converts ASS subtitle files to SRT format, next to the ASS files.
+            The events parsed by 'split_ass' are used directly; other files are read once.
         """
         folders = [self.working_space_temp_main_subs,
                    self.working_space_temp_alt_subs]
@@ -246,13 +1083,13 @@ class SubtitleRefactor:
             if not path.exists(file_path):
                 continue
 
-            sub: Subtitle = Subtitle(file_path)
-            sub.export()
+            track: SubtitleTrack = self.split_tracks.get(folder) or read_ass_track(file_path)
+            write_ass_track_as_srt(track, path.splitext(file_path)[0] + '.srt')
         console.print()
 
     def move_srt(self) -> None:
         """
-            Moves an SRT subtitle file to a specified directory and removes HTML tags.
+            Moves an SRT subtitle file to a specified directory and removes HTML tags, override tags and BOMs.
         """
         target_file_path: str = path.join(
             self.working_space_temp_main_subs, self.filename)
@@ -263,28 +1100,18 @@ class SubtitleRefactor:
         source_file_path: str = path.join(
             self.working_space_temp, self.filename)
 
-        # Otwórz plik źródłowy i przeczytaj jego zawartość
-        with open(source_file_path, 'r', encoding='utf-8') as file:
-            file_content = file.read()
-
-        # Usuń znaczniki HTML
-        file_content = re.sub(r'<.*?>', '', file_content)
-
-        # Zapisz zmodyfikowaną zawartość do pliku docelowego
-        with open(target_file_path, 'w', encoding='utf-8') as file:
-            file.write(file_content)
+        sanitize_srt_file(source_file_path, target_file_path)
 
-        # Usuń plik źródłowy
-        remove(source_file_path)
-
-    def txt_to_srt(self, lines_per_caption: int) -> None:
+    def txt_to_srt(self, lines_per_caption: int, tts: Optional[str] = None, tts_speed: Optional[str] = None) -> None:
         """
         Converts a text file to SRT (SubRip Text) format.
 
-        This method reads a text file, tokenizes the text into sentences using the NLTK library, and writes the sentences into a new SRT file. Groups of sentences are combined into a single caption based on the 'lines_per_caption' parameter. Each group becomes a separate subtitle in the SRT file. The original text file is then deleted, and the filename attribute of the class instance is updated to the new SRT file. Finally, the SRT file is moved to the 'main_subs' directory.
+        This method reads a text file, tokenizes the text into sentences using the NLTK library, and writes the sentences into a new SRT file. Groups of sentences are combined into a single caption based on the 'lines_per_caption' parameter. Each group becomes a separate subtitle in the SRT file, timed one after another by the estimated duration of its speech (see 'SpeechTimingEstimator'). The original text file is then deleted, and the filename attribute of the class instance is updated to the new SRT file. Finally, the SRT file is moved to the 'main_subs' directory.
 
         Args:
             lines_per_caption (int): The number of sentences to include in each caption.
+            tts (Optional[str]): The TTS engine the captions will be read by, used to estimate their duration.
+            tts_speed (Optional[str]): The speed of the TTS engine.
 
         """
         txt_file_path: str = path.join(self.working_space_temp, self.filename)
@@ -295,14 +1122,13 @@ class SubtitleRefactor:
 
         sentences: List[str] = sent_tokenize(text)
 
-        subs: SSAFile = SSAFile()
-        for i in range(0, len(sentences), lines_per_caption):
-            caption = ' '.join(sentences[i:i+lines_per_caption]).strip()
-            event: SSAEvent = SSAEvent(start=0, end=0, text=caption)
-            subs.append(event)
+        captions: Iterator[str] = (' '.join(sentences[i:i+lines_per_caption]).strip()
+                                   for i in range(0, len(sentences), lines_per_caption))
+        estimator: SpeechTimingEstimator = SpeechTimingEstimator.load(tts, tts_speed)
 
-        with open(srt_file_path, 'w', encoding='utf-8') as file:
-            file.write(subs.to_string(format_='srt'))
+        with SrtWriter(srt_file_path) as writer:
+            for start, end, caption in estimator.layout(captions):
+                writer.write_cue(start, end, caption)
 
         remove(txt_file_path)
 
@@ -316,17 +1142,15 @@ class SubtitleRefactor:
         srt_file_path: str = path.join(
             self.working_space_temp_main_subs, self.filename)
 
-        subs = load(srt_file_path, encoding='utf-8')
-
         number_in_words = NumberInWords()
-        for i, sub in enumerate(subs):
-            try:
-                sub.text = number_in_words.convert_numbers_in_text(sub.text)
-            except IndexError:
-                console.print(
-                    f"[red_bold]Wystąpił błąd w napisie {i+1}:[/red_bold] {sub.text}.\n[red_bold]Pomijam ten napis.", style='white_bold')
-
-        subs.save(srt_file_path)
+        with SrtWriter(srt_file_path) as writer:
+            for cue in iter_srt(srt_file_path):
+                try:
+                    cue.text = number_in_words.convert_numbers_in_text(cue.text)
+                except IndexError:
+                    console.print(
+                        f"[red_bold]Wystąpił błąd w napisie {cue.index}:[/red_bold] {cue.text}.\n[red_bold]Pomijam ten napis.", style='white_bold')
+                writer.write(cue)
 
         console.print(
             "\nPrzekonwertowano liczby na słowa:", style='green_bold')
@@ -348,14 +1172,15 @@ class SubtitleRefactor:
         if stat(srt_file_path).st_size == 0:
             return
 
-        srt_subs = load(srt_file_path, encoding='utf-8')
-
         if path.exists(ass_file_path):
             ass_subs = SSAFile.load(ass_file_path)
-            srt_index = 0
+            srt_cues: Iterator[SrtCue] = iter_srt(srt_file_path)
             for event in ass_subs.events:
-                if event.type == "Dialogue" and srt_index < len(srt_subs):
-                    srt_lines = srt_subs[srt_index].text.split('\n')
+                if event.type != "Dialogue" or is_ass_drawing(event.text):
+                    continue
+                cue: Optional[SrtCue] = next(srt_cues, None)
+                if cue is not None:
+                    srt_lines = cue.text.split('\n')
                     ass_lines = event.text.split('}')
                     if len(ass_lines) >= len(srt_lines):
                         for j in range(len(srt_lines)):
@@ -364,7 +1189,7 @@ class SubtitleRefactor:
                                 ass_lines[j] = ass_lines[j][:last_brace_position +
                                                             1] + srt_lines[j]
                         event.text = '}'.join(ass_lines)
-                    srt_index += 1
+            srt_cues.close()
 
             ass_subs.save(output_file_path)
         else:
@@ -378,3 +1203,55 @@ class SubtitleRefactor:
             remove(srt_file_path)
         if path.exists(ass_file_path):
             remove(ass_file_path)
+
+    def adjust_timing(self, shift: int = 0,
+                      source_fps: Optional[float] = None,
+                      target_fps: Optional[float] = None,
+                      keyframes: Optional[Sequence[int]] = None,
+                      keyframe_tolerance: int = 100,
+                      merge_gap: Optional[int] = None) -> None:
+        """
+            Adjusts the timing of the subtitle file in main_subs and alt_subs (SRT or ASS) and prints the gap statistics.
+            The operations are applied in order: framerate scaling, shift, snapping to keyframes, merging.
+            Merging changes the number of cues, so it is applied only to SRT files.
+
+            Args:
+                - shift (int): The offset in milliseconds. Defaults to 0.
+                - source_fps (Optional[float]): The framerate the subtitles were timed for, e.g. FPS_NTSC_FILM.
+                - target_fps (Optional[float]): The framerate of the video, e.g. 25.
+                - keyframes (Optional[Sequence[int]]): The times of the keyframes in milliseconds (see 'read_keyframes').
+                - keyframe_tolerance (int): The maximum distance in milliseconds to move a time onto a keyframe.
+                - merge_gap (Optional[int]): Merge consecutive cues closer than this many milliseconds.
+        """
+        for folder in [self.working_space_temp_main_subs, self.working_space_temp_alt_subs]:
+            file_path: str = path.join(folder, self.filename)
+            if not path.exists(file_path):
+                continue
+
+            is_ass: bool = self.filename.lower().endswith('.ass')
+            subs: Optional[SSAFile] = SSAFile.load(file_path) if is_ass else None
+            track: SubtitleTrack = SubtitleTrack.from_ssa(subs) if is_ass else SubtitleTrack.from_srt(file_path)
+
+            if source_fps and target_fps:
+                track.scale_fps(source_fps, target_fps)
+            if shift:
+                track.shift(shift)
+            if keyframes:
+                track.snap_to_keyframes(keyframes, keyframe_tolerance)
+            if merge_gap and not is_ass:
+                track.merge_close(merge_gap)
+
+            if is_ass:
+                events: List[SSAEvent] = [event for event in subs if not event.is_comment]
+                for event, start, end in zip(events, track.starts, track.ends):
+                    event.start, event.end = start, end
+                subs.save(file_path)
+            else:
+                track.write_srt(file_path)
+
+            stats: TimingStats = track.timing_stats()
+            console.print("Dostosowano czasy napisów:", style='green_bold', end=' ')
+            console.print(file_path, style='white_bold')
+            console.print(
+                f"Napisów: {stats.count}, przerw: {stats.gap_count}, nakładających się: {stats.overlap_count} "
+                f"({stats.overlap_total} ms)", style='yellow_italic')
@@ -26,18 +26,16 @@
                 audio_generator.srt_to_eac3_elevenlabs() # For Alt Subs
 """
 
-from dataclasses import dataclass
-from msvcrt import getch
+from dataclasses import dataclass, field
 from os import listdir, path, remove
-from subprocess import call, Popen
-from threading import Thread
+from concurrent.futures import Future
+from subprocess import CalledProcessError, Popen
 from time import sleep
 import wave
 from asyncio import create_task, gather, run
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import pyttsx3
-import pysrt
 from edge_tts import Communicate
 from pydub import AudioSegment
 from pydub.utils import mediainfo
@@ -51,6 +49,10 @@ from constants import (WORKING_SPACE,
                        FFMPEG_PATH,
                        console)
 from data.settings import Settings
+from modules.speech_timing import SpeechTimingEstimator
+from modules.subtitle import SrtCue, SubtitleTrack, format_srt_time
+from utils.ffmpeg_progress import run_ffmpeg
+from utils.process_runner import submit_process
 
 
 @dataclass(slots=True)
@@ -67,6 +69,8 @@ class SubtitleToSpeech:
             - working_space_temp_alt_subs (str): The path to the alternative subtitles directory.
             - balabolka_path (str): The path to the Balabolka executable.
             - ffmpeg_path (str): The path to the FFmpeg executable.
+            - timing_samples (List[Tuple[str, int]]): The texts and the speech durations (ms) of the synthesized subtitles,
+              used to calibrate the speech timing estimate.
 
         Methods:
             - ansi_srt(self) -> None:
@@ -81,7 +85,7 @@ class SubtitleToSpeech:
             - srt_to_wav_edge_online(self, tts: str, tts_speed: str, tts_volume: str) -> None:
                 Converts the subtitle file to a WAV audio file using Edge TTS.
 
-            - merge_tts_audio(self) -> None:
+            - merge_tts_audio(self, only_file_name: Optional[str] = None) -> None:
                 Merges the generated TTS audio files.
 
             - generate_audio(self, settings: Settings) -> None:
@@ -99,6 +103,7 @@ class SubtitleToSpeech:
     working_space_temp_alt_subs: str = WORKING_SPACE_TEMP_ALT_SUBS
     balabolka_path: str = BALABOLKA_PATH
     ffmpeg_path: str = FFMPEG_PATH
+    timing_samples: List[Tuple[str, int]] = field(default_factory=list)
 
     def ansi_srt(self) -> None:
         """
@@ -131,12 +136,12 @@ class SubtitleToSpeech:
         """
         self.ansi_srt()
         engine = self._init_engine(tts_speed, tts_volume)
-        subtitles: pysrt.SubRipFile = pysrt.open(path.join(
+        subtitles: SubtitleTrack = SubtitleTrack.from_srt(path.join(
             self.working_space_temp_main_subs, self.filename), encoding='ANSI')
         output_file: str = path.splitext(path.join(
             self.working_space_temp_main_subs, self.filename))[0] + '.wav'
         self._generate_wav_file(engine, subtitles, output_file)
-        remove(path.join(self.working_space_temp, "temp.wav"))
+        remove(self._get_temp_wav_path())
 
     def _init_engine(self, tts_speed: str, tts_volume: str) -> pyttsx3.Engine:
         """
@@ -158,13 +163,13 @@ class SubtitleToSpeech:
         engine.setProperty('volume', float(tts_volume))
         return engine
 
-    def _generate_wav_file(self, engine: pyttsx3.Engine, subtitles: pysrt.SubRipFile, output_file: str) -> None:
+    def _generate_wav_file(self, engine: pyttsx3.Engine, subtitles: SubtitleTrack, output_file: str) -> None:
         """
             Generates a WAV audio file from the given subtitles using the specified TTS engine.
 
             Args:
                 - engine (pyttsx3.Engine): The TTS engine to use for speech synthesis.
-                - subtitles (pysrt.SubRipFile): The subtitles to convert to speech.
+                - subtitles (SubtitleTrack): The subtitles to convert to speech.
                 - output_file (str): The path to the output WAV file.
         """
         with wave.open(output_file, 'wb') as wav_file:
@@ -172,13 +177,14 @@ class SubtitleToSpeech:
             wav_file.setsampwidth(2)  # 16-bit
             wav_file.setframerate(22500)  # 22kHz
 
-            for i, subtitle in enumerate(subtitles, start=1):
+            for i, (start, end, text) in enumerate(zip(subtitles.starts, subtitles.ends, subtitles.texts), start=1):
                 print(
-                    f"{i}\n{subtitle.start.to_time().strftime('%H:%M:%S.%f')[:-3]} --> {subtitle.end.to_time().strftime('%H:%M:%S.%f')[:-3]}\n{subtitle.text}\n")
-                start_time: float = subtitle.start.ordinal / 1000.0
-                self._save_subtitle_to_wav(engine, subtitle.text)
+                    f"{i}\n{format_srt_time(start, '.')} --> {format_srt_time(end, '.')}\n{text}\n")
+                start_time: float = start / 1000.0
+                self._save_subtitle_to_wav(engine, text)
                 self._add_empty_frame_if_needed(wav_file, start_time)
-                self._add_subtitle_to_wav(wav_file)
+                self.timing_samples.append(
+                    (text, self._add_subtitle_to_wav(wav_file)))
 
     def _save_subtitle_to_wav(self, engine: pyttsx3.Engine, text: str) -> None:
         """
@@ -188,10 +194,19 @@ class SubtitleToSpeech:
             - engine (pyttsx3.Engine): The TTS engine to use for speech synthesis.
             - text (str): The text of the subtitle to convert to speech.
         """
-        engine.save_to_file(text, path.join(
-            self.working_space_temp, "temp.wav"))
+        engine.save_to_file(text, self._get_temp_wav_path())
         engine.runAndWait()
 
+    def _get_temp_wav_path(self) -> str:
+        """
+            Returns the path to the temporary WAV file of a single subtitle.
+            The name is unique per subtitle file, so several files can be processed at the same time.
+
+            Returns:
+                - str: The path to the temporary WAV file.
+        """
+        return path.join(self.working_space_temp, path.splitext(self.filename)[0] + "_temp.wav")
+
     def _add_empty_frame_if_needed(self, wav_file: wave.Wave_write, start_time: float) -> None:
         """
             Adds an empty frame to the WAV file if the start time of the next subtitle is later than the current time in the audio.
@@ -209,16 +224,21 @@ class SubtitleToSpeech:
             empty_frame: bytes = b'\x00' * empty_frame_duration * 2
             wav_file.writeframes(empty_frame)
 
-    def _add_subtitle_to_wav(self, wav_file: wave.Wave_write) -> None:
+    def _add_subtitle_to_wav(self, wav_file: wave.Wave_write) -> int:
         """
             Adds a subtitle to the WAV file.
 
             Args:
                 - wav_file (wave.Wave_write): The WAV file to add the subtitle to.
+
+            Returns:
+                - int: The duration of the speech of the subtitle in milliseconds.
         """
-        with wave.open(path.join(self.working_space_temp, "temp.wav"), 'rb') as temp_file:
-            data: bytes = temp_file.readframes(temp_file.getnframes())
+        with wave.open(self._get_temp_wav_path(), 'rb') as temp_file:
+            nframes: int = temp_file.getnframes()
+            data: bytes = temp_file.readframes(nframes)
             wav_file.writeframes(data)
+            return round(nframes * 1000 / temp_file.getframerate())
 
     def srt_to_wav_balabolka(self, tts_speed: str, tts_volume: str) -> None:
         """
@@ -237,15 +257,16 @@ class SubtitleToSpeech:
         command: List[str] = self._prepare_balabolka_command(
             balcon_path, file_path, output_wav_path, tts_speed, tts_volume)
 
-        command_thread: Thread = Thread(
-            target=call, args=(command,))
-        command_thread.start()
+        process: Future = submit_process(command)
 
-        subtitles: pysrt.SubRipFile = pysrt.open(file_path, encoding='ANSI')
-        for subtitle in subtitles:
+        for subtitle in SubtitleTrack.from_srt(file_path, encoding='ANSI'):
             self.process_subtitle(subtitle)
 
-        command_thread.join()
+        try:
+            process.result()
+        except (OSError, CalledProcessError) as error:
+            console.print(
+                f'Błąd generowania audio przez Balabolkę: {error}', style='red_bold')
 
     def _prepare_balabolka_command(self, balcon_path: str, file_path: str, output_wav_path: str, tts_speed: str, tts_volume: str) -> List[str]:
         """
@@ -271,26 +292,26 @@ class SubtitleToSpeech:
             "-v", tts_volume
         ]
 
-    def process_subtitle(self, subtitle: pysrt.SubRipItem) -> None:
+    def process_subtitle(self, subtitle: SrtCue) -> None:
         """
             Processes a single subtitle.
 
             Args:
-                - subtitle (pysrt.SubRipItem): The subtitle to process.
+                - subtitle (SrtCue): The subtitle to process.
         """
         i: int = subtitle.index
-        start_time: str = subtitle.start.to_time().strftime('%H:%M:%S.%f')[:-3]
-        end_time: str = subtitle.end.to_time().strftime('%H:%M:%S.%f')[:-3]
+        start_time: str = format_srt_time(subtitle.start, '.')
+        end_time: str = format_srt_time(subtitle.end, '.')
         text: str = subtitle.text
         print(f"{i}\n{start_time} --> {end_time}\n{text}\n")
         sleep(0.02)
 
-    async def generate_speech(self, subtitle: pysrt.SubRipItem, voice: str, output_file: str, rate: str, volume: str) -> None:
+    async def generate_speech(self, subtitle: SrtCue, voice: str, output_file: str, rate: str, volume: str) -> None:
         """
             Generates speech from a single subtitle using the specified TTS voice.
 
             Args:
-                - subtitle (pysrt.SubRipItem): The subtitle to convert to speech.
+                - subtitle (SrtCue): The subtitle to convert to speech.
                 - voice (str): The TTS voice to use.
                 - output_file (str): The path to the output audio file.
                 - rate (str): The speed of the TTS voice.
@@ -300,12 +321,12 @@ class SubtitleToSpeech:
             subtitle.text, voice, rate=rate, volume=volume)
         await communicate.save(output_file)
 
-    async def generate_wav_files(self, subtitles: pysrt.SubRipFile, voice: str, rate: str, volume: str) -> List[str]:
+    async def generate_wav_files(self, subtitles: SubtitleTrack, voice: str, rate: str, volume: str) -> List[str]:
         """
             Generates WAV audio files from the given subtitles using the specified TTS voice.
 
             Args:
-                - subtitles (pysrt.SubRipFile): The subtitles to convert to speech.
+                - subtitles (SubtitleTrack): The subtitles to convert to speech.
                 - voice (str): The TTS voice to use.
                 - rate (str): The speed of the TTS voice.
                 - volume (str): The volume of the TTS voice.
@@ -328,13 +349,13 @@ class SubtitleToSpeech:
         await gather(*tasks)
         return mp3_files
 
-    def merge_audio_files(self, mp3_files: List[str], subtitles: pysrt.SubRipFile, dir_path: str) -> None:
+    def merge_audio_files(self, mp3_files: List[str], subtitles: SubtitleTrack, dir_path: str) -> None:
         """
             Merges the given MP3 audio files into a single WAV file.
 
             Args:
                 - mp3_files (List[str]): The paths to the MP3 files to merge.
-                - subtitles (pysrt.SubRipFile): The subtitles corresponding to the audio files.
+                - subtitles (SubtitleTrack): The subtitles corresponding to the audio files.
                 - dir_path (str): The directory where the audio files are located.
         """
         file_name: str = path.splitext(subtitles.path)[0]
@@ -345,13 +366,14 @@ class SubtitleToSpeech:
 
             for i, mp3_file in enumerate(mp3_files, start=1):
                 print(
-                    f"{i}\n{subtitles[i-1].start.to_time().strftime('%H:%M:%S.%f')[:-3]} --> {subtitles[i-1].end.to_time().strftime('%H:%M:%S.%f')[:-3]}\n{subtitles[i-1].text}\n")
+                    f"{i}\n{format_srt_time(subtitles.starts[i-1], '.')} --> {format_srt_time(subtitles.ends[i-1], '.')}\n{subtitles.texts[i-1]}\n")
                 mp3_file_path: str = path.join(dir_path, mp3_file)
                 if path.isfile(mp3_file_path):
-                    start_time: float = subtitles[i-1].start.ordinal / 1000.0
+                    start_time: float = subtitles.starts[i-1] / 1000.0
                     sound: AudioSegment = AudioSegment.from_file(
                         mp3_file_path, format="mp3")
                     remove(mp3_file_path)
+                    self.timing_samples.append((subtitles.texts[i-1], len(sound)))
                     self._add_empty_frame_if_needed(wav_file, start_time)
                     sound_data: bytes = sound.raw_data
                     wav_file.writefqrames(sound_data)
@@ -368,19 +390,25 @@ class SubtitleToSpeech:
         self.ansi_srt()
         voice = "pl-PL-ZofiaNeural" if tts == "TTS - Zofia - Edge" else "pl-PL-MarekNeural"
 
-        subtitles: pysrt.SubRipFile = pysrt.open(path.join(
+        subtitles: SubtitleTrack = SubtitleTrack.from_srt(path.join(
             self.working_space_temp_main_subs, self.filename), encoding='ANSI')
         mp3_files: List[str] = run(self.generate_wav_files(
             subtitles, voice, tts_speed, tts_volume))
         self.merge_audio_files(mp3_files, subtitles,
                                self.working_space_temp_main_subs)
 
-    def merge_tts_audio(self) -> None:
+    def merge_tts_audio(self, only_file_name: Optional[str] = None) -> None:
         """
         Merges the generated TTS audio files.
+
+        Args:
+            - only_file_name (Optional[str]): Merge only the audio of this file name (without extension). Defaults to None (all files).
         """
         main_subs_files_dict: Dict[str, str] = self._get_files_dict(
             self.working_space_temp_main_subs)
+        if only_file_name is not None:
+            main_subs_files_dict = {file_name: main_subs_file for file_name, main_subs_file in main_subs_files_dict.items()
+                                    if file_name == only_file_name}
         tmp_files_dict: Dict[str, str] = self._get_files_dict(
             self.working_space_temp)
 
@@ -407,12 +435,22 @@ class SubtitleToSpeech:
                 else:
                     input_file_1, input_file_2 = tmp_file_path, main_subs_file_path
 
-                self._merge_files(input_file_1, input_file_2, output_file)
+                try:
+                    self._merge_files(input_file_1, input_file_2, output_file)
+                except (OSError, CalledProcessError) as error:
+                    console.print(
+                        f'Błąd łączenia audio {file_name}: {error}', style='red_bold')
+                    continue
 
                 remove(main_subs_file_path)
                 remove(tmp_file_path)
             else:
-                self._convert_to_eac3(main_subs_file_path, output_file)
+                try:
+                    self._convert_to_eac3(main_subs_file_path, output_file)
+                except (OSError, CalledProcessError) as error:
+                    console.print(
+                        f'Błąd konwersji audio {file_name}: {error}', style='red_bold')
+                    continue
                 remove(main_subs_file_path)
             self._remove_same_name_files(
                 self.working_space_temp_main_subs, file_name)
@@ -454,6 +492,7 @@ class SubtitleToSpeech:
         if 'main_subs' in input_file_1:
             command: List[str] = [
                 self.ffmpeg_path,
+                "-y",
                 "-i", input_file_1,
                 "-i", input_file_2,
                 "-filter_complex", "[0:a]volume=7dB[a1];[a1][1:a]amix=inputs=2:duration=first",
@@ -462,12 +501,13 @@ class SubtitleToSpeech:
         else:
             command: List[str] = [
                 self.ffmpeg_path,
+                "-y",
                 "-i", input_file_1,
                 "-i", input_file_2,
                 "-filter_complex", "[1:a]volume=7dB[a1];[0:a][a1]amix=inputs=2:duration=first",
                 output_file
             ]
-        call(command)
+        run_ffmpeg(command, job=path.basename(output_file))
 
     def _convert_to_eac3(self, input_file: str, output_file: str):
         """
@@ -479,11 +519,12 @@ class SubtitleToSpeech:
         """
         command: List[str] = [
             self.ffmpeg_path,
+            "-y",
             "-i", input_file,
             "-c:a", "eac3",
             output_file
         ]
-        call(command)
+        run_ffmpeg(command, job=path.basename(output_file))
 
     def _remove_same_name_files(self, directory: str, file_name: str):
         """
@@ -519,13 +560,35 @@ class SubtitleToSpeech:
             self.srt_to_wav_edge_online(tts, tts_speed, tts_volume)
         console.print(
             "Generowanie pliku audio zakończone.", style='green_bold')
+        self._calibrate_speech_timing(tts, tts_speed)
 
-        self.merge_tts_audio()
+        self.merge_tts_audio(path.splitext(self.filename)[0])
+
+    def _calibrate_speech_timing(self, tts: Optional[str], tts_speed: Optional[str]) -> None:
+        """
+            Calibrates the speech timing estimate of the TTS engine with the durations of the synthesized subtitles.
+            Balabolka synthesizes the whole file at once, so only Harpo and Edge TTS give samples.
+
+            Args:
+                - tts (Optional[str]): The TTS engine.
+                - tts_speed (Optional[str]): The speed of the TTS engine.
+        """
+        if not self.timing_samples:
+            return
+        estimator: SpeechTimingEstimator = SpeechTimingEstimator.load(tts, tts_speed)
+        estimator.calibrate(self.timing_samples)
+        self.timing_samples.clear()
+        try:
+            estimator.save()
+        except OSError as error:
+            console.print(
+                f'Nie można zapisać kalibracji czasu mowy: {error}', style='red_italic')
 
     def srt_to_eac3_elevenlabs(self) -> None:
         """
             Opens the main_subs folder for the user to add audio files generated by ElevenLabs.
         """
+        from msvcrt import getch  # pylint: disable=import-outside-toplevel  # Windows only
         Popen(['explorer', path.realpath(self.working_space_temp_main_subs)])
 
         console.print("\nWygeneruj pliki audio z plików .srt za pomocą 11Labs_TTS_Colab,\na następnie dodaj je do folderu main_subs.",
@@ -0,0 +1,120 @@
+"""
+    This module defines the 'TrackRule' class, a declarative rule selecting the tracks to extract from MKV files.
+    Rules are stored in the settings ('track_rules') and evaluated against the parsed track data
+    (id, type, codec_id, language, language_ietf), so a whole season can be extracted without typing track IDs.
+    Every field of a rule is a glob pattern (case-insensitive); a missing field matches any value.
+
+    * Usage:
+        To use this module, load the rules from the settings and select the tracks of a file.
+
+    * Example usage:
+        rules = TrackRule.from_settings(settings)
+        track_ids = select_tracks(tracks_data, rules)
+
+    * Example rules in 'settings.json':
+        "track_rules": [
+            {"type": "subtitles", "codec_id": "S_TEXT/ASS", "language": "eng", "select": "first"},
+            {"type": "subtitles", "language_ietf": "en-*", "select": "all"}
+        ]
+"""
+
+from dataclasses import dataclass, fields
+from fnmatch import fnmatchcase
+from typing import Any, Dict, List, Optional, Set
+
+from constants import console
+from data.settings import Settings
+
+
+@dataclass(slots=True)
+class TrackRule:
+    """
+        A rule selecting tracks by their type, codec and language.
+
+        Attributes:
+            - type (Optional[str]): The pattern of the track type ('video', 'audio', 'subtitles').
+            - codec_id (Optional[str]): The pattern of the codec ID (e.g. 'S_TEXT/*').
+            - language (Optional[str]): The pattern of the ISO 639-2 language code (e.g. 'eng').
+            - language_ietf (Optional[str]): The pattern of the IETF BCP 47 language tag (e.g. 'en-*').
+            - select (str): 'first' to select only the first matching track, 'all' to select all of them.
+
+        Methods:
+            - from_dict(cls, data: Dict[str, Any]) -> Optional['TrackRule']: Creates a rule from the settings.
+            - from_settings(cls, settings: Settings) -> List['TrackRule']: Creates all rules from the settings.
+            - matches(self, track: dict) -> bool: Checks if a track matches the rule.
+    """
+    type: Optional[str] = None
+    codec_id: Optional[str] = None
+    language: Optional[str] = None
+    language_ietf: Optional[str] = None
+    select: str = 'first'
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> Optional['TrackRule']:
+        """
+            Creates a rule from a dictionary from the settings. Unknown keys and invalid rules are reported and skipped.
+
+            Args:
+                - data (Dict[str, Any]): The rule from the settings.
+
+            Returns:
+                - Optional[TrackRule]: The rule or None if it is invalid.
+        """
+        rule_fields: List[str] = [rule_field.name for rule_field in fields(cls)]
+        unknown: List[str] = [key for key in data if key not in rule_fields]
+        if unknown or data.get('select', 'first') not in ('first', 'all'):
+            console.print(
+                f'Niepoprawna reguła wyboru ścieżek: {data}', style='red_bold')
+            return None
+        return cls(**{key: str(value) for key, value in data.items()})
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> List['TrackRule']:
+        """
+            Creates all rules from the settings.
+
+            Args:
+                - settings (Settings): The settings with the 'track_rules' option.
+
+            Returns:
+                - List[TrackRule]: The valid rules, in the order from the settings.
+        """
+        rules: List[Optional[TrackRule]] = [
+            cls.from_dict(data) for data in settings.track_rules or []]
+        return [rule for rule in rules if rule is not None]
+
+    def matches(self, track: dict) -> bool:
+        """
+            Checks if a track matches the rule.
+
+            Args:
+                - track (dict): The parsed track data (id, type, codec_id, language, language_ietf).
+
+            Returns:
+                - bool: True if all fields of the rule match the track, False otherwise.
+        """
+        return all(
+            pattern is None or fnmatchcase(str(track.get(key, '')).lower(), pattern.lower())
+            for key, pattern in (('type', self.type),
+                                 ('codec_id', self.codec_id),
+                                 ('language', self.language),
+                                 ('language_ietf', self.language_ietf))
+        )
+
+
+def select_tracks(tracks_data: List[dict], rules: List[TrackRule]) -> Set[int]:
+    """
+        Selects the tracks matching any of the rules.
+
+        Args:
+            - tracks_data (List[dict]): The parsed track data of a file, sorted by the track ID.
+            - rules (List[TrackRule]): The rules to evaluate.
+
+        Returns:
+            - Set[int]: The IDs of the selected tracks.
+    """
+    track_ids: Set[int] = set()
+    for rule in rules:
+        matching: List[int] = [track['id'] for track in tracks_data if rule.matches(track)]
+        track_ids.update(matching[:1] if rule.select == 'first' else matching)
+    return track_ids
@@ -0,0 +1,372 @@
+"""
+    Module translation_engine translates subtitles in chunks with several requests in flight at once.
+    A file is split into chunks planned by the 'ChunkPlanner' of the provider, the chunks are sent concurrently
+    (at most N requests per provider and a global budget shared by all files and threads),
+    and the translations are put back together in the original order.
+    With a translation memory, the lines found in the memory are not sent at all
+    and the new translations are written back to the memory.
+    Identical lines (the same normalized text, e.g. song lines repeated in every opening) are translated once
+    and the translation is copied to every cue; a line which is being translated for another file at the same time
+    is not sent again, but waits for that translation.
+    A request which fails with a transient error (a timeout, a lost connection, HTTP 429 or 5xx) is retried
+    with an exponential backoff; a chunk which still fails keeps its original text, so one bad chunk
+    does not fail the whole file, nor the other files waiting for the same lines.
+    The translation services are called with blocking clients, so the requests run in a thread pool
+    driven by a background asyncio event loop.
+
+    * Example usage:
+        def translate_chunk(texts: List[str]) -> List[str]:
+            return [text.upper() for text in texts]
+
+        translated_texts = translate_texts('Google Translate', translate_chunk, texts,
+                                           ChunkPlanner.for_provider('Google Translate'))
+
+    * Example usage with a translation memory:
+        translated_texts = translate_texts('DeepL API', translate_chunk, texts,
+                                           ChunkPlanner.for_provider('DeepL API'), TranslationMemory())
+
+    * Example usage with several files sharing the budget (e.g. from several threads):
+        with ThreadPoolExecutor() as executor:
+            executor.map(lambda texts: translate_texts('DeepL API', translate_chunk, texts, planner), files_texts)
+"""
+
+import asyncio
+from asyncio import AbstractEventLoop
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from os import getpid
+from threading import Lock, Thread
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from constants import console
+from modules.chunk_planner import ChunkPlanner
+from modules.translation_memory import TranslationMemory, normalize_text
+
+PROVIDER_LIMITS: Dict[str, int] = {
+    'Google Translate': 4,
+    'DeepL API': 4,
+}
+DEFAULT_PROVIDER_LIMIT: int = 1
+GLOBAL_LIMIT: int = 8
+REQUEST_RETRIES: int = 3
+RETRY_DELAY: float = 2.0
+
+
+def is_transient_error(error: Exception) -> bool:
+    """
+        Checks if a failed request is worth retrying: errors without an HTTP status (timeouts, lost connections)
+        and the statuses 408, 429 and 5xx are transient; other client errors (e.g. a wrong API key) are not.
+
+        Args:
+            - error (Exception): The error raised by the request.
+
+        Returns:
+            - bool: True if the request should be retried, False otherwise.
+    """
+    status: Optional[int] = getattr(error, 'status_code', None) or getattr(error, 'http_status_code', None) \
+        or getattr(getattr(error, 'response', None), 'status_code', None)
+    return not isinstance(status, int) or status in (408, 429) or status >= 500
+
+
+@dataclass(slots=True)
+class TranslationEngine:
+    """
+        Translates chunks of subtitles concurrently on a background asyncio event loop,
+        with a concurrency limit for each provider and a global limit for all requests.
+
+        Attributes:
+            - provider_limits (Dict[str, int]): The maximum number of requests in flight for each provider.
+            - global_limit (int): The maximum number of requests in flight for all providers and files.
+            - retries (int): How many times a request failing with a transient error is retried.
+            - retry_delay (float): The delay before the first retry in seconds; doubled before every next retry.
+            - loop (Optional[AbstractEventLoop]): The background event loop, started on first use.
+            - executor (Optional[ThreadPoolExecutor]): The threads running the blocking requests.
+            - semaphores (Dict[str, asyncio.Semaphore]): The semaphores limiting each provider.
+            - global_semaphore (Optional[asyncio.Semaphore]): The semaphore limiting all requests.
+            - pending (Dict[str, Dict[str, asyncio.Future]]): The translations in flight of each provider,
+              by the normalized text of the line.
+            - lock (Lock): Guards the start of the event loop.
+            - pid (int): The process which started the loop; a forked worker process starts its own loop.
+
+        Methods:
+            - translate_chunks_async(self, provider, translate_chunk, chunks) -> List[Optional[List[Optional[str]]]]:
+                Translates the chunks concurrently (coroutine, on the engine loop).
+            - translate(self, provider, translate_chunk, texts, planner, memory, scene_ids) -> List[str]:
+                Translates the texts and waits for the result.
+    """
+    provider_limits: Dict[str, int] = field(default_factory=lambda: dict(PROVIDER_LIMITS))
+    global_limit: int = GLOBAL_LIMIT
+    retries: int = REQUEST_RETRIES
+    retry_delay: float = RETRY_DELAY
+    loop: Optional[AbstractEventLoop] = None
+    executor: Optional[ThreadPoolExecutor] = None
+    semaphores: Dict[str, asyncio.Semaphore] = field(default_factory=dict)
+    global_semaphore: Optional[asyncio.Semaphore] = None
+    pending: Dict[str, Dict[str, asyncio.Future]] = field(default_factory=dict)
+    lock: Lock = field(default_factory=Lock)
+    pid: int = 0
+
+    def _get_loop(self) -> AbstractEventLoop:
+        """
+            Returns the background event loop, starting it in a daemon thread on first use.
+
+            Returns:
+                - AbstractEventLoop: The running event loop.
+        """
+        with self.lock:
+            if self.loop is None or self.pid != getpid():
+                self.pid = getpid()
+                self.semaphores = {}
+                self.global_semaphore = None
+                self.pending = {}
+                self.executor = ThreadPoolExecutor(max_workers=self.global_limit,
+                                                   thread_name_prefix='translation_engine')
+                self.loop = asyncio.new_event_loop()
+                Thread(target=self.loop.run_forever, name='translation_engine', daemon=True).start()
+            return self.loop
+
+    def _get_semaphores(self, provider: str) -> List[asyncio.Semaphore]:
+        """
+            Returns the semaphores a request of a provider has to acquire. Called only on the engine loop.
+
+            Args:
+                - provider (str): The name of the provider.
+
+            Returns:
+                - List[asyncio.Semaphore]: The semaphore of the provider and the global semaphore.
+        """
+        if provider not in self.semaphores:
+            self.semaphores[provider] = asyncio.Semaphore(
+                self.provider_limits.get(provider, DEFAULT_PROVIDER_LIMIT))
+        if self.global_semaphore is None:
+            self.global_semaphore = asyncio.Semaphore(self.global_limit)
+        return [self.semaphores[provider], self.global_semaphore]
+
+    async def _translate_chunk(self, provider: str, translate_chunk: Callable[[List[str]], List[Optional[str]]],
+                               chunk: List[str]) -> Optional[List[Optional[str]]]:
+        """
+            Translates a chunk once the provider and the global budget have a free slot.
+            The provider slot is taken first, so a request waiting for its provider does not hold a global slot.
+            A transient error is retried with an exponential backoff, without holding the slots while waiting.
+
+            Args:
+                - provider (str): The name of the provider.
+                - translate_chunk (Callable[[List[str]], List[Optional[str]]]): Translates the texts of a chunk (blocking).
+                - chunk (List[str]): The texts of the chunk.
+
+            Returns:
+                - Optional[List[Optional[str]]]: The translated texts (None for the cues which could not be translated),
+                  or None if the request failed or the number of translations does not match.
+        """
+        provider_semaphore, global_semaphore = self._get_semaphores(provider)
+        for attempt in range(self.retries + 1):
+            try:
+                async with provider_semaphore, global_semaphore:
+                    translated_chunk: List[Optional[str]] = await asyncio.get_running_loop().run_in_executor(
+                        self.executor, translate_chunk, chunk)
+                break
+            except Exception as error:  # pylint: disable=broad-except
+                if attempt == self.retries or not is_transient_error(error):
+                    console.print(
+                        f"Błąd tłumaczenia {len(chunk)} napisów ({provider}): {error} - zostaje oryginalny tekst.", style='red_bold')
+                    return None
+                delay: float = self.retry_delay * 2 ** attempt
+                console.print(
+                    f"Błąd tłumacza {provider}: {error}. Ponawiam za {delay:.0f} s...", style='yellow_bold')
+                await asyncio.sleep(delay)
+        if len(translated_chunk) != len(chunk):
+            console.print(
+                f"Błąd: liczba napisów po tłumaczeniu ({len(translated_chunk)}) nie jest taka sama jak przed tłumaczeniem ({len(chunk)})", style='red_bold')
+            return None
+        failed: int = translated_chunk.count(None)
+        if failed:
+            console.print(
+                f"Nie udało się przetłumaczyć {failed} z {len(chunk)} napisów - zostaje oryginalny tekst.", style='red_bold')
+        return translated_chunk
+
+    async def translate_chunks_async(self, provider: str, translate_chunk: Callable[[List[str]], List[Optional[str]]],
+                                     chunks: List[List[str]]) -> List[Optional[List[Optional[str]]]]:
+        """
+            Translates the chunks concurrently. Must be awaited on the engine loop.
+            A failed chunk does not stop the others (it is None in the result);
+            if the call itself is cancelled (e.g. Ctrl+C), the chunks which have not been sent yet are cancelled.
+
+            Args:
+                - provider (str): The name of the provider.
+                - translate_chunk (Callable[[List[str]], List[Optional[str]]]): Translates the texts of a chunk (blocking).
+                - chunks (List[List[str]]): The chunks.
+
+            Returns:
+                - List[Optional[List[Optional[str]]]]: The translated chunks in the original order (None for a failed chunk).
+        """
+        tasks: List[asyncio.Task] = [asyncio.create_task(self._translate_chunk(provider, translate_chunk, chunk))
+                                     for chunk in chunks]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+    async def _translate_units(self, provider: str, translate_chunk: Callable[[List[str]], List[Optional[str]]],
+                               units: List[str], planner: ChunkPlanner,
+                               scene_ids: Optional[List[int]]) -> Tuple[List[Optional[str]], int]:
+        """
+            Translates unique lines. Must be awaited on the engine loop.
+            The lines already being translated for another file are not sent, their translations are awaited instead.
+
+            Args:
+                - provider (str): The name of the provider.
+                - translate_chunk (Callable[[List[str]], List[Optional[str]]]): Translates the texts of a chunk (blocking).
+                - units (List[str]): The unique lines.
+                - planner (ChunkPlanner): The planner of the chunks.
+                - scene_ids (Optional[List[int]]): The scene of every line, or None.
+
+            Returns:
+                - Tuple[List[Optional[str]], int]: The translation of every line (None if its chunk failed)
+                  and the number of lines sent by this call.
+        """
+        pending: Dict[str, asyncio.Future] = self.pending.setdefault(provider, {})
+        keys: List[str] = [normalize_text(unit) for unit in units]
+        futures: List[asyncio.Future] = []
+        own: List[int] = []
+        for i, key in enumerate(keys):
+            if key not in pending:
+                pending[key] = asyncio.get_running_loop().create_future()
+                own.append(i)
+            futures.append(pending[key])
+
+        chunks: List[List[int]] = [[own[i] for i in chunk] for chunk in planner.plan(
+            [units[i] for i in own], [scene_ids[i] for i in own] if scene_ids is not None else None)]
+        try:
+            translated_chunks: List[Optional[List[Optional[str]]]] = await self.translate_chunks_async(
+                provider, translate_chunk, [[units[i] for i in chunk] for chunk in chunks])
+            for chunk, translated_chunk in zip(chunks, translated_chunks):
+                for i, translated_text in zip(chunk, translated_chunk or [None] * len(chunk)):
+                    futures[i].set_result(translated_text)
+        finally:
+            for i in own:
+                if not futures[i].done():
+                    futures[i].set_result(None)
+                if pending.get(keys[i]) is futures[i]:
+                    del pending[keys[i]]
+        return [await future for future in futures], len(own)
+
+    def translate(self, provider: str, translate_chunk: Callable[[List[str]], List[Optional[str]]],
+                  texts: Sequence[str], planner: ChunkPlanner,
+                  memory: Optional[TranslationMemory] = None,
+                  scene_ids: Optional[Sequence[int]] = None) -> List[str]:
+        """
+            Splits the texts into chunks, translates them concurrently and waits for the result.
+            The texts found in the translation memory are not sent and identical texts are sent once;
+            the chunks are made of the remaining unique texts only.
+            Ctrl+C cancels the chunks which have not been sent yet.
+
+            Args:
+                - provider (str): The name of the provider, which selects the concurrency limit.
+                - translate_chunk (Callable[[List[str]], List[Optional[str]]]): Translates the texts of a chunk (blocking).
+                - texts (Sequence[str]): The texts of the cues.
+                - planner (ChunkPlanner): The planner of the chunks, e.g. 'ChunkPlanner.for_provider(provider)'.
+                - memory (Optional[TranslationMemory]): The translation memory. Defaults to None (no memory).
+                - scene_ids (Optional[Sequence[int]]): The scene of every cue (see 'get_scene_ids'),
+                  so the chunks end at scene changes. Defaults to None.
+
+            Returns:
+                - List[str]: The translated texts in the original order; the texts of failed chunks are not translated.
+        """
+        translated_texts: List[Optional[str]] = memory.lookup(texts, provider) if memory else [None] * len(texts)
+        misses: List[int] = [i for i, text in enumerate(translated_texts) if text is None]
+        if memory and len(misses) < len(texts):
+            console.print(
+                f"Pamięć tłumaczeń: {len(texts) - len(misses)} z {len(texts)} napisów przetłumaczonych wcześniej.", style='green_italic')
+
+        units, unit_indexes = deduplicate_texts([texts[i] for i in misses])
+        unit_scene_ids: Optional[List[int]] = None
+        if scene_ids is not None:
+            unit_scene_ids = [0] * len(units)
+            for i, unit_index in reversed(list(zip(misses, unit_indexes))):
+                unit_scene_ids[unit_index] = scene_ids[i]
+        future: Future = asyncio.run_coroutine_threadsafe(
+            self._translate_units(provider, translate_chunk, units, planner, unit_scene_ids), self._get_loop())
+        try:
+            translated_units, sent = future.result()
+        except KeyboardInterrupt:
+            future.cancel()
+            raise
+        print_dedup_ratio(len(misses), len(units), sent)
+
+        new_translations: Dict[str, str] = {}
+        for i, unit_index in zip(misses, unit_indexes):
+            translated_text: Optional[str] = translated_units[unit_index]
+            translated_texts[i] = texts[i] if translated_text is None else translated_text
+            if translated_text is not None:
+                new_translations[texts[i]] = translated_text
+        if memory and new_translations:
+            memory.store(new_translations.items(), provider)
+        return translated_texts
+
+
+_engine: TranslationEngine = TranslationEngine()
+
+
+def deduplicate_texts(texts: Sequence[str]) -> Tuple[List[str], List[int]]:
+    """
+        Collapses texts with the same normalized form (case and whitespace ignored) to one translation unit.
+
+        Args:
+            - texts (Sequence[str]): The texts of the cues.
+
+        Returns:
+            - Tuple[List[str], List[int]]: The units (the first text of every normalized form)
+              and the index of the unit of every text.
+    """
+    units: List[str] = []
+    unit_indexes: List[int] = []
+    indexes_by_key: Dict[str, int] = {}
+    for text in texts:
+        key: str = normalize_text(text)
+        if key not in indexes_by_key:
+            indexes_by_key[key] = len(units)
+            units.append(text)
+        unit_indexes.append(indexes_by_key[key])
+    return units, unit_indexes
+
+
+def print_dedup_ratio(total: int, unique: int, sent: Optional[int] = None) -> None:
+    """
+        Prints how many cues were removed from the translation by the deduplication.
+
+        Args:
+            - total (int): The number of cues to translate.
+            - unique (int): The number of unique texts.
+            - sent (Optional[int]): The number of texts sent by this file (the others were sent for another file).
+    """
+    if not total:
+        return
+    sent = unique if sent is None else sent
+    message: str = f"Deduplikacja: {total} napisów → {unique} unikalnych ({1 - unique / total:.0%} mniej)"
+    if sent < unique:
+        message += f", {unique - sent} tłumaczonych już dla innego pliku"
+    console.print(message + '.', style='green_italic')
+
+
+def translate_texts(provider: str, translate_chunk: Callable[[List[str]], List[Optional[str]]],
+                    texts: Sequence[str], planner: ChunkPlanner,
+                    memory: Optional[TranslationMemory] = None,
+                    scene_ids: Optional[Sequence[int]] = None) -> List[str]:
+    """
+        Translates the texts with the shared engine, so all files share one concurrency budget.
+        See 'TranslationEngine.translate'.
+
+        Args:
+            - provider (str): The name of the provider.
+            - translate_chunk (Callable[[List[str]], List[Optional[str]]]): Translates the texts of a chunk (blocking).
+            - texts (Sequence[str]): The texts of the cues.
+            - planner (ChunkPlanner): The planner of the chunks.
+            - memory (Optional[TranslationMemory]): The translation memory. Defaults to None (no memory).
+            - scene_ids (Optional[Sequence[int]]): The scene of every cue. Defaults to None.
+
+        Returns:
+            - List[str]: The translated texts in the original order.
+    """
+    return _engine.translate(provider, translate_chunk, texts, planner, memory, scene_ids)
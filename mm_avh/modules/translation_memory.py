@@ -0,0 +1,224 @@
+"""
+    This module defines the 'TranslationMemory' class, a persistent memory of translated subtitle lines.
+    Recurring lines ("What?", "Let's go!", opening and ending songs, recaps) are translated once and then read
+    from the memory in every episode, so only the lines which are not in the memory are sent to the translator.
+    The memory is stored in an SQLite database and keyed by the source text, the languages and the translator.
+    A line is found by its exact text first and then by its normalized text (case and whitespace ignored).
+    The memory can be exported to a JSON lines file and imported on another machine.
+
+    * Usage:
+        To use this module, create an instance of the 'TranslationMemory' class, look up the lines and store the new translations.
+
+    * Example usage:
+        memory = TranslationMemory()
+        translations = memory.lookup(['What?', 'Let\'s go!'], 'DeepL API')
+        memory.store([('What?', 'Co?')], 'DeepL API')
+
+    * Example usage of the export and import:
+        TranslationMemory().export_to_file('translation_memory.jsonl')
+        TranslationMemory().import_from_file('translation_memory.jsonl')
+"""
+
+import sqlite3
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime
+from json import dumps, loads
+from os import makedirs, path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from constants import TRANSLATION_MEMORY_PATH
+
+SOURCE_LANG: str = 'auto'
+TARGET_LANG: str = 'pl'
+LOOKUP_BATCH_SIZE: int = 500
+
+
+def normalize_text(text: str) -> str:
+    """
+        Returns the normalized form of a subtitle line: case-folded, with line breaks and repeated whitespace
+        collapsed to single spaces.
+
+        Args:
+            - text (str): The text of the subtitle line.
+
+        Returns:
+            - str: The normalized text.
+    """
+    return ' '.join(text.casefold().split())
+
+
+@dataclass(slots=True)
+class TranslationMemory:
+    """
+        A persistent memory of translated subtitle lines.
+        The database uses the default rollback journal (not WAL), because WAL does not work on network file systems.
+
+        Attributes:
+            - db_path (str): The path to the SQLite database.
+
+        Methods:
+            - lookup(self, texts, provider, source_lang, target_lang) -> List[Optional[str]]: Returns the known translations.
+            - store(self, pairs, provider, source_lang, target_lang) -> None: Stores new translations.
+            - export_to_file(self, file_path: str) -> int: Exports the memory to a JSON lines file.
+            - import_from_file(self, file_path: str) -> int: Imports a memory exported on another machine.
+            - get_count(self) -> int: Returns the number of translations in the memory.
+    """
+    db_path: str = TRANSLATION_MEMORY_PATH
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+            Opens the database and creates the table of translations if needed.
+
+            Returns:
+                - sqlite3.Connection: The connection to the database.
+        """
+        makedirs(path.dirname(self.db_path) or '.', exist_ok=True)
+        connection: sqlite3.Connection = sqlite3.connect(
+            self.db_path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        connection.execute('''
+            CREATE TABLE IF NOT EXISTS translations (
+                source TEXT NOT NULL,
+                source_key TEXT NOT NULL,
+                source_lang TEXT NOT NULL,
+                target_lang TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                target TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (source, source_lang, target_lang, provider)
+            )''')
+        connection.execute(
+            'CREATE INDEX IF NOT EXISTS translations_key ON translations (source_key, source_lang, target_lang, provider)')
+        return connection
+
+    @staticmethod
+    def _now() -> str:
+        """
+            Returns the current time in the format stored in the database.
+        """
+        return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    def lookup(self, texts: Sequence[str], provider: str,
+               source_lang: str = SOURCE_LANG, target_lang: str = TARGET_LANG) -> List[Optional[str]]:
+        """
+            Returns the known translations of subtitle lines: of the exact text if it is in the memory,
+            otherwise of the same normalized text (the most recent one).
+
+            Args:
+                - texts (Sequence[str]): The source texts.
+                - provider (str): The translator, e.g. 'DeepL API'.
+                - source_lang (str): The source language. Defaults to 'auto'.
+                - target_lang (str): The target language. Defaults to 'pl'.
+
+            Returns:
+                - List[Optional[str]]: The translation of every text, None if it is not in the memory.
+        """
+        keys: List[str] = [normalize_text(text) for text in texts]
+        exact: Dict[str, str] = {}
+        normalized: Dict[str, str] = {}
+        unique_keys: List[str] = list(set(keys))
+        with closing(self._connect()) as connection:
+            for i in range(0, len(unique_keys), LOOKUP_BATCH_SIZE):
+                batch: List[str] = unique_keys[i:i+LOOKUP_BATCH_SIZE]
+                rows: List[sqlite3.Row] = connection.execute(
+                    f"SELECT source, source_key, target FROM translations "
+                    f"WHERE source_lang = ? AND target_lang = ? AND provider = ? "
+                    f"AND source_key IN ({', '.join('?' * len(batch))}) ORDER BY updated_at",
+                    (source_lang, target_lang, provider, *batch)).fetchall()
+                for row in rows:
+                    exact[row['source']] = row['target']
+                    normalized[row['source_key']] = row['target']
+        return [exact.get(text, normalized.get(key)) for text, key in zip(texts, keys)]
+
+    def store(self, pairs: Iterable[Tuple[str, str]], provider: str,
+              source_lang: str = SOURCE_LANG, target_lang: str = TARGET_LANG) -> None:
+        """
+            Stores new translations, replacing older translations of the same text.
+
+            Args:
+                - pairs (Iterable[Tuple[str, str]]): The source texts and their translations.
+                - provider (str): The translator, e.g. 'DeepL API'.
+                - source_lang (str): The source language. Defaults to 'auto'.
+                - target_lang (str): The target language. Defaults to 'pl'.
+        """
+        now: str = self._now()
+        rows: List[Tuple[str, ...]] = [(source, normalize_text(source), source_lang, target_lang, provider, target, now)
+                                       for source, target in pairs if source.strip() and target.strip()]
+        if not rows:
+            return
+        with closing(self._connect()) as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.executemany(
+                'INSERT OR REPLACE INTO translations '
+                '(source, source_key, source_lang, target_lang, provider, target, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+            connection.execute('COMMIT')
+
+    def export_to_file(self, file_path: str) -> int:
+        """
+            Exports the memory to a JSON lines file (one translation per line).
+
+            Args:
+                - file_path (str): The path to the exported file.
+
+            Returns:
+                - int: The number of exported translations.
+        """
+        count: int = 0
+        with closing(self._connect()) as connection, open(file_path, 'w', encoding='utf-8') as file:
+            for row in connection.execute(
+                    'SELECT source, source_lang, target_lang, provider, target, updated_at FROM translations'):
+                file.write(dumps(dict(row), ensure_ascii=False) + '\n')
+                count += 1
+        return count
+
+    def import_from_file(self, file_path: str) -> int:
+        """
+            Imports translations exported on another machine.
+            A translation replaces the one in the memory only if it is newer.
+
+            Args:
+                - file_path (str): The path to the exported file.
+
+            Returns:
+                - int: The number of imported (new or newer) translations.
+
+            Raises:
+                - ValueError: If a line of the file is not a valid translation.
+        """
+        rows: List[Tuple[str, ...]] = []
+        with open(file_path, 'r', encoding='utf-8') as file:
+            for number, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    item: Dict[str, str] = loads(line)
+                    rows.append((item['source'], normalize_text(item['source']), item['source_lang'],
+                                 item['target_lang'], item['provider'], item['target'], item['updated_at']))
+                except (ValueError, KeyError, TypeError, AttributeError) as error:
+                    raise ValueError(f'{file_path}:{number}: {error}') from error
+
+        with closing(self._connect()) as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            before: int = connection.total_changes
+            connection.executemany(
+                'INSERT INTO translations '
+                '(source, source_key, source_lang, target_lang, provider, target, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (source, source_lang, target_lang, provider) DO UPDATE SET '
+                'target = excluded.target, updated_at = excluded.updated_at '
+                'WHERE excluded.updated_at > translations.updated_at', rows)
+            imported: int = connection.total_changes - before
+            connection.execute('COMMIT')
+        return imported
+
+    def get_count(self) -> int:
+        """
+            Returns the number of translations in the memory.
+
+            Returns:
+                - int: The number of translations.
+        """
+        with closing(self._connect()) as connection:
+            return connection.execute('SELECT COUNT(*) FROM translations').fetchone()[0]
@@ -24,14 +24,18 @@
         Settings.change_settings_save_to_file()
         settings = Settings.load_from_file() | (Settings(translator="Google Translate", translated_line_count="100"))
         subtitle_tool.translate_srt("sample_subtitle.srt", "/path/to/directory", settings)
+
+    * Example usage for translating several files at once (Google Translate and DeepL API translate chunks concurrently):
+        subtitle_tool.translate_srt_files([("a.srt", "/path/to/main_subs"), ("a.srt", "/path/to/alt_subs")], settings)
 """
 
-import re
 from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from os import environ, path, remove
 from subprocess import call
 from time import sleep
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import deepl
 import pyautogui
@@ -41,6 +45,13 @@ from googletrans import Translator
 
 from constants import console
 from data.settings import Settings
+from modules.chunk_planner import ChunkPlanner, get_scene_ids
+from modules.cue_protocol import encode_cues, translate_cues
+from modules.translation_engine import GLOBAL_LIMIT, PROVIDER_LIMITS, deduplicate_texts, print_dedup_ratio, translate_texts
+from modules.translation_memory import TranslationMemory
+
+DEEPL_FREE_NOTES: List[str] = ["Przetłumaczono z www.DeepL.com/Translator (wersja darmowa)",
+                               "Translated with www.DeepL.com/Translator (free version)"]
 
 
 @dataclass(slots=True)
@@ -69,6 +80,11 @@ class SubtitleTranslator:
 
             - translate_srt(filename: str, dir_path: str, settings: Settings) -> None:
                 Selects the appropriate translation method based on the settings and translates the subtitles.
+
+            - translate_srt_files(files: List[Tuple[str, str]], settings: Settings) -> None:
+                Translates several subtitle files, at the same time if the translator allows it.
+
+        All translators look up the translation memory first and store the new translations in it.
     """
 
     @staticmethod
@@ -79,7 +95,7 @@ class SubtitleTranslator:
             Args:
                 - filename (str): The name of the subtitle file.
                 - dir_path (str): The directory path of the subtitle file.
-                - translated_line_count (int): The number of lines to translate at a time.
+                - translated_line_count (int): The maximum number of lines to translate at a time (a chunk is also limited by its size, see 'ChunkPlanner').
                 - is_combined_with_gpt (bool, optional): Whether to combine with GPT for translation. Defaults to False.
 
             Returns:
@@ -87,26 +103,11 @@ class SubtitleTranslator:
         """
         subs: pysrt.SubRipFile = pysrt.open(
             path.join(dir_path, filename), encoding='utf-8')
-        subs_combined: List[str] = []
-        translated_subs: List[str] = []
-
-        translator: Translator = Translator()
-        for i, sub in enumerate(subs):
-            sub.text = sub.text.replace("\n", " ◍ ")
-            subs_combined.append(sub.text)
-
-            if (i + 1) % translated_line_count == 0 or i == len(subs) - 1:
-                combined_text: str = "\n".join(subs_combined)
-                translated_text: str = translator.translate(
-                    combined_text, dest='pl').text
-                translated_subs += translated_text.split("\n")
-                subs_combined = []
-
-        for i, sub in enumerate(subs):
-            sub.text = translated_subs[i]
-            sub.text = sub.text.replace(" ◍, ", ",\n")
-            sub.text = sub.text.replace(" ◍ ", "\n")
-            sub.text = sub.text.replace(" ◍", "")
+        translated_texts: List[str] = translate_texts(
+            'Google Translate', SubtitleTranslator._translate_google_chunk, [sub.text for sub in subs],
+            ChunkPlanner.for_provider('Google Translate', translated_line_count), TranslationMemory(), SubtitleTranslator._get_scene_ids(subs))
+        for sub, translated_text in zip(subs, translated_texts):
+            sub.text = translated_text
 
         if is_combined_with_gpt:
             translated_filename: str = filename.replace(
@@ -115,6 +116,19 @@ class SubtitleTranslator:
             return subs
         subs.save(path.join(dir_path, filename))
 
+    @staticmethod
+    def _translate_google_chunk(texts: List[str]) -> List[Optional[str]]:
+        """
+            Translates a chunk of subtitles with Google Translate; the missing subtitles are sent again.
+
+            Args:
+                - texts (List[str]): The texts of the subtitles.
+
+            Returns:
+                - List[Optional[str]]: The translated texts (None for the subtitles which could not be translated).
+        """
+        return translate_cues(lambda chunk: Translator().translate(encode_cues(chunk), dest='pl').text, texts)
+
     @staticmethod
     def translate_deepl_api(filename: str, dir_path: str, translated_line_count: int, deepl_api_key: str) -> None:
         """
@@ -123,29 +137,34 @@ class SubtitleTranslator:
             Args:
                 - filename (str): The name of the subtitle file.
                 - dir_path (str): The directory path of the subtitle file.
-                - translated_line_count (int): The number of lines to translate at a time.
+                - translated_line_count (int): The maximum number of lines to translate at a time (a chunk is also limited by its size, see 'ChunkPlanner').
                 - deepl_api_key (str): The API key for the DeepL translator.
         """
         subs: pysrt.SubRipFile = pysrt.open(
             path.join(dir_path, filename), encoding='utf-8')
         translator: deepl.Translator = deepl.Translator(deepl_api_key)
-        groups: List[List[pysrt.SubRipItem]] = [subs[i:i+translated_line_count]
-                                                for i in range(0, len(subs), translated_line_count)]
-        for group in groups:
-            text: str = " @@\n".join(sub.text.replace("\n", " ◍◍◍◍ ")
-                                     for sub in group)
-            translated_text: str = translator.translate_text(
-                text, target_lang='PL').text
-            translated_texts: List[str] = translated_text.split(" @@\n")
-            if len(translated_texts) == len(group):
-                for i in range(len(group)):
-                    if i < len(translated_texts):
-                        group[i].text = translated_texts[i]
-                        group[i].text = group[i].text.replace(" ◍◍◍◍, ", ",\n")
-                        group[i].text = group[i].text.replace(" ◍◍◍◍ ", "\n")
-                        group[i].text = group[i].text.replace(" ◍◍◍◍", "")
+        translated_texts: List[str] = translate_texts(
+            'DeepL API', partial(SubtitleTranslator._translate_deepl_chunk, translator), [sub.text for sub in subs],
+            ChunkPlanner.for_provider('DeepL API', translated_line_count), TranslationMemory(), SubtitleTranslator._get_scene_ids(subs))
+        for sub, translated_text in zip(subs, translated_texts):
+            sub.text = translated_text
         subs.save(path.join(dir_path, filename), encoding='utf-8')
 
+    @staticmethod
+    def _translate_deepl_chunk(translator: deepl.Translator, texts: List[str]) -> List[Optional[str]]:
+        """
+            Translates a chunk of subtitles with the DeepL API; the missing subtitles are sent again.
+
+            Args:
+                - translator (deepl.Translator): The DeepL translator.
+                - texts (List[str]): The texts of the subtitles.
+
+            Returns:
+                - List[Optional[str]]: The translated texts (None for the subtitles which could not be translated).
+        """
+        return translate_cues(lambda chunk: translator.translate_text(
+            encode_cues(chunk), target_lang='PL', preserve_formatting=True).text, texts)
+
     @staticmethod
     def translate_deepl_desktop(filename: str, dir_path: str, translated_line_count: int) -> None:
         """
@@ -154,22 +173,32 @@ class SubtitleTranslator:
             Args:
                 - filename (str): The name of the subtitle file.
                 - dir_path (str): The directory path of the subtitle file.
-                - translated_line_count (int): The number of lines to translate at a time.
+                - translated_line_count (int): The maximum number of lines to translate at a time (a group is also limited by its size).
         """
-        command: str = path.join(
-            environ['APPDATA'], 'Programs', 'Zero Install', '0install-win.exe')
-        args: List[str] = ["run", "--no-wait",
-                           "https://appdownload.deepl.com/windows/0install/deepl.xml"]
-        call([command] + args)
-
-        sleep(7)
-
-        def auto_steps():
+        subs: pysrt.SubRipFile = pysrt.open(
+            path.join(dir_path, filename), encoding='utf-8')
+        memory: TranslationMemory = TranslationMemory()
+        unit_subs, unit_indexes = SubtitleTranslator._deduplicate_subs(subs)
+        groups: List[List[pysrt.SubRipItem]] = SubtitleTranslator._plan_groups(
+            SubtitleTranslator._apply_memory(memory, 'DeepL Desktop Free', unit_subs),
+            ChunkPlanner.for_provider('DeepL Desktop Free', translated_line_count))
+
+        if groups:
+            command: str = path.join(
+                environ['APPDATA'], 'Programs', 'Zero Install', '0install-win.exe')
+            args: List[str] = ["run", "--no-wait",
+                               "https://appdownload.deepl.com/windows/0install/deepl.xml"]
+            call([command] + args)
+
+            sleep(7)
+
+        def auto_steps(texts: List[str]) -> str:
             screen_width, screen_height = pyautogui.size()
             x_coordinate = screen_width * 0.25
             y_coordinate = screen_height * 0.5
             pyautogui.moveTo(x_coordinate, y_coordinate)
             pyautogui.click()
+            pyperclip.copy(encode_cues(texts))
             pyautogui.hotkey('ctrl', 'a')
             pyautogui.hotkey('del')
             pyautogui.hotkey('ctrl', 'v')
@@ -179,43 +208,25 @@ class SubtitleTranslator:
             pyautogui.click()
             pyautogui.hotkey('ctrl', 'a')
             pyautogui.hotkey('ctrl', 'c')
+            text: str = pyperclip.paste()
+            for freze in DEEPL_FREE_NOTES:
+                text = text.replace(freze, '')
+            return text
 
-        subs: pysrt.SubRipFile = pysrt.open(
-            path.join(dir_path, filename), encoding='utf-8')
-        groups: List[List[pysrt.SubRipItem]] = [subs[i:i+translated_line_count]
-                                                for i in range(0, len(subs), translated_line_count)]
-
+        new_translations: Dict[str, str] = {}
         for group in groups:
-            text: str = " @@\n".join(sub.text.replace("\n", " ◍◍◍◍ ")
-                                     for sub in group)
-            text = text.rstrip('\n')
-            pyperclip.copy(text)
-            auto_steps()
-
-            translated_text: str = pyperclip.paste()
-            if translated_text:
-                for sub, trans_text in zip(group, translated_text.split(" @@\n")):
-                    sub.text = trans_text.replace(" ◍◍◍◍, ", ",\n")
-                    sub.text = trans_text.replace(" ◍◍◍◍ ", "\n")
-                    sub.text = trans_text.replace(" ◍◍◍◍", "")
-        pyautogui.hotkey('alt', 'f4')
-
+            translated_texts: List[Optional[str]] = translate_cues(auto_steps, [sub.text for sub in group])
+            for sub, translated_text in zip(group, translated_texts):
+                if translated_text is not None:
+                    new_translations[sub.text] = translated_text
+                    sub.text = translated_text
+        if groups:
+            pyautogui.hotkey('alt', 'f4')
+        memory.store(new_translations.items(), 'DeepL Desktop Free')
+
+        SubtitleTranslator._fan_out(subs, unit_subs, unit_indexes)
         subs.save(path.join(dir_path, filename), encoding='utf-8')
 
-        frezes: List[str] = ["\nPrzetłumaczono z www.DeepL.com/Translator (wersja darmowa)\n",
-                             "Przetłumaczono z www.DeepL.com/Translator (wersja darmowa)",
-                             "\nTranslated with www.DeepL.com/Translator (free version)\n",
-                             "\nTranslated with www.DeepL.com/Translator (free version)"]
-
-        with open(path.join(dir_path, filename), 'r', encoding='utf-8') as in_file:
-            text: str = in_file.read()
-
-        for freze in frezes:
-            text = text.replace(freze, "")
-
-        with open(path.join(dir_path, filename), 'w', encoding='utf-8') as out_file:
-            out_file.write(text)
-
     def translate_google_gpt(self, filename: str, dir_path: str, translated_line_count: int, chat_gpt_access_token: str) -> None:
         """
             Translates subtitles using Google Translate and ChatGPT.
@@ -223,7 +234,7 @@ class SubtitleTranslator:
             Args:
                 - filename (str): The name of the subtitle file.
                 - dir_path (str): The directory path of the subtitle file.
-                - translated_line_count (int): The number of lines to translate at a time.
+                - translated_line_count (int): The maximum number of lines sent to ChatGPT at a time.
                 - chat_gpt_access_token (str): The access token for ChatGPT.
         """
         translated_subs: pysrt.SubRipFile = SubtitleTranslator.translate_google(
@@ -240,14 +251,31 @@ class SubtitleTranslator:
             Args:
                 - filename (str): The name of the subtitle file.
                 - dir_path (str): The directory path of the subtitle file.
-                - translated_line_count (int): The number of lines to translate at a time.
+                - translated_line_count (int): The maximum number of lines to translate at a time (a group is also limited by its size).
                 - chat_gpt_access_token (str): The access token for ChatGPT.
                 - translated_subs (Optional[pysrt.SubRipFile], optional): The translated subtitles. Defaults to None.
         """
         subs: pysrt.SubRipFile = pysrt.open(
             path.join(dir_path, filename), encoding='utf-8')
-        groups: List[List[pysrt.SubRipItem]] = [subs[i:i+translated_line_count]
-                                                for i in range(0, len(subs), translated_line_count)]
+        provider: str = 'ChatGPT' if translated_subs is None else 'ChatGPT + Google Translate'
+        memory: TranslationMemory = TranslationMemory()
+        unit_subs, unit_indexes = SubtitleTranslator._deduplicate_subs(subs)
+
+        unit_positions: Dict[int, int] = {}
+        for position, unit_index in enumerate(unit_indexes):
+            unit_positions.setdefault(unit_index, position)
+        pre_translations: Dict[str, str] = {}
+        if translated_subs is not None:
+            pre_translations = {sub.text: translated_subs[unit_positions[i]].text
+                                for i, sub in enumerate(unit_subs)}
+
+        groups: List[List[pysrt.SubRipItem]] = SubtitleTranslator._plan_groups(
+            SubtitleTranslator._apply_memory(memory, provider, unit_subs),
+            ChunkPlanner.for_provider('ChatGPT', translated_line_count))
+        if not groups:
+            SubtitleTranslator._fan_out(subs, unit_subs, unit_indexes)
+            subs.save(path.join(dir_path, filename), encoding='utf-8')
+            return
 
         additional_info: str = ""
         while True:
@@ -258,14 +286,8 @@ class SubtitleTranslator:
                 break
             additional_info += info + ", "
 
-        counter: int = 1
-        for group in groups:
-            text: str = ""
-            for sub in group:
-                text += "◍◍{}. {}".format(counter,
-                                          sub.text.replace('\n', ' ◍◍◍◍ ')) + " @@\n"
-                counter += 1
-            text = text.rstrip(' @@\n')
+        def request(texts: List[str]) -> str:
+            text: str = encode_cues(texts)
 
             # For programming convenience, writing the ◍ character and reading it promt in the code
             prompt: str = """WAŻNE: JEŚLI OTRZYMASZ NAPISY OD 1 DO 30, ZWRÓĆ NAPISY OD 1 DO 30, NAWET JEŚLI TŁUMACZENIE JEST NIEODPOWIEDNIE, NIESPÓJNE LUB ZŁE. NIEKOMPLETNE TŁUMACZENIE JEST LEPSZE NIŻ BRAK TŁUMACZENIA.
@@ -286,9 +308,9 @@ Jeśli płeć osoby mówiącej nie jest podana wcześniej, lub nie masz kontekst
 
 Bądź kreatywny w swoich tłumaczeniach, dostosowując swój ton do kontekstu - bądź dowcipny dla lekkich tekstów i dodaj powagi i profesjonalizmu dla poważnych. Tłumacz wszystkie przekleństwa, nie cenzuruj i nie zmieniaj znaczenia słów, które są ważne w kontekście lub które zmieniają emocjonalny ton tekstu.
 
-Mając znaki ◍◍◍◍, @@ lub '◍◍[num]. nie zmieniaj ich, nie modyfikuj struktury, ani ułożenia tekstu. Nie usuwaj ani nie dodawaj żadnych znaków interpunkcyjnych, ani nie zmieniaj ich położenia. Te znaki to świętość, nie zmieniaj ich. Nie musisz wiedzieć, co one znaczą, ale musisz je zachować, w tym samym miejscu, w którym się znajdują. Nie łącz zdań z 2 napisów w jeden napis - każdy napis musi być oddzielny.
+Mając znaki ◍ lub '◍◍[num]◍◍' nie zmieniaj ich, nie modyfikuj struktury, ani ułożenia tekstu. Nie usuwaj ani nie dodawaj żadnych znaków interpunkcyjnych, ani nie zmieniaj ich położenia. Te znaki to świętość, nie zmieniaj ich. Nie musisz wiedzieć, co one znaczą, ale musisz je zachować, w tym samym miejscu, w którym się znajdują. Nie łącz zdań z 2 napisów w jeden napis - każdy napis musi być oddzielny.
 
-W tekście symbol '◍◍◍◍' reprezentuje nową linię w tym samym napisie, a symbol '@@' reprezentuje koniec napisu. Nie zmieniaj ilości znaków '@@'. Nie zmieniaj ilości numeracji napisów '◍◍1.', zwracaj taką samą ilość wszystkich tych znaków, jak w oryginalnym tekście.
+W tekście symbol '◍' reprezentuje nową linię w tym samym napisie, a znacznik '◍◍[num]◍◍' rozpoczyna napis o numerze [num]. Każdy napis zaczynaj w nowej linii od jego znacznika. Nie zmieniaj numeracji napisów '◍◍1◍◍', zwracaj taką samą ilość wszystkich tych znaków, jak w oryginalnym tekście.
 
 Twoim ostatecznym celem jest wyprodukowanie tłumaczenia, które jest jak najbardziej wiernie odwzorowane na oryginał, zarówno pod względem znaczenia, jak i poprawności gramatycznej i syntaktycznej, chyba że oryginał jest niegramatyczny.
 
@@ -296,15 +318,8 @@ Zadanie wykonuj powoli krok po kroku
 
 Dodatkowe uwagi odnośnie tłumaczenia / dodatkowe informacje o tłumaczonym tekście: """ + additional_info + "\n\nTeraz przetłumacz poniższe napisy:\n" + text
 
-            if translated_subs is not None:
-                translated_text: str = "".join(
-                    "◍◍{}. {}".format(
-                        i + 1, translated_subs[i].text.replace('\n', ' ◍◍◍◍ ')
-                    )
-                    + " @@\n"
-                    for i in range((counter - 1) - len(group), counter - 1)
-                )
-                translated_text = translated_text.rstrip(' @@\n')
+            if pre_translations:
+                translated_text: str = encode_cues([pre_translations.get(cue, cue) for cue in texts])
                 prompt += "\n\nNapisy zostały wstępnie przetłumaczone przez Google Translate. Są one dostarczone w celu rozszerzenia zakresu słownictwa. Proszę nie kopiować ani nie przepisywać tego tłumaczenia wraz z zawartymi w nim formami gramatycznymi i technikami tłumaczeniowymi. Przetłumaczone napisy:\n" + translated_text
 
             pyperclip.copy(prompt)
@@ -314,25 +329,105 @@ Dodatkowe uwagi odnośnie tłumaczenia / dodatkowe informacje o tłumaczonym tek
             console.print(
                 "[green_italic]Naciśnij dowolny klawisz, gdy skończysz tłumaczyć...", end='')
             input()
+            return pyperclip.paste().replace('\r\n', '\n')
 
-            translated_text: str = pyperclip.paste().rstrip(" @@")
-            if translated_text:
-                translated_lines: List[str] = translated_text.replace(
-                    '\r\n', '\n').split(" @@\n")
-                for i, line in enumerate(translated_lines):
-                    translated_lines[i] = line
-                if len(translated_lines) != len(group):
-                    console.print(
-                        f"Błąd: liczba napisów po tłumaczeniu ({len(translated_lines)}) nie jest taka sama jak przed tłumaczeniem ({len(group)})", style='red_bold')
-                for sub, trans_text in zip(group, translated_lines):
-                    trans_text = re.sub(r"◍◍\d+\. ", "", trans_text)
-                    trans_text = trans_text.replace(" ◍◍◍◍, ", ",\n")
-                    trans_text = trans_text.replace(" ◍◍◍◍ ", "\n")
-                    trans_text = trans_text.replace(" ◍◍◍◍", "")
-                    sub.text = trans_text
-
+        new_translations: Dict[str, str] = {}
+        for group in groups:
+            translated_texts: List[Optional[str]] = translate_cues(request, [sub.text for sub in group])
+            for sub, translated_text in zip(group, translated_texts):
+                if translated_text is not None:
+                    new_translations[sub.text] = translated_text
+                    sub.text = translated_text
+        memory.store(new_translations.items(), provider)
+
+        SubtitleTranslator._fan_out(subs, unit_subs, unit_indexes)
         subs.save(path.join(dir_path, filename), encoding='utf-8')
 
+    @staticmethod
+    def _deduplicate_subs(subs: pysrt.SubRipFile) -> Tuple[List[pysrt.SubRipItem], List[int]]:
+        """
+            Collapses subtitles with the same normalized text to one translation unit and prints the dedup ratio.
+
+            Args:
+                - subs (pysrt.SubRipFile): The subtitles.
+
+            Returns:
+                - Tuple[List[pysrt.SubRipItem], List[int]]: The first subtitle of every unit and the unit of every subtitle.
+        """
+        units, unit_indexes = deduplicate_texts([sub.text for sub in subs])
+        unit_subs: List[Optional[pysrt.SubRipItem]] = [None] * len(units)
+        for sub, unit_index in zip(subs, unit_indexes):
+            if unit_subs[unit_index] is None:
+                unit_subs[unit_index] = sub
+        print_dedup_ratio(len(subs), len(units))
+        return unit_subs, unit_indexes
+
+    @staticmethod
+    def _apply_memory(memory: TranslationMemory, provider: str,
+                      subs: List[pysrt.SubRipItem]) -> List[pysrt.SubRipItem]:
+        """
+            Translates the subtitles found in the translation memory, before any of them is sent to the translator.
+
+            Args:
+                - memory (TranslationMemory): The translation memory.
+                - provider (str): The translator, e.g. 'DeepL Desktop Free'.
+                - subs (List[pysrt.SubRipItem]): The subtitles to translate.
+
+            Returns:
+                - List[pysrt.SubRipItem]: The subtitles which are not in the memory, in order.
+        """
+        misses: List[pysrt.SubRipItem] = []
+        for sub, translated_text in zip(subs, memory.lookup([sub.text for sub in subs], provider)):
+            if translated_text is None:
+                misses.append(sub)
+            else:
+                sub.text = translated_text
+        if len(misses) < len(subs):
+            console.print(
+                f"Pamięć tłumaczeń: {len(subs) - len(misses)} z {len(subs)} napisów przetłumaczonych wcześniej.", style='green_italic')
+        return misses
+
+    @staticmethod
+    def _fan_out(subs: pysrt.SubRipFile, unit_subs: List[pysrt.SubRipItem], unit_indexes: List[int]) -> None:
+        """
+            Copies the translation of every unit to all subtitles with the same text.
+
+            Args:
+                - subs (pysrt.SubRipFile): The subtitles.
+                - unit_subs (List[pysrt.SubRipItem]): The translated first subtitle of every unit.
+                - unit_indexes (List[int]): The unit of every subtitle.
+        """
+        for sub, unit_index in zip(subs, unit_indexes):
+            sub.text = unit_subs[unit_index].text
+
+    @staticmethod
+    def _get_scene_ids(subs: List[pysrt.SubRipItem]) -> List[int]:
+        """
+            Returns the scene of every subtitle, detected from the pauses between the subtitles.
+
+            Args:
+                - subs (List[pysrt.SubRipItem]): The subtitles in order.
+
+            Returns:
+                - List[int]: The scene of every subtitle.
+        """
+        return get_scene_ids([sub.start.ordinal for sub in subs], [sub.end.ordinal for sub in subs])
+
+    @staticmethod
+    def _plan_groups(subs: List[pysrt.SubRipItem], planner: ChunkPlanner) -> List[List[pysrt.SubRipItem]]:
+        """
+            Splits the subtitles into groups translated at once, packed up to the budget of the translator.
+
+            Args:
+                - subs (List[pysrt.SubRipItem]): The subtitles in order.
+                - planner (ChunkPlanner): The planner of the translator.
+
+            Returns:
+                - List[List[pysrt.SubRipItem]]: The groups of consecutive subtitles.
+        """
+        return [[subs[i] for i in chunk]
+                for chunk in planner.plan([sub.text for sub in subs], SubtitleTranslator._get_scene_ids(subs))]
+
     def translate_srt(self,  filename: str, dir_path: str, settings: Settings) -> None:
         """
             Selects the appropriate translation method based on the settings and translates the subtitles.
@@ -372,3 +467,23 @@ Dodatkowe uwagi odnośnie tłumaczenia / dodatkowe informacje o tłumaczonym tek
         else:
             console.print(
                 f"Nieznany translator: {translator}", style='red_bold')
+
+    def translate_srt_files(self, files: List[Tuple[str, str]], settings: Settings) -> None:
+        """
+            Translates several subtitle files. The files of translators with concurrent requests
+            (Google Translate, DeepL API) are translated at the same time and share one request budget;
+            the other translators need the user or the desktop, so their files are translated one by one.
+            At most GLOBAL_LIMIT files are translated at once, as more could not have requests in flight anyway.
+
+            Args:
+                - files (List[Tuple[str, str]]): The names and the directory paths of the subtitle files.
+                - settings (Settings): The settings for the translation.
+        """
+        if settings.translator not in PROVIDER_LIMITS or len(files) < 2:
+            for filename, dir_path in files:
+                self.translate_srt(filename, dir_path, settings)
+            return
+        with ThreadPoolExecutor(max_workers=min(len(files), GLOBAL_LIMIT)) as executor:
+            for future in [executor.submit(self.translate_srt, filename, dir_path, settings)
+                           for filename, dir_path in files]:
+                future.result()
@@ -0,0 +1,317 @@
+"""
+    This module defines the 'FolderWatcher' and 'WatchDaemon' classes, which turn the working space into a drop folder.
+    New MKV, SRT, ASS and TXT files are detected once their size stops changing, added to the persistent job queue
+    and processed by the headless pipeline, one episode per worker process.
+    On Linux the folder is watched with inotify; on other systems (or if inotify is unavailable) it is polled.
+    Several machines can run the daemon on a shared working space: each one leases jobs from the same queue,
+    so the throughput grows with the number of machines.
+
+    * Usage:
+        To use this module, create an instance of the 'WatchDaemon' class and call the 'run' method.
+
+    * Example usage:
+        daemon = WatchDaemon(manifest=Manifest(settings=Settings.load_from_file()))
+        daemon.run()
+"""
+
+import sys
+from concurrent.futures import Future, ProcessPoolExecutor
+from ctypes import CDLL, get_errno
+from ctypes.util import find_library
+from dataclasses import dataclass, field
+from os import close, listdir, path, read, stat
+from socket import gethostname
+from select import select
+from time import sleep, time
+from typing import Dict, List, Optional, Set, Tuple
+
+from constants import WORKING_SPACE, console
+from data.manifest import Manifest
+from modules.artifact_cache import ArtifactCache
+from modules.episode_pipeline import EpisodePipeline
+from modules.job_queue import Job, JobQueue
+
+# inotify flags from <sys/inotify.h>
+IN_MODIFY: int = 0x00000002
+IN_CLOSE_WRITE: int = 0x00000008
+IN_MOVED_TO: int = 0x00000080
+IN_CREATE: int = 0x00000100
+IN_NONBLOCK: int = 0o4000
+IN_CLOEXEC: int = 0o2000000
+
+
+@dataclass(slots=True)
+class FolderWatcher:
+    """
+        Detects files in a folder which are completely written.
+        A file is complete when its size and modification time have not changed for 'settle_time' seconds,
+        which also works for files copied over the network or written by a download client.
+
+        Attributes:
+            - directory (str): The watched directory (not recursively).
+            - extensions (Tuple[str, ...]): The extensions of the files to detect.
+            - settle_time (float): How many seconds a file has to stay unchanged.
+            - poll_interval (float): How often the directory is checked while files are settling, or always without inotify.
+            - idle_interval (float): How often the directory is checked with inotify when nothing is happening.
+            - pending (Dict[str, Tuple[int, float, float]]): The settling files: name -> (size, mtime, unchanged since).
+            - reported (Dict[str, Tuple[int, float]]): The complete files already reported: name -> (size, mtime).
+            - inotify_fd (Optional[int]): The inotify file descriptor or None when polling.
+
+        Methods:
+            - start(self) -> None: Starts watching the directory.
+            - stop(self) -> None: Stops watching the directory.
+            - wait(self, busy: bool = False) -> None: Waits for a change in the directory or for the next check.
+            - poll(self) -> List[Tuple[str, int, float]]: Returns the files which have just become complete.
+    """
+    directory: str = WORKING_SPACE
+    extensions: Tuple[str, ...] = ('.mkv', '.srt', '.ass', '.txt')
+    settle_time: float = 10.0
+    poll_interval: float = 2.0
+    idle_interval: float = 60.0
+    pending: Dict[str, Tuple[int, float, float]] = field(default_factory=dict)
+    reported: Dict[str, Tuple[int, float]] = field(default_factory=dict)
+    inotify_fd: Optional[int] = None
+
+    def start(self) -> None:
+        """
+            Starts watching the directory with inotify if possible, otherwise falls back to polling.
+        """
+        self.inotify_fd = self._init_inotify()
+        if self.inotify_fd is None:
+            console.print(
+                f'Inotify jest niedostępne - folder będzie sprawdzany co {self.poll_interval:g} s.', style='yellow_italic')
+
+    def stop(self) -> None:
+        """
+            Stops watching the directory.
+        """
+        if self.inotify_fd is not None:
+            close(self.inotify_fd)
+            self.inotify_fd = None
+
+    def _init_inotify(self) -> Optional[int]:
+        """
+            Creates an inotify watch on the directory.
+
+            Returns:
+                - Optional[int]: The inotify file descriptor or None if inotify is unavailable.
+        """
+        if not sys.platform.startswith('linux'):
+            return None
+        try:
+            libc: CDLL = CDLL(find_library('c') or 'libc.so.6', use_errno=True)
+            inotify_fd: int = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if inotify_fd < 0:
+            return None
+        mask: int = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(inotify_fd, self.directory.encode(), mask) < 0:
+            console.print(
+                f'Nie można obserwować folderu {self.directory} (errno {get_errno()}).', style='red_italic')
+            close(inotify_fd)
+            return None
+        return inotify_fd
+
+    def wait(self, busy: bool = False) -> None:
+        """
+            Waits for a change in the directory or for the next check.
+            While files are settling, the directory is checked every 'poll_interval' seconds even without any event.
+
+            Args:
+                - busy (bool): Whether the caller has other work to check, e.g. running jobs. Defaults to False.
+        """
+        if self.inotify_fd is None:
+            sleep(self.poll_interval)
+            return
+        timeout: float = self.poll_interval if self.pending or busy else self.idle_interval
+        ready, _, _ = select([self.inotify_fd], [], [], timeout)
+        if ready:
+            # The events only wake the watcher up; the directory is scanned anyway.
+            try:
+                while read(self.inotify_fd, 65536):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def poll(self) -> List[Tuple[str, int, float]]:
+        """
+            Scans the directory and returns the files which have just become complete.
+            A reported file which changes later is reported again once it settles.
+
+            Returns:
+                - List[Tuple[str, int, float]]: The complete files as (name, size, mtime).
+        """
+        now: float = time()
+        complete: List[Tuple[str, int, float]] = []
+        present: Set[str] = set()
+        for name in listdir(self.directory):
+            file_path: str = path.join(self.directory, name)
+            if not name.endswith(self.extensions) or not path.isfile(file_path):
+                continue
+            try:
+                file_stat = stat(file_path)
+            except FileNotFoundError:
+                continue
+            present.add(name)
+            version: Tuple[int, float] = (file_stat.st_size, file_stat.st_mtime)
+            if self.reported.get(name) == version:
+                continue
+            size, mtime, since = self.pending.get(name, (-1, -1.0, now))
+            if (size, mtime) != version:
+                self.pending[name] = (*version, now)
+            elif now - since >= self.settle_time:
+                del self.pending[name]
+                self.reported[name] = version
+                complete.append((name, *version))
+
+        for name in set(self.pending) - present:
+            del self.pending[name]
+        for name in set(self.reported) - present:
+            del self.reported[name]
+        return complete
+
+
+def _process_job(pipeline: EpisodePipeline, queue: JobQueue, job_id: int, worker: str) -> bool:
+    """
+        Runs the pipeline of a queued file and removes its temporary files after a success.
+        Before every stage the worker checks that it still holds the lease of the job, so a job
+        taken over by another worker stops instead of being processed twice in the shared working space.
+        Defined at module level, so it can be sent to a worker process.
+
+        Args:
+            - pipeline (EpisodePipeline): The pipeline of the episode.
+            - queue (JobQueue): The job queue.
+            - job_id (int): The ID of the job.
+            - worker (str): The name of this worker in the queue.
+
+        Returns:
+            - bool: True if the episode was processed successfully, False otherwise.
+    """
+    success: bool = pipeline.run(should_stop=lambda: not queue.holds_lease(job_id, worker))
+    if success and queue.holds_lease(job_id, worker):
+        pipeline.cleanup()
+    return success
+
+
+@dataclass(slots=True)
+class WatchDaemon:
+    """
+        Watches the working space and processes new files continuously, until it is stopped with Ctrl+C.
+
+        Attributes:
+            - manifest (Manifest): The settings and the default options of the files; listed files use their own options.
+            - cache (Optional[ArtifactCache]): The cache of stage results. Defaults to None.
+            - watcher (FolderWatcher): The watcher of the working space.
+            - queue (JobQueue): The persistent job queue, shared by all machines using the same working space.
+            - worker (str): The name of this worker in the queue. Defaults to the name of the computer.
+            - last_heartbeat (float): The time of the last renewal of the leases.
+
+        Methods:
+            - run(self) -> None: Watches the folder and processes the queued files.
+    """
+    manifest: Manifest
+    cache: Optional[ArtifactCache] = None
+    watcher: FolderWatcher = field(default_factory=FolderWatcher)
+    queue: JobQueue = field(default_factory=JobQueue)
+    worker: str = field(default_factory=gethostname)
+    last_heartbeat: float = 0.0
+
+    def run(self) -> None:
+        """
+            Watches the folder and processes the queued files, up to 'manifest.workers' episodes at the same time.
+            Jobs interrupted by a previous stop of this worker are queued again and resumed from the episode journal.
+        """
+        requeued: int = self.queue.release(self.worker)
+        if requeued:
+            console.print(
+                f'Wznawiam przerwane zadania: {requeued}', style='yellow_bold')
+        self.watcher.start()
+        console.print(
+            f'\nObserwuję folder {self.watcher.directory} jako {self.worker}. Naciśnij Ctrl+C, aby zakończyć.',
+            style='green_bold')
+
+        running: Dict[Future, Job] = {}
+        try:
+            with ProcessPoolExecutor(max_workers=self.manifest.workers) as executor:
+                while True:
+                    self._enqueue_new_files()
+                    self._start_jobs(executor, running)
+                    self._collect_results(running)
+                    self._renew_leases(running)
+                    self.watcher.wait(busy=bool(running))
+        except KeyboardInterrupt:
+            self.queue.release(self.worker)
+            console.print(
+                '\nZatrzymano obserwowanie folderu. Przerwane zadania zostaną wznowione przy następnym uruchomieniu.',
+                style='yellow_bold')
+        finally:
+            self.watcher.stop()
+
+    def _enqueue_new_files(self) -> None:
+        """
+            Adds the files which have just become complete to the queue.
+        """
+        for filename, size, mtime in self.watcher.poll():
+            if self.queue.enqueue(filename, size, mtime):
+                console.print(
+                    f'Dodano do kolejki: {filename}', style='blue_bold')
+
+    def _start_jobs(self, executor: ProcessPoolExecutor, running: Dict[Future, Job]) -> None:
+        """
+            Starts queued jobs while there are free workers.
+
+            Args:
+                - executor (ProcessPoolExecutor): The pool of worker processes.
+                - running (Dict[Future, Job]): The running jobs.
+        """
+        while len(running) < self.manifest.workers:
+            job: Optional[Job] = self.queue.claim(self.worker)
+            if job is None:
+                return
+            pipeline: EpisodePipeline = EpisodePipeline(
+                self.manifest.get_entry(job.filename), self.manifest.settings, cache=self.cache)
+            running[executor.submit(_process_job, pipeline, self.queue, job.id, self.worker)] = job
+
+    def _collect_results(self, running: Dict[Future, Job]) -> None:
+        """
+            Records the results of the finished jobs.
+
+            Args:
+                - running (Dict[Future, Job]): The running jobs.
+        """
+        for future in [future for future in running if future.done()]:
+            job: Job = running.pop(future)
+            try:
+                success: bool = future.result()
+                error: Optional[str] = None if success else 'Błąd przetwarzania odcinka'
+            except Exception as exception:  # pylint: disable=broad-except
+                success, error = False, str(exception)
+            if not self.queue.finish(job.id, self.worker, success, error):
+                console.print(
+                    f'Pomijam wynik zadania {job.filename} - przejął je inny komputer.', style='yellow_bold')
+                continue
+            console.print(
+                f'{"Zakończono" if success else "Nie udało się przetworzyć"}: {job.filename}',
+                style='green_bold' if success else 'red_bold')
+
+    def _renew_leases(self, running: Dict[Future, Job]) -> None:
+        """
+            Renews the leases of the running jobs three times per lease time,
+            so a short network outage does not hand the jobs over to another worker.
+            A job whose lease was lost is cancelled if it has not started yet; a started one stops
+            before its next stage, and its result is not recorded.
+
+            Args:
+                - running (Dict[Future, Job]): The running jobs.
+        """
+        if time() - self.last_heartbeat < self.queue.lease_time / 3:
+            return
+        self.last_heartbeat = time()
+        for future, job in list(running.items()):
+            if not self.queue.heartbeat(job.id, self.worker):
+                console.print(
+                    f'Utracono dzierżawę zadania {job.filename} - przejął je inny komputer. '
+                    f'Zadanie zostanie przerwane przed kolejnym etapem.', style='red_bold')
+                if future.cancel():
+                    del running[future]
@@ -1,7 +1,7 @@
-from msvcrt import getch
+from argparse import ArgumentParser, Namespace
 from os import listdir, makedirs, path
 from shutil import rmtree
-from typing import Dict, List
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from natsort import natsorted
 
@@ -12,13 +12,20 @@ from constants import (WORKING_SPACE,
                        WORKING_SPACE_TEMP_ALT_SUBS,
                        console)
 
+from data.manifest import Manifest
 from data.settings import Settings
 
+from modules.artifact_cache import ArtifactCache
+from modules.episode_pipeline import EpisodePipeline, run_episodes
 from modules.mkvtoolnix import MkvToolNix
-from modules.subtitle import SubtitleRefactor
+from modules.subtitle import SubtitleRefactor, sanitize_srt_directory
 from modules.subtitle_to_speech import SubtitleToSpeech
+from modules.translation_memory import TranslationMemory
 from modules.translator import SubtitleTranslator
 from modules.mkv_processing import MKVProcessing
+from modules.stage_scheduler import StageScheduler
+from modules.track_rules import TrackRule, select_tracks
+from modules.watch_folder import WatchDaemon
 
 from utils.cool_animation import CoolAnimation
 from utils.execution_timer import execution_timer
@@ -75,20 +82,81 @@ def update_settings() -> Settings:  # ✅
     return Settings.load_from_file()
 
 
-def extract_tracks_from_mkv():  # ✅
+def extract_tracks_from_mkv(settings: Settings):  # ✅
     """
-        Asks the user if they want to extract tracks from MKV files. If yes, extracts the tracks.
+        Asks the user if they want to extract tracks from MKV files. If yes, identifies all files in parallel,
+        selects the tracks of every file (with the track rules from the settings, or by asking the user)
+        and then extracts the tracks from several files at the same time.
+
+        Args:
+            settings (Settings): The settings with the track selection rules.
     """
     if ask_user('🧲 Czy chcesz wyciągnąć ścieżki z plików mkv? (T lub Y - tak):'):
-        files: List[str] = get_mkv_files(WORKING_SPACE)
-        sorted_files: List[str] = natsorted(files)
-        for filename in sorted_files:
+        entries: Dict[str, Dict[str, Any]] = MkvToolNix.identify_many(WORKING_SPACE)
+        rules: List[TrackRule] = TrackRule.from_settings(settings)
+        selection: Dict[str, Set[int]] = {}
+        for filename in natsorted(entries):
             mkv: MkvToolNix = MkvToolNix(filename)
-            mkv.mkv_extract_track(mkv.get_mkv_info())
+            mkv._print_mkv_info(entries[filename]['tracks'])  # pylint: disable=protected-access
+            selection[filename] = select_tracks(entries[filename]['tracks'], rules) if rules \
+                else mkv.ask_track_ids(entries[filename]['data'])
+        MkvToolNix.extract_many(selection, WORKING_SPACE, max_workers=2, entries=entries)
     else:
         console.print('Pomijam tę opcję.\n', style='red_bold')
 
 
+def dry_run_track_selection(settings: Settings) -> None:
+    """
+        Lists the tracks the track rules from the settings would extract from every MKV file, without extracting anything.
+
+        Args:
+            settings (Settings): The settings with the track selection rules.
+    """
+    rules: List[TrackRule] = TrackRule.from_settings(settings)
+    if not rules:
+        console.print(
+            'Brak reguł wyboru ścieżek (track_rules) w ustawieniach.', style='red_bold')
+        return
+    entries: Dict[str, Dict[str, Any]] = MkvToolNix.identify_many(WORKING_SPACE)
+    for filename in natsorted(entries):
+        tracks: Dict[int, dict] = {
+            track['id']: track for track in entries[filename]['tracks']}
+        out_files: Dict[str, int] = MkvToolNix(filename).plan_extraction(
+            entries[filename]['data'], select_tracks(entries[filename]['tracks'], rules))
+        console.print(filename, style='white_bold')
+        if not out_files:
+            console.print('    Brak pasujących ścieżek.', style='red_italic')
+        for out_filename, track_id in out_files.items():
+            track: dict = tracks[track_id]
+            console.print(
+                f'    [yellow_bold]{track_id:2}[/yellow_bold]  '
+                f'{track["type"]:10}  {track["codec_id"]:20} {track["language"]:5} {track["language_ietf"]:10} '
+                f'→ {out_filename}')
+
+
+def transfer_translation_memory(export_path: Optional[str], import_path: Optional[str]) -> None:
+    """
+        Exports the translation memory to a file or imports a memory exported on another machine.
+
+        Args:
+            export_path (Optional[str]): The file to export the memory to.
+            import_path (Optional[str]): The file to import the memory from.
+    """
+    memory: TranslationMemory = TranslationMemory()
+    try:
+        if import_path:
+            imported: int = memory.import_from_file(import_path)
+            console.print(
+                f'Zaimportowano tłumaczenia: {imported} (w pamięci: {memory.get_count()}).', style='green_bold')
+        if export_path:
+            exported: int = memory.export_to_file(export_path)
+            console.print(
+                f'Wyeksportowano tłumaczenia: {exported} → {export_path}', style='green_bold')
+    except (OSError, ValueError) as error:
+        console.print(
+            f'Błąd pamięci tłumaczeń: {error}', style='red_bold')
+
+
 def get_mkv_files(directory: str) -> List[str]:
     """
         Gets all MKV files in a directory.
@@ -103,9 +171,13 @@ def get_mkv_files(directory: str) -> List[str]:
             if path.isfile(path.join(directory, file)) and file.endswith('.mkv')]
 
 
-def refactor_subtitles():  # ✅
+def refactor_subtitles(settings: Settings):  # ✅
     """
         Refactors subtitles in various formats to a standard format.
+        The SRT files are cleaned and moved to the main subtitles directory in one batch.
+
+        Args:
+            settings (Settings): The settings; the TTS engine and its speed are used to time TXT subtitles.
     """
     subtitle_extensions: List[str] = [
         '.sup', '.txt', '.ogg',
@@ -116,8 +188,12 @@ def refactor_subtitles():  # ✅
     files: List[str] = get_files_with_extensions(
         WORKING_SPACE_TEMP, subtitle_extensions)
     sorted_files = natsorted(files)
+    srt_files: List[str] = [filename for filename in sorted_files if filename.endswith('.srt')]
+    if srt_files:
+        sanitize_srt_directory(WORKING_SPACE_TEMP, WORKING_SPACE_TEMP_MAIN_SUBS, srt_files)
     for filename in sorted_files:
-        refactor_subtitle_file(filename)
+        if not filename.endswith('.srt'):
+            refactor_subtitle_file(filename, settings)
 
 
 def get_files_with_extensions(directory: str, extensions: List[str]) -> List[str]:
@@ -140,12 +216,13 @@ def get_files_with_extensions(directory: str, extensions: List[str]) -> List[str
     ]
 
 
-def refactor_subtitle_file(filename: str):
+def refactor_subtitle_file(filename: str, settings: Settings):
     """
         Refactors a subtitle file to a standard format.
 
         Args:
             filename (str): The name of the subtitle file to refactor.
+            settings (Settings): The settings; the TTS engine and its speed are used to time TXT subtitles.
     """
     subtitle: SubtitleRefactor = SubtitleRefactor(filename)
     if filename.endswith('.ass') or filename.endswith('.ssa'):
@@ -154,7 +231,7 @@ def refactor_subtitle_file(filename: str):
     if filename.endswith('.srt'):
         subtitle.move_srt()
     if filename.endswith('.txt'):
-        subtitle.txt_to_srt(10)
+        subtitle.txt_to_srt(10, settings.tts, settings.tts_speed)
 
 
 def translate_subtitles(settings: Settings):  # ✅
@@ -219,16 +296,13 @@ def translate_files(files_to_translate: dict, settings: Settings):
             files_to_translate (dict): A dictionary mapping file names to a boolean indicating whether to translate them.
             settings (Settings): The settings to use for translation.
     """
-    translator_instance: SubtitleTranslator = SubtitleTranslator()
+    files: List[Tuple[str, str]] = []
     for filename, should_translate in files_to_translate.items():
         if should_translate:
-            translator_instance.translate_srt(filename,
-                                              WORKING_SPACE_TEMP_MAIN_SUBS,
-                                              settings)
+            files.append((filename, WORKING_SPACE_TEMP_MAIN_SUBS))
             if path.exists(path.join(WORKING_SPACE_TEMP_ALT_SUBS, filename)):
-                translator_instance.translate_srt(filename,
-                                                  WORKING_SPACE_TEMP_ALT_SUBS,
-                                                  settings)
+                files.append((filename, WORKING_SPACE_TEMP_ALT_SUBS))
+    SubtitleTranslator().translate_srt_files(files, settings)
 
 
 def convert_numbers_to_words():  # ✅
@@ -370,6 +444,76 @@ def process_output_files(settings: Settings):
             subtitle_processor.process_mkv(settings)
 
 
+def run_headless(manifest: Manifest) -> None:
+    """
+        Runs the whole process for the files listed in the manifest without any user interaction.
+        Every episode is processed by its own pipeline, which keeps a journal of finished stages,
+        so an interrupted run resumes at the first unfinished stage. Stage results are cached by their
+        inputs and settings, so e.g. changing only the output type reruns only the final mux.
+        The temporary files and the journal of every successful episode are removed, so the next run
+        processes it again (from the cache); the temporary folders are cleared only if all episodes succeeded.
+
+        Args:
+            manifest (Manifest): The manifest of the headless run.
+    """
+    cache: Optional[ArtifactCache] = create_cache(manifest)
+    results: Dict[str, bool]
+    if manifest.resources:
+        scheduler: StageScheduler = StageScheduler()
+        scheduler.slots.update(manifest.resources)
+        for entry in manifest.files:
+            scheduler.add_episode(EpisodePipeline(
+                entry, manifest.settings, cache=cache))
+        results = scheduler.run()
+    elif manifest.workers > 1:
+        results = run_episodes(
+            manifest.files, manifest.settings, manifest.workers, cache)
+    else:
+        results = {entry.stem: EpisodePipeline(entry, manifest.settings, cache=cache).run()
+                   for entry in manifest.files}
+
+    for entry in manifest.files:
+        if results.get(entry.stem):
+            EpisodePipeline(entry, manifest.settings).cleanup()
+    if all(results.values()):
+        clear_temp_folders()
+    else:
+        console.print(
+            'Pliki tymczasowe zostały zachowane - uruchom ponownie, aby wznowić przetwarzanie.', style='yellow_bold')
+
+
+def run_daemon(manifest: Manifest, worker: Optional[str] = None) -> None:
+    """
+        Watches the working space and processes every new file with the headless pipeline, until stopped with Ctrl+C.
+        Files listed in the manifest use their own options, other files use the manifest defaults.
+        Several computers can run the daemon on a shared working space (MM_AVH_WORKING_SPACE) - they share the job queue.
+
+        Args:
+            manifest (Manifest): The settings and the default options of the files.
+            worker (Optional[str]): The name of this worker in the job queue. Defaults to None (the name of the computer).
+    """
+    daemon: WatchDaemon = WatchDaemon(
+        manifest=manifest, cache=create_cache(manifest))
+    if worker:
+        daemon.worker = worker
+    daemon.run()
+
+
+def create_cache(manifest: Manifest) -> Optional[ArtifactCache]:
+    """
+        Creates the cache of stage results with the size limit from the manifest.
+
+        Args:
+            manifest (Manifest): The manifest of the headless run.
+
+        Returns:
+            Optional[ArtifactCache]: The cache or None if it is disabled.
+    """
+    if manifest.cache_size_gb <= 0:
+        return None
+    return ArtifactCache(max_size=int(manifest.cache_size_gb * 1024 ** 3))
+
+
 def clear_temp_folders():
     """
         Clears temporary folders used during processing.
@@ -381,15 +525,48 @@ def clear_temp_folders():
         makedirs(folder, exist_ok=True)
 
 
+def parse_arguments() -> Namespace:
+    """
+        Parses the command line arguments.
+
+        Returns:
+            Namespace: The parsed arguments.
+    """
+    parser: ArgumentParser = ArgumentParser(
+        description='Multimedia Magic – Audio Visual Heaven')
+    parser.add_argument('--manifest', metavar='PATH',
+                        help='Plik JSON/YAML z listą zadań - uruchamia program bez interakcji z użytkownikiem.')
+    parser.add_argument('--workers', type=int, metavar='N',
+                        help='Liczba odcinków przetwarzanych jednocześnie (nadpisuje wartość z manifestu).')
+    parser.add_argument('--watch', action='store_true',
+                        help='Obserwuje folder working_space i przetwarza nowe pliki bez przerwy (ustawienia z --manifest).')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Wypisuje ścieżki, które reguły wyboru (track_rules) wyciągnęłyby z plików mkv, i kończy działanie.')
+    parser.add_argument('--worker-name', metavar='NAME',
+                        help='Nazwa tego komputera we wspólnej kolejce zadań (domyślnie nazwa komputera).')
+    parser.add_argument('--export-memory', metavar='PATH',
+                        help='Eksportuje pamięć tłumaczeń do pliku (np. aby użyć jej na innym komputerze) i kończy działanie.')
+    parser.add_argument('--import-memory', metavar='PATH',
+                        help='Importuje pamięć tłumaczeń wyeksportowaną na innym komputerze i kończy działanie.')
+    return parser.parse_args()
+
+
 @execution_timer  # ✅
-def main():
+def main(manifest: Optional[Manifest] = None):
     """
         Main function that runs the entire process.
+        If a manifest is given, the process runs without any user interaction (headless mode).
+
+        Args:
+            manifest (Optional[Manifest]): The manifest of the headless run. Defaults to None.
     """
+    if manifest is not None:
+        run_headless(manifest)
+        return
     display_logo()
     settings: Settings = update_settings()
-    extract_tracks_from_mkv()
-    refactor_subtitles()
+    extract_tracks_from_mkv(settings)
+    refactor_subtitles(settings)
     translate_subtitles(settings)
     convert_numbers_to_words()
     generate_audio_for_subtitles(settings)
@@ -405,7 +582,24 @@ if __name__ == '__main__':
     directories: List[str] = [WORKING_SPACE, WORKING_SPACE_OUTPUT,
                               WORKING_SPACE_TEMP, WORKING_SPACE_TEMP_MAIN_SUBS, WORKING_SPACE_TEMP_ALT_SUBS]
     check_and_create_directories(directories)
-    main()
-    console.print(
-        '\n[green_italic]Naciśnij dowolny klawisz, aby zakończyć działanie programu...', end='')
-    getch()
+    arguments: Namespace = parse_arguments()
+    if arguments.export_memory or arguments.import_memory:
+        transfer_translation_memory(arguments.export_memory, arguments.import_memory)
+    elif arguments.dry_run:
+        dry_run_track_selection(Manifest.load_from_file(arguments.manifest).settings if arguments.manifest
+                                else Settings.load_from_file())
+    elif arguments.manifest or arguments.watch:
+        job_manifest: Manifest = Manifest.load_from_file(arguments.manifest) if arguments.manifest \
+            else Manifest(settings=Settings.load_from_file())
+        if arguments.workers:
+            job_manifest.workers = max(1, arguments.workers)
+        if arguments.watch:
+            run_daemon(job_manifest, arguments.worker_name)
+        else:
+            main(job_manifest)
+    else:
+        from msvcrt import getch  # Windows only; the headless and watch modes run on any system
+        main()
+        console.print(
+            '\n[green_italic]Naciśnij dowolny klawisz, aby zakończyć działanie programu...', end='')
+        getch()
@@ -0,0 +1,82 @@
+"""
+    Tests of packing subtitles into chunks sent to a translator in one request.
+
+    * Usage:
+        python -m unittest discover -s tests -p "test_*.py"   (from the mm_avh directory)
+"""
+
+import sys
+import unittest
+from os import path
+from typing import List
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from modules.chunk_planner import ChunkBudget, ChunkPlanner, get_scene_ids  # noqa: E402 pylint: disable=wrong-import-position
+
+
+def texts_of_length(count: int, length: int) -> List[str]:
+    """
+        Returns cues of the same length.
+    """
+    return ['x' * length] * count
+
+
+class ChunkPlannerTest(unittest.TestCase):
+    """
+        Plans the chunks of a list of cues.
+    """
+
+    def test_chunks_fill_character_budget(self) -> None:
+        planner: ChunkPlanner = ChunkPlanner(budget=ChunkBudget(max_chars=100), cue_overhead=0)
+        self.assertEqual(planner.plan(texts_of_length(7, 30)), [[0, 1, 2], [3, 4, 5], [6]])
+
+    def test_cue_overhead_counts_to_budget(self) -> None:
+        planner: ChunkPlanner = ChunkPlanner(budget=ChunkBudget(max_chars=100), cue_overhead=10)
+        self.assertEqual(planner.plan(texts_of_length(4, 30)), [[0, 1], [2, 3]])
+
+    def test_cue_limit(self) -> None:
+        planner: ChunkPlanner = ChunkPlanner(budget=ChunkBudget(max_chars=10000, max_cues=2), cue_overhead=0)
+        self.assertEqual(planner.plan(texts_of_length(5, 10)), [[0, 1], [2, 3], [4]])
+
+    def test_token_limit(self) -> None:
+        planner: ChunkPlanner = ChunkPlanner(budget=ChunkBudget(max_chars=10000, max_tokens=10), cue_overhead=0)
+        self.assertEqual(planner.plan(texts_of_length(4, 20)), [[0, 1], [2, 3]])
+
+    def test_cue_larger_than_budget_gets_own_chunk(self) -> None:
+        planner: ChunkPlanner = ChunkPlanner(budget=ChunkBudget(max_chars=100), cue_overhead=0)
+        self.assertEqual(planner.plan(['a' * 10, 'b' * 500, 'c' * 10]), [[0], [1], [2]])
+
+    def test_chunk_ends_at_scene_change(self) -> None:
+        planner: ChunkPlanner = ChunkPlanner(budget=ChunkBudget(max_chars=100), cue_overhead=0)
+        texts: List[str] = texts_of_length(8, 20)
+        self.assertEqual(planner.plan(texts), [[0, 1, 2, 3, 4], [5, 6, 7]])
+        self.assertEqual(planner.plan(texts, [0, 0, 0, 0, 1, 1, 1, 1]), [[0, 1, 2, 3], [4, 5, 6, 7]])
+
+    def test_scene_change_in_almost_empty_chunk_is_ignored(self) -> None:
+        planner: ChunkPlanner = ChunkPlanner(budget=ChunkBudget(max_chars=100), cue_overhead=0)
+        self.assertEqual(planner.plan(texts_of_length(8, 20), [0, 1, 1, 1, 1, 1, 1, 1]),
+                         [[0, 1, 2, 3, 4], [5, 6, 7]])
+
+    def test_no_cues(self) -> None:
+        self.assertEqual(ChunkPlanner().plan([]), [])
+
+    def test_provider_budget_with_line_count(self) -> None:
+        self.assertEqual(ChunkPlanner.for_provider('Google Translate', 30).budget.max_cues, 30)
+        self.assertEqual(ChunkPlanner.for_provider('Google Translate', 1000).budget.max_cues, 150)
+        self.assertEqual(ChunkPlanner.for_provider('DeepL Desktop Free', 20).budget.max_cues, 20)
+        self.assertIsNone(ChunkPlanner.for_provider('DeepL Desktop Free').budget.max_cues)
+
+
+class SceneIdsTest(unittest.TestCase):
+    """
+        Numbers the scenes of cues by the pauses between them.
+    """
+
+    def test_long_pause_starts_new_scene(self) -> None:
+        self.assertEqual(get_scene_ids([0, 1100, 5000, 6000], [1000, 2000, 5500, 7000], scene_gap=2500),
+                         [0, 0, 1, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+    Tests of the protocol used to send a chunk of subtitles to a translator as one text:
+    reading the response back into cues and sending again only what could not be read.
+
+    * Usage:
+        python -m unittest discover -s tests -p "test_*.py"   (from the mm_avh directory)
+"""
+
+import sys
+import unittest
+from os import path
+from typing import Callable, List
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from modules.cue_protocol import decode_cues, encode_cues, translate_cues  # noqa: E402 pylint: disable=wrong-import-position
+
+
+def upper_translator(calls: List[List[str]]) -> Callable[[List[str]], str]:
+    """
+        Returns a translator which upper-cases the cues and records the cues of every request.
+    """
+    def request(texts: List[str]) -> str:
+        calls.append(list(texts))
+        return encode_cues([text.upper() for text in texts])
+    return request
+
+
+class DecodeCuesTest(unittest.TestCase):
+    """
+        Splits responses of the translator into cues.
+    """
+
+    def test_round_trip_keeps_line_breaks(self) -> None:
+        texts: List[str] = ['Hello!', 'How are you?\nFine.']
+        self.assertEqual(decode_cues(encode_cues(texts), 2), texts)
+
+    def test_punctuation_moved_after_line_break_marker(self) -> None:
+        self.assertEqual(decode_cues('◍◍1◍◍ Dobrze ◍, dzięki', 1), ['Dobrze,\ndzięki'])
+
+    def test_markers_with_spaces(self) -> None:
+        self.assertEqual(decode_cues('◍ ◍ 1 ◍ ◍ Cześć\n◍◍ 2 ◍◍ Hej', 2), ['Cześć', 'Hej'])
+
+    def test_missing_marker(self) -> None:
+        self.assertEqual(decode_cues('◍◍1◍◍ Jeden\n◍◍3◍◍ Trzy', 3), ['Jeden', None, 'Trzy'])
+
+    def test_duplicate_marker(self) -> None:
+        self.assertEqual(decode_cues('◍◍1◍◍ Jeden\n◍◍2◍◍ Dwa\n◍◍2◍◍ Dwa', 2), ['Jeden', None])
+
+    def test_glued_cues(self) -> None:
+        self.assertEqual(decode_cues('◍◍1◍◍ Jeden\nDwa\n◍◍3◍◍ Trzy', 3), [None, None, 'Trzy'])
+
+    def test_broken_marker(self) -> None:
+        self.assertEqual(decode_cues('◍◍1◍◍ Jeden ◍◍2 Dwa\n◍◍2◍◍ Dwa', 2), [None, 'Dwa'])
+
+    def test_empty_cue(self) -> None:
+        self.assertEqual(decode_cues('◍◍1◍◍\n◍◍2◍◍ Dwa', 2), [None, 'Dwa'])
+
+    def test_unreadable_response(self) -> None:
+        self.assertEqual(decode_cues('Przepraszam, nie mogę tego przetłumaczyć.', 2), [None, None])
+
+
+class TranslateCuesTest(unittest.TestCase):
+    """
+        Translates cues and retries the ones which could not be read.
+    """
+
+    def test_translates_all_cues_in_one_request(self) -> None:
+        calls: List[List[str]] = []
+        self.assertEqual(translate_cues(upper_translator(calls), ['a', 'b\nc']), ['A', 'B\nC'])
+        self.assertEqual(calls, [['a', 'b\nc']])
+
+    def test_empty_cues_are_not_sent(self) -> None:
+        calls: List[List[str]] = []
+        self.assertEqual(translate_cues(upper_translator(calls), ['a', ' ', 'c']), ['A', '', 'C'])
+        self.assertEqual(calls, [['a', 'c']])
+
+    def test_sends_again_only_missing_cues(self) -> None:
+        calls: List[List[str]] = []
+
+        def request(texts: List[str]) -> str:
+            calls.append(list(texts))
+            if len(calls) == 1:
+                return '◍◍1◍◍ A\n◍◍3◍◍ C'
+            return encode_cues([text.upper() for text in texts])
+
+        self.assertEqual(translate_cues(request, ['a', 'b', 'c']), ['A', 'B', 'C'])
+        self.assertEqual(calls, [['a', 'b', 'c'], ['b']])
+
+    def test_splits_unreadable_response_in_half(self) -> None:
+        calls: List[List[str]] = []
+
+        def request(texts: List[str]) -> str:
+            calls.append(list(texts))
+            if len(calls) == 1:
+                return 'Nie rozumiem.'
+            return encode_cues([text.upper() for text in texts])
+
+        self.assertEqual(translate_cues(request, ['a', 'b', 'c', 'd']), ['A', 'B', 'C', 'D'])
+        self.assertEqual(calls, [['a', 'b', 'c', 'd'], ['a', 'b'], ['c', 'd']])
+
+    def test_gives_up_after_retries(self) -> None:
+        calls: List[int] = []
+
+        def request(texts: List[str]) -> str:
+            calls.append(len(texts))
+            return 'Nie rozumiem.'
+
+        self.assertEqual(translate_cues(request, ['a', 'b', 'c', 'd']), [None] * 4)
+        self.assertEqual(calls, [4, 2, 1, 1, 2, 1, 1])
+
+    def test_request_error_is_raised_at_once(self) -> None:
+        calls: List[int] = []
+
+        def request(texts: List[str]) -> str:
+            calls.append(len(texts))
+            raise ConnectionError('403 Forbidden')
+
+        with self.assertRaises(ConnectionError):
+            translate_cues(request, ['a', 'b', 'c', 'd'])
+        self.assertEqual(calls, [4])
+
+
+if __name__ == '__main__':
+    unittest.main()
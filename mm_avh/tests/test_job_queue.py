@@ -0,0 +1,103 @@
+"""
+    Tests of the persistent job queue shared by several workers: claiming, lease expiry and recording results.
+
+    * Usage:
+        python -m unittest discover -s tests -p "test_*.py"   (from the mm_avh directory)
+"""
+
+import sys
+import unittest
+from os import path
+from tempfile import TemporaryDirectory
+from typing import Optional
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from modules.job_queue import Job, JobQueue  # noqa: E402 pylint: disable=wrong-import-position
+
+
+class JobQueueTest(unittest.TestCase):
+    """
+        Runs the queue on a database in a temporary directory.
+    """
+
+    def setUp(self) -> None:
+        self.temp_dir: TemporaryDirectory = TemporaryDirectory()
+        self.db_path: str = path.join(self.temp_dir.name, 'queue.db')
+        self.queue: JobQueue = JobQueue(db_path=self.db_path)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def claim(self, queue: JobQueue, worker: str) -> Job:
+        """
+            Claims a job and fails the test if there is none.
+        """
+        job: Optional[Job] = queue.claim(worker)
+        self.assertIsNotNone(job)
+        return job
+
+    def test_same_file_version_is_queued_once(self) -> None:
+        self.assertTrue(self.queue.enqueue('a.mkv', 100, 1.0))
+        self.assertFalse(self.queue.enqueue('a.mkv', 100, 1.0))
+        self.assertTrue(self.queue.enqueue('a.mkv', 100, 2.0))
+
+    def test_claim_skips_episodes_in_progress(self) -> None:
+        for filename in ('a.mkv', 'a.srt', 'b.mkv'):
+            self.queue.enqueue(filename, 100, 1.0)
+        self.assertEqual(self.claim(self.queue, 'PC-1').filename, 'a.mkv')
+        self.assertEqual(self.claim(self.queue, 'PC-2').filename, 'b.mkv')
+        self.assertIsNone(self.queue.claim('PC-1'))
+
+    def test_finish_records_success(self) -> None:
+        self.queue.enqueue('a.mkv', 100, 1.0)
+        job: Job = self.claim(self.queue, 'PC-1')
+        self.assertTrue(self.queue.holds_lease(job.id, 'PC-1'))
+        self.assertTrue(self.queue.finish(job.id, 'PC-1', success=True))
+        self.assertFalse(self.queue.holds_lease(job.id, 'PC-1'))
+        self.assertEqual(self.queue.get_counts(), {'done': 1})
+
+    def test_failed_job_is_retried_until_max_attempts(self) -> None:
+        queue: JobQueue = JobQueue(db_path=self.db_path, max_attempts=2)
+        queue.enqueue('a.mkv', 100, 1.0)
+        queue.finish(self.claim(queue, 'PC-1').id, 'PC-1', success=False, error='Błąd')
+        self.assertEqual(queue.get_counts(), {'queued': 1})
+        job: Job = self.claim(queue, 'PC-1')
+        self.assertEqual(job.attempts, 2)
+        queue.finish(job.id, 'PC-1', success=False, error='Błąd')
+        self.assertEqual(queue.get_counts(), {'failed': 1})
+        self.assertIsNone(queue.claim('PC-1'))
+
+    def test_expired_lease_is_taken_over(self) -> None:
+        expiring_queue: JobQueue = JobQueue(db_path=self.db_path, lease_time=-1.0)
+        expiring_queue.enqueue('a.mkv', 100, 1.0)
+        lost_job: Job = self.claim(expiring_queue, 'PC-1')
+
+        job: Job = self.claim(self.queue, 'PC-2')
+        self.assertEqual(job.id, lost_job.id)
+        self.assertEqual(job.attempts, 2)
+        self.assertFalse(self.queue.holds_lease(job.id, 'PC-1'))
+        self.assertFalse(self.queue.heartbeat(job.id, 'PC-1'))
+        self.assertTrue(self.queue.heartbeat(job.id, 'PC-2'))
+
+    def test_finish_after_losing_lease_is_ignored(self) -> None:
+        expiring_queue: JobQueue = JobQueue(db_path=self.db_path, lease_time=-1.0)
+        expiring_queue.enqueue('a.mkv', 100, 1.0)
+        lost_job: Job = self.claim(expiring_queue, 'PC-1')
+        job: Job = self.claim(self.queue, 'PC-2')
+
+        self.assertFalse(self.queue.finish(lost_job.id, 'PC-1', success=False, error='Błąd'))
+        self.assertTrue(self.queue.holds_lease(job.id, 'PC-2'))
+        self.assertTrue(self.queue.finish(job.id, 'PC-2', success=True))
+        self.assertEqual(self.queue.get_counts(), {'done': 1})
+
+    def test_release_queues_jobs_without_counting_attempt(self) -> None:
+        self.queue.enqueue('a.mkv', 100, 1.0)
+        self.claim(self.queue, 'PC-1')
+        self.assertEqual(self.queue.release('PC-2'), 0)
+        self.assertEqual(self.queue.release('PC-1'), 1)
+        self.assertEqual(self.claim(self.queue, 'PC-2').attempts, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
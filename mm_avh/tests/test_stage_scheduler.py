@@ -0,0 +1,124 @@
+"""
+    Tests of the stages of one episode running at the same time, as the 'StageScheduler' runs them:
+    the alternative subtitles are prepared while the audio is generated.
+    Every stage must record, cache and restore only its own files.
+
+    * Usage:
+        python -m unittest discover -s tests -p "test_*.py"   (from the mm_avh directory)
+"""
+
+import sys
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from os import makedirs, path, remove
+from tempfile import TemporaryDirectory
+from threading import Barrier
+from typing import Dict
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from data.manifest import ManifestFile  # noqa: E402 pylint: disable=wrong-import-position
+from data.settings import Settings  # noqa: E402 pylint: disable=wrong-import-position
+from modules.artifact_cache import ArtifactCache  # noqa: E402 pylint: disable=wrong-import-position
+from modules.episode_journal import EpisodeJournal  # noqa: E402 pylint: disable=wrong-import-position
+from modules.episode_pipeline import EpisodePipeline  # noqa: E402 pylint: disable=wrong-import-position
+
+
+class FakeEpisodePipeline(EpisodePipeline):
+    """
+        An episode pipeline whose audio and alternative subtitles stages only move files around.
+        Both stages wait for each other before and after changing their files, so they always overlap.
+    """
+
+    def __init__(self, working_space: str, barrier: Barrier, cache: ArtifactCache = None) -> None:
+        super().__init__(entry=ManifestFile('episode.mkv'),
+                         settings=Settings(tts='TTS - Zosia - Harpo', tts_speed='1', tts_volume='1'),
+                         working_space=working_space,
+                         working_space_output=path.join(working_space, 'output'),
+                         working_space_temp=path.join(working_space, 'temp'),
+                         working_space_temp_main_subs=path.join(working_space, 'temp', 'main_subs'),
+                         working_space_temp_alt_subs=path.join(working_space, 'temp', 'alt_subs'),
+                         cache=cache)
+        self.barrier: Barrier = barrier
+
+    def get_journal(self) -> EpisodeJournal:
+        return EpisodeJournal(self.entry.stem, journal_dir=path.join(self.working_space, 'journal'))
+
+    def generate_audio(self) -> None:
+        self.barrier.wait()
+        write_file(path.join(self.working_space_output, 'episode.eac3'), 'audio')
+        remove(path.join(self.working_space_temp_main_subs, 'episode.srt'))
+        self.barrier.wait()
+
+    def refactor_alt(self) -> None:
+        self.barrier.wait()
+        write_file(path.join(self.working_space_output, 'episode.ass'), 'alt subs')
+        remove(path.join(self.working_space_temp_alt_subs, 'episode.srt'))
+        self.barrier.wait()
+
+
+def write_file(file_path: str, content: str) -> None:
+    """
+        Writes a text file, creating its directory if needed.
+    """
+    makedirs(path.dirname(file_path), exist_ok=True)
+    with open(file_path, 'w', encoding='utf-8') as file:
+        file.write(content)
+
+
+class ConcurrentStagesTest(unittest.TestCase):
+    """
+        Runs the 'tts' and 'alt_subs' stages of one episode at the same time.
+    """
+
+    def setUp(self) -> None:
+        self.temp_dir: TemporaryDirectory = TemporaryDirectory()
+        self.working_space: str = self.temp_dir.name
+        self.prepare_files()
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def prepare_files(self) -> None:
+        """
+            Creates the files left by the translation: the main and the alternative subtitles.
+        """
+        write_file(path.join(self.working_space, 'temp', 'main_subs', 'episode.srt'), 'main subs')
+        write_file(path.join(self.working_space, 'temp', 'alt_subs', 'episode.srt'), 'alt subs')
+        makedirs(path.join(self.working_space, 'output'), exist_ok=True)
+
+    def run_concurrently(self, pipeline: EpisodePipeline) -> None:
+        """
+            Runs the 'tts' and 'alt_subs' stages of the episode in two threads.
+        """
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            for future in [executor.submit(pipeline.run_stage, 'tts'),
+                           executor.submit(pipeline.run_stage, 'alt_subs')]:
+                future.result(timeout=10)
+
+    def test_journal_records_only_own_outputs(self) -> None:
+        pipeline: FakeEpisodePipeline = FakeEpisodePipeline(self.working_space, Barrier(2, timeout=5))
+        self.run_concurrently(pipeline)
+
+        outputs: Dict[str, Dict[str, str]] = pipeline.get_journal().get_finished_stages()
+        self.assertEqual(list(outputs['tts']), [path.join('output', 'episode.eac3')])
+        self.assertEqual(list(outputs['alt_subs']), [path.join('output', 'episode.ass')])
+
+    def test_cache_restore_keeps_files_of_other_stages(self) -> None:
+        cache: ArtifactCache = ArtifactCache(cache_dir=path.join(self.working_space, 'cache'))
+        pipeline: FakeEpisodePipeline = FakeEpisodePipeline(self.working_space, Barrier(2, timeout=5), cache)
+        self.run_concurrently(pipeline)
+
+        pipeline.get_journal().clear()
+        remove(path.join(self.working_space, 'output', 'episode.eac3'))
+        self.prepare_files()
+        pipeline.run_stage('tts')
+
+        self.assertFalse(path.exists(path.join(self.working_space, 'temp', 'main_subs', 'episode.srt')))
+        self.assertTrue(path.exists(path.join(self.working_space, 'output', 'episode.eac3')))
+        self.assertTrue(path.exists(path.join(self.working_space, 'temp', 'alt_subs', 'episode.srt')))
+        self.assertTrue(path.exists(path.join(self.working_space, 'output', 'episode.ass')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+    Tests of the persistent memory of translated subtitle lines: the exact and normalized lookup,
+    and the export and import between machines.
+
+    * Usage:
+        python -m unittest discover -s tests -p "test_*.py"   (from the mm_avh directory)
+"""
+
+import sys
+import unittest
+from json import dumps, loads
+from os import path
+from tempfile import TemporaryDirectory
+from typing import Dict, List
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from modules.translation_memory import TranslationMemory, normalize_text  # noqa: E402 pylint: disable=wrong-import-position
+
+
+class TranslationMemoryTest(unittest.TestCase):
+    """
+        Stores and looks up translations in a memory in a temporary directory.
+    """
+
+    def setUp(self) -> None:
+        self.temp_dir: TemporaryDirectory = TemporaryDirectory()
+        self.memory: TranslationMemory = TranslationMemory(db_path=path.join(self.temp_dir.name, 'memory.db'))
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_normalize_text(self) -> None:
+        self.assertEqual(normalize_text('  Let\'s\nGO! '), 'let\'s go!')
+
+    def test_exact_lookup(self) -> None:
+        self.memory.store([('What?', 'Co?'), ('Let\'s go!', 'Chodźmy!')], 'DeepL API')
+        self.assertEqual(self.memory.lookup(['Let\'s go!', 'Hello', 'What?'], 'DeepL API'),
+                         ['Chodźmy!', None, 'Co?'])
+
+    def test_normalized_lookup(self) -> None:
+        self.memory.store([('What?', 'Co?')], 'DeepL API')
+        self.assertEqual(self.memory.lookup(['WHAT?', ' what? '], 'DeepL API'), ['Co?', 'Co?'])
+
+    def test_exact_match_wins_over_normalized(self) -> None:
+        self.memory.store([('WHAT?', 'CO?'), ('What?', 'Co?')], 'DeepL API')
+        self.assertEqual(self.memory.lookup(['WHAT?', 'What?'], 'DeepL API'), ['CO?', 'Co?'])
+
+    def test_translations_are_kept_per_provider(self) -> None:
+        self.memory.store([('What?', 'Co?')], 'DeepL API')
+        self.assertEqual(self.memory.lookup(['What?'], 'Google Translate'), [None])
+
+    def test_empty_translations_are_not_stored(self) -> None:
+        self.memory.store([('What?', ' '), (' ', 'Co?')], 'DeepL API')
+        self.assertEqual(self.memory.get_count(), 0)
+
+    def test_store_replaces_translation(self) -> None:
+        self.memory.store([('What?', 'Co?')], 'DeepL API')
+        self.memory.store([('What?', 'Że co?')], 'DeepL API')
+        self.assertEqual(self.memory.lookup(['What?'], 'DeepL API'), ['Że co?'])
+        self.assertEqual(self.memory.get_count(), 1)
+
+    def test_import_replaces_only_older_translations(self) -> None:
+        self.memory.store([('What?', 'Co?'), ('Hello', 'Cześć')], 'DeepL API')
+        export_path: str = path.join(self.temp_dir.name, 'memory.jsonl')
+        self.memory.export_to_file(export_path)
+        with open(export_path, 'r', encoding='utf-8') as file:
+            rows: List[Dict[str, str]] = [loads(line) for line in file]
+        for row in rows:
+            if row['source'] == 'What?':
+                row.update(target='Że co?', updated_at='2000-01-01 00:00:00')
+            else:
+                row.update(target='Witaj', updated_at='2999-01-01 00:00:00')
+        rows.append({'source': 'Bye', 'source_lang': 'auto', 'target_lang': 'pl', 'provider': 'DeepL API',
+                     'target': 'Pa', 'updated_at': '2000-01-01 00:00:00'})
+        with open(export_path, 'w', encoding='utf-8') as file:
+            file.write(''.join(dumps(row, ensure_ascii=False) + '\n' for row in rows))
+
+        self.assertEqual(self.memory.import_from_file(export_path), 2)
+        self.assertEqual(self.memory.lookup(['What?', 'Hello', 'Bye'], 'DeepL API'), ['Co?', 'Witaj', 'Pa'])
+
+    def test_import_rejects_invalid_line(self) -> None:
+        import_path: str = path.join(self.temp_dir.name, 'invalid.jsonl')
+        with open(import_path, 'w', encoding='utf-8') as file:
+            file.write('{"source": "What?"}\n')
+        with self.assertRaises(ValueError):
+            self.memory.import_from_file(import_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,296 @@
+"""
+    Module ffmpeg_progress runs ffmpeg with '-progress pipe:1' and turns its output into structured progress events
+    (frame, fps, speed, out_time, bitrate). The events are passed to callbacks and shown as a rich progress bar,
+    and the encode speed of every finished job is appended to the metrics file (FFMPEG_METRICS_PATH),
+    which shows how many jobs a worker can run at once and which jobs encode far below realtime.
+
+    * Example usage:
+        run_ffmpeg([FFMPEG_PATH, '-y', '-i', 'in.wav', '-c:a', 'eac3', 'out.eac3'], job='example.eac3')
+
+    * Example usage with a callback:
+        def on_progress(event: ProgressEvent) -> None:
+            print(event.out_time, event.speed)
+
+        run_ffmpeg(command, job='example.mp4', on_progress=on_progress, show_progress=False)
+
+    * Example line of the metrics file:
+        {"job": "example.mp4", "host": "PC", "date": "2026-10-18T12:00:00", "success": true,
+         "elapsed": 412.3, "duration": 1420.5, "out_time": 1420.5, "frames": 34058, "fps": 82.6, "speed": 3.45}
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from json import dumps
+from os import makedirs, path
+from re import compile as re_compile, Match, Pattern
+from socket import gethostname
+from subprocess import CalledProcessError, TimeoutExpired
+from typing import Callable, Dict, List, Optional, Sequence
+
+from rich.progress import (BarColumn, Progress, TaskID, TextColumn,
+                           TimeRemainingColumn)
+
+from constants import FFMPEG_METRICS_PATH, console
+from utils.process_runner import ProcessResult, run_process
+
+DURATION_PATTERN: Pattern = re_compile(r'Duration: (\d+):(\d{2}):(\d{2}(?:\.\d+)?)')
+SLOW_SPEED: float = 0.5
+
+
+@dataclass(slots=True)
+class ProgressEvent:
+    """
+        One progress report of ffmpeg (one block of '-progress' output).
+
+        Attributes:
+            - frame (int): The number of encoded video frames (0 for audio-only jobs).
+            - fps (float): The current encoding rate in frames per second.
+            - speed (Optional[float]): The current speed relative to realtime (2.0 means twice as fast), None if unknown.
+            - out_time (float): The position in the output in seconds.
+            - bitrate (Optional[float]): The current output bitrate in kbit/s, None if unknown.
+            - duration (Optional[float]): The expected length of the output in seconds, None if unknown.
+            - done (bool): Whether this is the last report of the job.
+    """
+    frame: int = 0
+    fps: float = 0.0
+    speed: Optional[float] = None
+    out_time: float = 0.0
+    bitrate: Optional[float] = None
+    duration: Optional[float] = None
+    done: bool = False
+
+    @property
+    def percent(self) -> Optional[float]:
+        """
+            Returns the progress of the job in percent, or None if the duration is unknown.
+        """
+        if not self.duration:
+            return None
+        return min(100.0, self.out_time / self.duration * 100)
+
+
+@dataclass(slots=True)
+class FfmpegProgress:
+    """
+        Parses the output of ffmpeg into progress events.
+        The '-progress' output (key=value lines, a block ends with 'progress=continue' or 'progress=end')
+        comes from the standard output; the duration of the input is read from the standard error output.
+
+        Attributes:
+            - duration (Optional[float]): The expected length of the output in seconds; read from the first input if None.
+            - callbacks (List[Callable[[ProgressEvent], None]]): Called with every progress event.
+            - values (Dict[str, str]): The values of the current block.
+            - last_event (Optional[ProgressEvent]): The last reported event.
+
+        Methods:
+            - feed_progress_line(self, line: str) -> None: Parses a line of the '-progress' output.
+            - feed_stderr_line(self, line: str) -> None: Parses a line of the standard error output.
+    """
+    duration: Optional[float] = None
+    callbacks: List[Callable[[ProgressEvent], None]] = field(default_factory=list)
+    values: Dict[str, str] = field(default_factory=dict)
+    last_event: Optional[ProgressEvent] = None
+
+    def feed_progress_line(self, line: str) -> None:
+        """
+            Parses a line of the '-progress' output and reports an event at the end of every block.
+
+            Args:
+                - line (str): The line, e.g. 'out_time_us=1234567'.
+        """
+        key, separator, value = line.strip().partition('=')
+        if not separator:
+            return
+        self.values[key] = value.strip()
+        if key == 'progress':
+            event: ProgressEvent = self._create_event(value.strip() == 'end')
+            self.values = {}
+            self.last_event = event
+            for callback in self.callbacks:
+                callback(event)
+
+    def feed_stderr_line(self, line: str) -> None:
+        """
+            Reads the duration of the first input from a line of the standard error output, if it is not known yet.
+
+            Args:
+                - line (str): The line, e.g. '  Duration: 00:23:40.50, start: 0.000000, bitrate: 5321 kb/s'.
+        """
+        if self.duration is not None:
+            return
+        match: Optional[Match] = DURATION_PATTERN.search(line)
+        if match:
+            hours, minutes, seconds = match.groups()
+            self.duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+    def _create_event(self, done: bool) -> ProgressEvent:
+        """
+            Creates an event from the values of the current block. Values reported as 'N/A' are None or 0.
+
+            Args:
+                - done (bool): Whether this is the last block of the job.
+
+            Returns:
+                - ProgressEvent: The event.
+        """
+        out_time_us: Optional[float] = self._get_number('out_time_us')
+        if out_time_us is None:
+            out_time_us = self._get_number('out_time_ms')  # microseconds too, despite the name
+        return ProgressEvent(frame=int(self._get_number('frame') or 0),
+                             fps=self._get_number('fps') or 0.0,
+                             speed=self._get_number('speed', 'x'),
+                             out_time=max(0.0, (out_time_us or 0.0) / 1e6),
+                             bitrate=self._get_number('bitrate', 'kbits/s'),
+                             duration=self.duration,
+                             done=done)
+
+    def _get_number(self, key: str, unit: str = '') -> Optional[float]:
+        """
+            Returns a numeric value of the current block.
+
+            Args:
+                - key (str): The key of the value.
+                - unit (str): The unit written after the number, e.g. 'x' for the speed.
+
+            Returns:
+                - Optional[float]: The number or None if it is missing or 'N/A'.
+        """
+        value: str = self.values.get(key, '')
+        if unit and value.endswith(unit):
+            value = value[:-len(unit)]
+        try:
+            return float(value)
+        except ValueError:
+            return None
+
+
+def run_ffmpeg(command: Sequence[str],
+               job: str,
+               duration: Optional[float] = None,
+               on_progress: Optional[Callable[[ProgressEvent], None]] = None,
+               show_progress: bool = True,
+               metrics_path: Optional[str] = FFMPEG_METRICS_PATH,
+               **kwargs) -> ProcessResult:
+    """
+        Runs ffmpeg with progress reporting and records the encode speed of the job in the metrics file.
+
+        Args:
+            - command (Sequence[str]): The ffmpeg command; '-progress pipe:1 -nostats' is added after the executable.
+            - job (str): The name of the job shown in the progress bar and the metrics file, e.g. the output file name.
+            - duration (Optional[float]): The expected length of the output in seconds. Defaults to the first input.
+            - on_progress (Optional[Callable[[ProgressEvent], None]]): Called with every progress event.
+            - show_progress (bool): Whether to show a rich progress bar. Defaults to True.
+            - metrics_path (Optional[str]): The metrics file, or None to record nothing.
+            - **kwargs: Other options of 'ProcessRunner.run_async', e.g. the timeout.
+
+        Returns:
+            - ProcessResult: The result of the process.
+
+        Raises:
+            - FileNotFoundError: If ffmpeg does not exist.
+            - CalledProcessError: If ffmpeg fails (the last lines of its output are printed).
+    """
+    command = [command[0], '-progress', 'pipe:1', '-nostats', *command[1:]]
+    progress: FfmpegProgress = FfmpegProgress(duration=duration)
+    if on_progress is not None:
+        progress.callbacks.append(on_progress)
+
+    progress_bar: Optional[Progress] = None
+    if show_progress:
+        progress_bar = Progress(TextColumn('[bold blue]{task.description}'),
+                                BarColumn(),
+                                TextColumn('{task.percentage:>5.1f}%'),
+                                TextColumn('{task.fields[status]}'),
+                                TimeRemainingColumn(),
+                                console=console)
+        task_id: TaskID = progress_bar.add_task(job, total=None, status='')
+        progress.callbacks.append(
+            lambda event: _update_progress_bar(progress_bar, task_id, event))
+        progress_bar.start()
+
+    success: bool = False
+    elapsed: Optional[float] = None
+    try:
+        result: ProcessResult = run_process(command, tool='ffmpeg',
+                                            on_stdout_line=progress.feed_progress_line,
+                                            on_stderr_line=progress.feed_stderr_line,
+                                            **kwargs)
+        success = True
+        elapsed = result.elapsed
+        return result
+    except CalledProcessError as error:
+        elapsed = getattr(error, 'elapsed', None)
+        for line in (error.stderr or '').splitlines()[-5:]:
+            console.print(line, style='red_italic', markup=False)
+        raise
+    except TimeoutExpired as error:
+        elapsed = getattr(error, 'elapsed', None)
+        raise
+    finally:
+        if progress_bar is not None:
+            progress_bar.stop()
+        if metrics_path is not None:
+            _record_metrics(metrics_path, job, success, elapsed, progress)
+
+
+def _update_progress_bar(progress_bar: Progress, task_id: TaskID, event: ProgressEvent) -> None:
+    """
+        Shows a progress event in the progress bar.
+
+        Args:
+            - progress_bar (Progress): The progress bar.
+            - task_id (TaskID): The task of the job.
+            - event (ProgressEvent): The event.
+    """
+    status: List[str] = []
+    if event.speed is not None:
+        status.append(f'{event.speed:.2f}x')
+    if event.fps:
+        status.append(f'{event.fps:.0f} fps')
+    if event.bitrate is not None:
+        status.append(f'{event.bitrate:.0f} kbit/s')
+    progress_bar.update(task_id,
+                        total=event.duration,
+                        completed=event.duration if event.done and event.duration else event.out_time,
+                        status=' '.join(status))
+
+
+def _record_metrics(metrics_path: str, job: str, success: bool, elapsed: Optional[float],
+                    progress: FfmpegProgress) -> None:
+    """
+        Appends the encode speed of a finished job to the metrics file
+        and warns about jobs encoding far below realtime.
+
+        Args:
+            - metrics_path (str): The metrics file.
+            - job (str): The name of the job.
+            - success (bool): Whether the job succeeded.
+            - elapsed (Optional[float]): The run time of ffmpeg in seconds, without waiting for a free ffmpeg slot;
+              None if ffmpeg did not run (e.g. it was not found or the job was cancelled).
+            - progress (FfmpegProgress): The progress parser of the job.
+    """
+    event: ProgressEvent = progress.last_event or ProgressEvent(duration=progress.duration)
+    speed: Optional[float] = event.out_time / elapsed if elapsed and event.out_time else None
+    metrics: Dict[str, object] = {
+        'job': job,
+        'host': gethostname(),
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'success': success,
+        'elapsed': round(elapsed, 3) if elapsed is not None else None,
+        'duration': progress.duration,
+        'out_time': round(event.out_time, 3),
+        'frames': event.frame,
+        'fps': round(event.frame / elapsed, 2) if elapsed else None,
+        'speed': round(speed, 3) if speed is not None else None
+    }
+    try:
+        makedirs(path.dirname(metrics_path) or '.', exist_ok=True)
+        with open(metrics_path, 'a', encoding='utf-8') as file:
+            file.write(dumps(metrics, ensure_ascii=False) + '\n')
+    except OSError as error:
+        console.print(
+            f'Nie można zapisać metryk ffmpeg: {error}', style='red_italic')
+
+    if success and speed is not None and speed < SLOW_SPEED:
+        console.print(
+            f'{job}: kodowanie {speed:.2f}x - znacznie wolniej niż w czasie rzeczywistym.', style='yellow_bold')
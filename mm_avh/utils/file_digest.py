@@ -0,0 +1,66 @@
+"""
+    Module file_digest provides functions to compute content hashes of files.
+    Small files are hashed in full; for large media files only the size and the first and last
+    chunks are hashed, which is enough to detect a different or modified file without reading gigabytes.
+    These digests are change hints only; two different large files can share one, so they must not be used
+    to address stored content.
+
+    * Example usage:
+        digest = file_digest('example.srt')
+        snapshot = directory_digests(['temp', 'output'], root='working_space', name_filter=lambda name: name.startswith('example'))
+"""
+
+from hashlib import sha256
+from os import listdir, path
+from typing import Callable, Dict, List
+
+CHUNK_SIZE: int = 1024 * 1024
+FULL_HASH_LIMIT: int = 64 * 1024 * 1024
+
+
+def file_digest(file_path: str) -> str:
+    """
+        Computes the SHA-256 digest of a file.
+        Files larger than FULL_HASH_LIMIT are fingerprinted by their size and their first and last CHUNK_SIZE bytes.
+
+        Args:
+            - file_path (str): The path to the file.
+
+        Returns:
+            - str: The hexadecimal digest of the file.
+    """
+    size: int = path.getsize(file_path)
+    digest = sha256()
+    with open(file_path, 'rb') as file:
+        if size <= FULL_HASH_LIMIT:
+            for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+        else:
+            digest.update(str(size).encode())
+            digest.update(file.read(CHUNK_SIZE))
+            file.seek(-CHUNK_SIZE, 2)
+            digest.update(file.read(CHUNK_SIZE))
+    return digest.hexdigest()
+
+
+def directory_digests(directories: List[str], root: str, name_filter: Callable[[str], bool]) -> Dict[str, str]:
+    """
+        Computes the digests of the files in the given directories whose names pass the filter.
+
+        Args:
+            - directories (List[str]): The directories to scan (not recursively).
+            - root (str): The directory the returned paths are relative to.
+            - name_filter (Callable[[str], bool]): A function deciding which file names to include.
+
+        Returns:
+            - Dict[str, str]: A dictionary mapping file paths relative to the root to their digests.
+    """
+    digests: Dict[str, str] = {}
+    for directory in directories:
+        if not path.exists(directory):
+            continue
+        for name in listdir(directory):
+            file_path: str = path.join(directory, name)
+            if path.isfile(file_path) and name_filter(name):
+                digests[path.relpath(file_path, root)] = file_digest(file_path)
+    return digests
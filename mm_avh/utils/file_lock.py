@@ -0,0 +1,54 @@
+"""
+    Module file_lock provides a lock file shared by processes, also on other machines using the same working space.
+    The lock is a file created exclusively next to the guarded file, which works the same on Windows,
+    Linux and network drives. A lock left by a crashed process is removed once it is older than 'stale_time'.
+
+    * Example usage:
+        with file_lock('tts_calibration.json.lock'):
+            data = read()
+            write(data)
+"""
+
+from contextlib import contextmanager, suppress
+from os import O_CREAT, O_EXCL, O_WRONLY, close, getpid, makedirs, open as open_fd, path, remove, stat, write
+from time import sleep, time
+from typing import Iterator
+
+RETRY_INTERVAL: float = 0.05
+
+
+@contextmanager
+def file_lock(lock_path: str, timeout: float = 30.0, stale_time: float = 120.0) -> Iterator[None]:
+    """
+        Holds a lock file while the block runs, waiting for other processes holding it.
+
+        Args:
+            - lock_path (str): The path to the lock file.
+            - timeout (float): How many seconds to wait for the lock. Defaults to 30.
+            - stale_time (float): The age in seconds after which a lock is treated as left by a crashed process.
+              Defaults to 120.
+
+        Raises:
+            - TimeoutError: If the lock is still held by another process after the timeout.
+    """
+    makedirs(path.dirname(lock_path) or '.', exist_ok=True)
+    deadline: float = time() + timeout
+    while True:
+        try:
+            fd: int = open_fd(lock_path, O_CREAT | O_EXCL | O_WRONLY)
+            break
+        except FileExistsError:
+            with suppress(FileNotFoundError):
+                if time() - stat(lock_path).st_mtime > stale_time:
+                    remove(lock_path)
+                    continue
+            if time() > deadline:
+                raise TimeoutError(f'The lock {lock_path} is held by another process.') from None
+            sleep(RETRY_INTERVAL)
+    try:
+        write(fd, str(getpid()).encode())
+        close(fd)
+        yield
+    finally:
+        with suppress(FileNotFoundError):
+            remove(lock_path)
@@ -0,0 +1,308 @@
+"""
+    Module process_runner runs external tools (mkvextract, mkvmerge, ffmpeg, balcon) with asyncio.
+    All processes run on one background event loop, which limits how many processes of each tool
+    run at the same time, so many jobs can be started at once without oversubscribing the machine.
+    The output is streamed line by line (ffmpeg progress lines ending with '\\r' included),
+    the return code is checked, and a process is killed on timeout or cancellation.
+
+    * Example usage:
+        result = run_process([MKV_MERGE_PATH, '-J', 'example.mkv'])
+        data = loads(result.stdout)
+
+    * Example usage with progress and a timeout:
+        run_process([FFMPEG_PATH, '-i', 'in.mkv', 'out.mp4'], timeout=3600,
+                    on_stderr_line=lambda line: print(line))
+
+    * Example usage without blocking:
+        future = submit_process([BALABOLKA_PATH, '-f', 'example.srt', '-w', 'example.wav'])
+        ...
+        future.result()
+"""
+
+import asyncio
+import codecs
+import sys
+from asyncio import AbstractEventLoop
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from os import getpid, path
+from re import compile as re_compile, Pattern
+from subprocess import DEVNULL, PIPE, CalledProcessError, TimeoutExpired
+from threading import Lock, Thread
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Sequence
+
+TOOL_LIMITS: Dict[str, int] = {
+    'mkvextract': 2,
+    'mkvmerge': 4,
+    'ffmpeg': 2,
+    'balcon': 1,
+}
+DEFAULT_LIMIT: int = 4
+LINE_SEPARATOR: Pattern = re_compile(r'\r\n|\r|\n')
+
+
+@dataclass(slots=True)
+class ProcessResult:
+    """
+        The result of a finished process.
+
+        Attributes:
+            - command (List[str]): The command which was run.
+            - returncode (int): The return code of the process.
+            - stdout (str): The whole standard output.
+            - stderr (str): The whole standard error output.
+            - elapsed (float): The run time in seconds (without waiting for a free slot).
+    """
+    command: List[str]
+    returncode: int
+    stdout: str
+    stderr: str
+    elapsed: float
+
+
+@dataclass(slots=True)
+class ProcessRunner:
+    """
+        Runs external processes on a background asyncio event loop, with a concurrency limit for each tool.
+
+        Attributes:
+            - limits (Dict[str, int]): The maximum number of processes of each tool (name without the extension).
+            - loop (Optional[AbstractEventLoop]): The background event loop, started on first use.
+            - semaphores (Dict[str, asyncio.Semaphore]): The semaphores limiting each tool.
+            - lock (Lock): Guards the start of the event loop.
+            - pid (int): The process which started the loop; a forked worker process starts its own loop.
+
+        Methods:
+            - run_async(self, command, ...) -> ProcessResult: Runs a process (coroutine, on the runner loop).
+            - submit(self, command, **kwargs) -> Future: Starts a process and returns a future of its result.
+            - run(self, command, **kwargs) -> ProcessResult: Runs a process and waits for its result.
+    """
+    limits: Dict[str, int] = field(default_factory=lambda: dict(TOOL_LIMITS))
+    loop: Optional[AbstractEventLoop] = None
+    semaphores: Dict[str, asyncio.Semaphore] = field(default_factory=dict)
+    lock: Lock = field(default_factory=Lock)
+    pid: int = 0
+
+    def _get_loop(self) -> AbstractEventLoop:
+        """
+            Returns the background event loop, starting it in a daemon thread on first use.
+
+            Returns:
+                - AbstractEventLoop: The running event loop.
+        """
+        with self.lock:
+            if self.loop is None or self.pid != getpid():
+                self.pid = getpid()
+                self.semaphores = {}
+                self.loop = asyncio.new_event_loop()
+                Thread(target=self.loop.run_forever, name='process_runner', daemon=True).start()
+            return self.loop
+
+    @staticmethod
+    def get_tool_name(command: Sequence[str]) -> str:
+        """
+            Returns the name of the tool run by a command, e.g. 'ffmpeg' for 'bin/ffmpeg/bin/ffmpeg.exe'.
+
+            Args:
+                - command (Sequence[str]): The command.
+
+            Returns:
+                - str: The lower-case file name of the executable without the extension.
+        """
+        return path.splitext(path.basename(command[0]))[0].lower()
+
+    def _get_semaphore(self, tool: str) -> asyncio.Semaphore:
+        """
+            Returns the semaphore of a tool. Called only on the runner loop.
+
+            Args:
+                - tool (str): The name of the tool.
+
+            Returns:
+                - asyncio.Semaphore: The semaphore limiting the tool.
+        """
+        if tool not in self.semaphores:
+            self.semaphores[tool] = asyncio.Semaphore(
+                self.limits.get(tool, DEFAULT_LIMIT))
+        return self.semaphores[tool]
+
+    async def run_async(self, command: Sequence[str],
+                        tool: Optional[str] = None,
+                        timeout: Optional[float] = None,
+                        success_codes: Sequence[int] = (0,),
+                        on_stdout_line: Optional[Callable[[str], None]] = None,
+                        on_stderr_line: Optional[Callable[[str], None]] = None,
+                        echo: bool = False,
+                        cwd: Optional[str] = None) -> ProcessResult:
+        """
+            Runs a process once its tool has a free slot. Must be awaited on the runner loop.
+
+            Args:
+                - command (Sequence[str]): The command to run.
+                - tool (Optional[str]): The name of the tool for the concurrency limit. Defaults to the executable name.
+                - timeout (Optional[float]): The maximum run time in seconds. Defaults to None (no limit).
+                - success_codes (Sequence[int]): The return codes meaning success, e.g. (0, 1) for MKVToolNix warnings.
+                - on_stdout_line (Optional[Callable[[str], None]]): Called with every line of the standard output.
+                - on_stderr_line (Optional[Callable[[str], None]]): Called with every line of the standard error output.
+                - echo (bool): Whether to pass the output through to the console. Defaults to False.
+                - cwd (Optional[str]): The working directory of the process.
+
+            Returns:
+                - ProcessResult: The result of the process.
+
+            Raises:
+                - FileNotFoundError: If the executable does not exist.
+                - CalledProcessError: If the return code is not one of the success codes.
+                - TimeoutExpired: If the process runs longer than the timeout (it is killed).
+                  Both errors carry the run time of the process in the 'elapsed' attribute, as 'ProcessResult' does.
+                - asyncio.CancelledError: If the run is cancelled (the process is killed).
+        """
+        command = [str(argument) for argument in command]
+        async with self._get_semaphore(tool or self.get_tool_name(command)):
+            start: float = perf_counter()
+            process: asyncio.subprocess.Process = await asyncio.create_subprocess_exec(
+                *command, stdin=DEVNULL, stdout=PIPE, stderr=PIPE, cwd=cwd)
+            stdout_lines: List[str] = []
+            stderr_lines: List[str] = []
+            readers: asyncio.Future = asyncio.gather(
+                self._read_stream(process.stdout, stdout_lines, on_stdout_line,
+                                  sys.stdout if echo else None),
+                self._read_stream(process.stderr, stderr_lines, on_stderr_line,
+                                  sys.stderr if echo else None),
+                process.wait())
+            try:
+                await asyncio.wait_for(readers, timeout)
+            except asyncio.TimeoutError as error:
+                await self._kill(process)
+                timeout_error: TimeoutExpired = TimeoutExpired(command, timeout,
+                                                               '\n'.join(stdout_lines), '\n'.join(stderr_lines))
+                timeout_error.elapsed = perf_counter() - start
+                raise timeout_error from error
+            except asyncio.CancelledError:
+                await self._kill(process)
+                raise
+
+        result: ProcessResult = ProcessResult(command=command,
+                                              returncode=process.returncode,
+                                              stdout='\n'.join(stdout_lines),
+                                              stderr='\n'.join(stderr_lines),
+                                              elapsed=perf_counter() - start)
+        if result.returncode not in success_codes:
+            error: CalledProcessError = CalledProcessError(result.returncode, command, result.stdout, result.stderr)
+            error.elapsed = result.elapsed
+            raise error
+        return result
+
+    @staticmethod
+    async def _read_stream(stream: asyncio.StreamReader, lines: List[str],
+                           on_line: Optional[Callable[[str], None]], echo_to) -> None:
+        """
+            Reads a stream of the process in chunks and splits it into lines,
+            treating '\\r' as a line end too, so progress lines are reported as soon as they are written.
+            The chunks are decoded incrementally, so a character split between two chunks stays intact.
+
+            Args:
+                - stream (asyncio.StreamReader): The stream to read.
+                - lines (List[str]): The list collecting all lines.
+                - on_line (Optional[Callable[[str], None]]): Called with every line.
+                - echo_to: The console stream to pass the output through to, or None.
+        """
+        decoder: codecs.IncrementalDecoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        pending: str = ''
+        while True:
+            chunk: bytes = await stream.read(65536)
+            text: str = decoder.decode(chunk, final=not chunk)
+            if echo_to is not None:
+                echo_to.write(text)
+                echo_to.flush()
+            parts: List[str] = LINE_SEPARATOR.split(pending + text)
+            pending = parts.pop()
+            for line in parts:
+                lines.append(line)
+                if on_line is not None:
+                    on_line(line)
+            if not chunk:
+                break
+        if pending:
+            lines.append(pending)
+            if on_line is not None:
+                on_line(pending)
+
+    @staticmethod
+    async def _kill(process: asyncio.subprocess.Process) -> None:
+        """
+            Kills a process and waits until it exits.
+
+            Args:
+                - process (asyncio.subprocess.Process): The process to kill.
+        """
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+            await process.wait()
+
+    def submit(self, command: Sequence[str], **kwargs) -> Future:
+        """
+            Starts a process on the runner loop without waiting for it.
+            Cancelling the returned future kills the process.
+
+            Args:
+                - command (Sequence[str]): The command to run.
+                - **kwargs: The options of 'run_async'.
+
+            Returns:
+                - Future: The future of the ProcessResult.
+        """
+        return asyncio.run_coroutine_threadsafe(self.run_async(command, **kwargs), self._get_loop())
+
+    def run(self, command: Sequence[str], **kwargs) -> ProcessResult:
+        """
+            Runs a process and waits for its result. Ctrl+C kills the process.
+
+            Args:
+                - command (Sequence[str]): The command to run.
+                - **kwargs: The options of 'run_async'.
+
+            Returns:
+                - ProcessResult: The result of the process.
+        """
+        future: Future = self.submit(command, **kwargs)
+        try:
+            return future.result()
+        except KeyboardInterrupt:
+            future.cancel()
+            raise
+
+
+_runner: ProcessRunner = ProcessRunner()
+
+
+def run_process(command: Sequence[str], **kwargs) -> ProcessResult:
+    """
+        Runs a process with the shared runner and waits for its result. See 'ProcessRunner.run_async' for the options.
+
+        Args:
+            - command (Sequence[str]): The command to run.
+            - **kwargs: The options of 'ProcessRunner.run_async'.
+
+        Returns:
+            - ProcessResult: The result of the process.
+    """
+    return _runner.run(command, **kwargs)
+
+
+def submit_process(command: Sequence[str], **kwargs) -> Future:
+    """
+        Starts a process with the shared runner without waiting for it. See 'ProcessRunner.run_async' for the options.
+
+        Args:
+            - command (Sequence[str]): The command to run.
+            - **kwargs: The options of 'ProcessRunner.run_async'.
+
+        Returns:
+            - Future: The future of the ProcessResult.
+    """
+    return _runner.submit(command, **kwargs)